@@ -9,6 +9,7 @@ from .models import (
     Usuario, Estacion, EspacioEstacionamiento,
     Reserva, Pago, Resena, Notificacion, TicketSoporte
 )
+from .rut import parsear_rut
 
 
 # ============ USUARIO ADMIN ============
@@ -34,6 +35,14 @@ class UsuarioAdmin(UserAdmin):
             'fields': ('email', 'first_name', 'rut', 'telefono')
         }),
     )
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Un RUT completo (con guión, en cualquier formato) se busca por rut_numero"""
+        termino = search_term.strip()
+        partes = parsear_rut(termino) if '-' in termino else None
+        if partes is not None:
+            return queryset.filter(rut_numero=partes[0]), False
+        return super().get_search_results(request, queryset, search_term)
 
 
 # ============ ESTACIÓN ADMIN ============
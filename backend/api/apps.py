@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+    
+    def ready(self):
+        # Registrar receptores de señales
+        from . import signals  # noqa: F401
+        
+        # Conteo de consultas por request
+        from .instrumentacion import instalar
+        instalar()
+        
+        # Conteo de conexiones para /metrics
+        from . import metricas
+        metricas.instalar()
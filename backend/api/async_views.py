@@ -0,0 +1,343 @@
+"""
+Vistas asíncronas de la API de BikeMetro
+Archivo: backend/api/async_views.py
+
+Vistas Django nativas (async def) para rutas que no deben ocupar un
+hilo del servidor bajo ASGI: esperas largas (long-poll), operaciones
+con hash de contraseña, que se ejecutan en el pool de api/hashing.py, y
+las lecturas más frecuentes de la app (estaciones, espacios y reservas
+activas). Las de estaciones responden desde api/disponibilidad.py sin
+salir del event loop mientras la cache está vigente.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import update_last_login
+from django.http import HttpResponse, JsonResponse
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from . import hashing
+from .disponibilidad import ESTACIONES, cache_disponibilidad, clave_espacios
+from .models import Estacion, EspacioEstacionamiento, Notificacion, Reserva
+from .renderers import JSONRapidoRenderer
+from .revocacion import RefreshTokenRevocable
+from .serializers import (
+    BusquedaLoginSerializer, EspacioEstacionamientoSerializer, EstacionListSerializer,
+    NotificacionSerializer, ReservaListSerializer, UsuarioRegistroSerializer
+)
+from .tiempo_real import canal_notificaciones
+from .views import EstacionViewSet, ReservaViewSet
+
+
+# Límites de la espera (segundos) y de notificaciones devueltas por respuesta
+ESPERA_POR_DEFECTO = 30
+ESPERA_MAXIMA = 60
+MAX_NOTIFICACIONES = 50
+
+
+# ============ AUTENTICACIÓN ============
+def _autenticar(request):
+    """Autenticar con las clases configuradas en REST_FRAMEWORK (JWT)"""
+    # Como rest_framework.request.Request: respetar APIClient.force_authenticate
+    forzado = getattr(request, '_force_auth_user', None)
+    if forzado is not None:
+        return forzado
+    for clase in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        resultado = clase().authenticate(request)
+        if resultado is not None:
+            return resultado[0]
+    return None
+
+
+def _respuesta_error(request, exc):
+    """JsonResponse con la forma y el estado del manejador de excepciones de DRF"""
+    datos = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    respuesta = JsonResponse(datos, status=exc.status_code, safe=False)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        clases = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        encabezado = clases[0]().authenticate_header(request) if clases else None
+        if encabezado:
+            respuesta['WWW-Authenticate'] = encabezado
+        else:
+            respuesta.status_code = 403
+    return respuesta
+
+
+async def _usuario_o_error(request, consulta=None):
+    """
+    Retorna (usuario, None) o (None, JsonResponse de error)
+    Con `consulta(usuario)` retorna (su resultado, None): autenticación y
+    consulta van en un solo paso por el hilo de la BD
+    """
+    def autenticar_y_consultar():
+        usuario = _autenticar(request)
+        if usuario is None or not usuario.is_active:
+            raise exceptions.NotAuthenticated()
+        return usuario if consulta is None else consulta(usuario)
+
+    try:
+        return await sync_to_async(autenticar_y_consultar)(), None
+    except exceptions.APIException as exc:
+        return None, _respuesta_error(request, exc)
+
+
+def _leer_json(request):
+    """Retorna (datos, None) o (None, JsonResponse de error)"""
+    try:
+        datos = json.loads(request.body or b'{}')
+    except ValueError:
+        return None, JsonResponse({'detail': 'JSON inválido'}, status=400)
+    if not isinstance(datos, dict):
+        return None, JsonResponse({'detail': 'Se esperaba un objeto JSON'}, status=400)
+    return datos, None
+
+
+def _emitir_tokens(usuario):
+    refresh = RefreshTokenRevocable.for_user(usuario)
+    if jwt_settings.UPDATE_LAST_LOGIN:
+        update_last_login(None, usuario)
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
+
+
+def _credenciales_invalidas(serializer):
+    errores = serializer.errors.get(api_settings.NON_FIELD_ERRORS_KEY, [])
+    return any(getattr(error, 'code', None) == 'credenciales' for error in errores)
+
+
+def _guardar_password(usuario, encoded):
+    usuario.password = encoded
+    usuario.save(update_fields=['password'])
+
+
+# ============ AUTH VIEWS ============
+async def login(request):
+    """
+    Login con email, RUT o nickname
+    POST /api/auth/login/
+    Body: {"login": "...", "password": "..."}  ('username' también se acepta)
+    Respuesta: {"refresh": "...", "access": "..."}
+    """
+    if request.method != 'POST':
+        return JsonResponse({'detail': 'Método no permitido'}, status=405)
+
+    datos, error = _leer_json(request)
+    if error is not None:
+        return error
+
+    # Solo busca al usuario: la contraseña se verifica abajo, en el pool
+    serializer = BusquedaLoginSerializer(data=datos)
+    if not await sync_to_async(serializer.is_valid)():
+        if not _credenciales_invalidas(serializer):
+            return JsonResponse(serializer.errors, status=400)
+        # Usuario inexistente: hashear igual, para no revelarlo por tiempo
+        await hashing.verificar(str(datos.get('password', '')), None)
+        return JsonResponse({'detail': 'Credenciales inválidas'}, status=401)
+
+    usuario = serializer.validated_data['user']
+    password = serializer.validated_data['password']
+    encoded = usuario.password
+
+    if not await hashing.verificar(password, encoded) or not usuario.is_active:
+        return JsonResponse({'detail': 'Credenciales inválidas'}, status=401)
+
+    # Re-hashear si cambió el algoritmo o el costo configurado (igual que ModelBackend)
+    if hashing.requiere_actualizacion(encoded):
+        nuevo = await hashing.hashear(password)
+        await sync_to_async(_guardar_password)(usuario, nuevo)
+
+    return JsonResponse(await sync_to_async(_emitir_tokens)(usuario))
+
+
+async def registro(request):
+    """
+    Registro de nuevos usuarios
+    POST /api/auth/register/
+    Body: {"nickname", "nombre", "email", "rut", "telefono", "password", "password_confirm"}
+    """
+    if request.method != 'POST':
+        return JsonResponse({'detail': 'Método no permitido'}, status=405)
+
+    datos, error = _leer_json(request)
+    if error is not None:
+        return error
+
+    serializer = UsuarioRegistroSerializer(data=datos)
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    password_hash = await hashing.hashear(serializer.validated_data['password'])
+    await sync_to_async(serializer.save)(password_hash=password_hash)
+    return JsonResponse(serializer.data, status=201)
+
+
+# Vistas de API sin sesión: no aplica CSRF (como APIView de DRF).
+# Se marca el atributo directamente porque @csrf_exempt en Django 4.2
+# envuelve la vista en una función síncrona.
+login.csrf_exempt = True
+registro.csrf_exempt = True
+
+
+# ============ NOTIFICACIÓN VIEWS ============
+async def _notificaciones_nuevas(usuario_id, after):
+    consulta = Notificacion.objects.filter(
+        usuario_id=usuario_id, id__gt=after
+    ).order_by('id')[:MAX_NOTIFICACIONES]
+    return [notificacion async for notificacion in consulta]
+
+
+async def _ultima_notificacion(usuario_id):
+    ultima = await Notificacion.objects.filter(
+        usuario_id=usuario_id
+    ).order_by('-id').values_list('id', flat=True).afirst()
+    return ultima or 0
+
+
+async def esperar_notificaciones(request):
+    """
+    Long-poll de notificaciones nuevas
+    GET /api/notificaciones/esperar/?after=<id>&timeout=30
+
+    Responde apenas exista una notificación con id > after, o con una lista
+    vacía al vencer el timeout. Sin `after`, espera las posteriores a la última.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': 'Método no permitido'}, status=405)
+
+    usuario, error = await _usuario_o_error(request)
+    if error is not None:
+        return error
+
+    try:
+        after = request.GET.get('after')
+        after = int(after) if after not in (None, '') else None
+        timeout = float(request.GET.get('timeout', ESPERA_POR_DEFECTO))
+    except ValueError:
+        return JsonResponse(
+            {'error': 'Parámetros inválidos: after debe ser entero y timeout numérico'},
+            status=400
+        )
+    timeout = min(max(timeout, 0), ESPERA_MAXIMA)
+
+    # Suscribirse antes de consultar para no perder publicaciones intermedias
+    espera = canal_notificaciones.suscribir(usuario.id)
+    try:
+        if after is None:
+            after = await _ultima_notificacion(usuario.id)
+            nuevas = []
+        else:
+            nuevas = await _notificaciones_nuevas(usuario.id, after)
+
+        if not nuevas and timeout > 0 and await espera.esperar(timeout):
+            nuevas = await _notificaciones_nuevas(usuario.id, after)
+    finally:
+        canal_notificaciones.desuscribir(usuario.id, espera)
+
+    return JsonResponse({
+        'after': nuevas[-1].id if nuevas else after,
+        'notificaciones': NotificacionSerializer(nuevas, many=True).data,
+    })
+
+
+# ============ LECTURAS FRECUENTES ============
+# Solo el caso común (GET JSON sin parámetros) se atiende aquí; el resto
+# (otros métodos, filtros, API navegable) va a la vista DRF de siempre.
+_estaciones_sync = EstacionViewSet.as_view(
+    {'get': 'list'}, basename='estacion', detail=False
+)
+_espacios_sync = EstacionViewSet.as_view(
+    {'get': 'espacios'}, basename='estacion', detail=True, **EstacionViewSet.espacios.kwargs
+)
+_activas_sync = ReservaViewSet.as_view(
+    {'get': 'activas'}, basename='reserva', detail=False, **ReservaViewSet.activas.kwargs
+)
+
+
+def _delegar(request):
+    return (
+        request.method != 'GET'
+        or bool(request.GET)
+        or 'text/html' in request.META.get('HTTP_ACCEPT', '')
+    )
+
+
+def _respuesta_json(contenido, status=200):
+    """Respuesta con el JSON ya renderizado (el mismo que la vista DRF, ver api/renderers.py)"""
+    respuesta = HttpResponse(contenido, status=status, content_type='application/json')
+    respuesta['Vary'] = 'Accept'
+    return respuesta
+
+
+async def _cargar_estaciones():
+    estaciones = [estacion async for estacion in EstacionViewSet.queryset.all()]
+    return JSONRapidoRenderer().render(EstacionListSerializer(estaciones, many=True).data)
+
+
+async def _cargar_espacios(estacion_id):
+    """JSON de los espacios, o None si la estación no existe o no está activa"""
+    consulta = EspacioEstacionamiento.objects.filter(
+        estacion_id=estacion_id, estacion__estado='ACTIVO'
+    ).order_by('fila', 'columna')
+    espacios = [espacio async for espacio in consulta]
+    if not espacios and not await Estacion.objects.filter(pk=estacion_id, estado='ACTIVO').aexists():
+        return None
+    return JSONRapidoRenderer().render(EspacioEstacionamientoSerializer(espacios, many=True).data)
+
+
+async def estaciones(request):
+    """
+    Listado de estaciones activas con espacios disponibles
+    GET /api/estaciones/
+    """
+    if _delegar(request):
+        return await sync_to_async(_estaciones_sync)(request)
+    return _respuesta_json(await cache_disponibilidad.obtener(ESTACIONES, _cargar_estaciones))
+
+
+async def espacios_estacion(request, pk):
+    """
+    Espacios de una estación
+    GET /api/estaciones/<id>/espacios/
+    """
+    if _delegar(request):
+        return await sync_to_async(_espacios_sync)(request, pk=pk)
+    contenido = await cache_disponibilidad.obtener(clave_espacios(pk), lambda: _cargar_espacios(pk))
+    if contenido is None:
+        return JsonResponse({'detail': 'No encontrado.'}, status=404)
+    return _respuesta_json(contenido)
+
+
+def _reservas_activas(usuario):
+    return list(
+        Reserva.objects.filter(
+            usuario=usuario, estado__in=['PENDIENTE', 'CONFIRMADA', 'EN_CURSO']
+        ).select_related('estacion', 'espacio').order_by('-created_at')
+    )
+
+
+async def reservas_activas(request):
+    """
+    Reservas activas del usuario (sin cache: dependen de cada usuario)
+    GET /api/reservas/activas/
+    """
+    if _delegar(request):
+        return await sync_to_async(_activas_sync)(request)
+
+    reservas, error = await _usuario_o_error(request, _reservas_activas)
+    if error is not None:
+        return error
+    return _respuesta_json(JSONRapidoRenderer().render(ReservaListSerializer(reservas, many=True).data))
+
+
+# Como en las rutas del router: CSRF lo decide la vista DRF al delegar y
+# `actions` da la acción a las métricas de /metrics
+for _vista, _accion in (
+    (estaciones, 'list'), (espacios_estacion, 'espacios'), (reservas_activas, 'activas')
+):
+    _vista.csrf_exempt = True
+    _vista.actions = {'get': _accion}
@@ -0,0 +1,178 @@
+"""
+Autenticación de usuarios de BikeMetro
+Archivo: backend/api/authentication.py
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .rut import formatear_rut, parsear_rut
+
+Usuario = get_user_model()
+
+
+def buscar_usuario_por_login(login):
+    """
+    Resolver un usuario por email, RUT o nickname en una sola consulta
+
+    Cada alternativa es una igualdad sobre una columna indexada (email,
+    rut_numero, username), así que SQLite/PostgreSQL la resuelven con una
+    unión de búsquedas por índice. Si más de un usuario coincide, gana el email,
+    luego el RUT y al final el nickname.
+    """
+    login = (login or '').strip()
+    if not login:
+        return None
+
+    condicion = Q(username=login)
+    email = login if '@' in login else None
+    if email:
+        condicion |= Q(email=email)
+    rut = parsear_rut(login)
+    if rut:
+        # Igualdad de enteros sobre el cuerpo; el DV se compara abajo
+        condicion |= Q(rut_numero=rut[0])
+
+    candidatos = list(Usuario.objects.filter(condicion)[:3])
+    for coincide in (
+        lambda u: email is not None and u.email == email,
+        lambda u: rut is not None and u.rut_numero == rut[0] and u.rut.upper() == formatear_rut(*rut),
+        lambda u: u.username == login,
+    ):
+        for usuario in candidatos:
+            if coincide(usuario):
+                return usuario
+    return None
+
+
+# ============ CACHE DE USUARIOS (JWT) ============
+class CacheUsuarios:
+    """
+    Cache LRU de usuarios por id, con TTL y tamaño máximo, segura entre hilos
+
+    Las claves se guardan como str: el claim del token trae el id como texto.
+    Cada id tiene un número de versión que invalidar() incrementa: una
+    lectura de BD iniciada antes de una invalidación no se guarda, así
+    una carga lenta no puede reinstalar datos ya modificados.
+    """
+
+    def __init__(self, maximo=2048, ttl=30):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # id -> (expira, usuario)
+        self._versiones = {}
+
+    def version(self, usuario_id):
+        usuario_id = str(usuario_id)
+        with self._lock:
+            return self._versiones.get(usuario_id, 0)
+
+    def obtener(self, usuario_id):
+        usuario_id = str(usuario_id)
+        with self._lock:
+            entrada = self._entradas.get(usuario_id)
+            if entrada is None:
+                return None
+            expira, usuario = entrada
+            if expira < time.monotonic():
+                del self._entradas[usuario_id]
+                return None
+            self._entradas.move_to_end(usuario_id)
+            return usuario
+
+    def guardar(self, usuario_id, usuario, version):
+        usuario_id = str(usuario_id)
+        with self._lock:
+            if self._versiones.get(usuario_id, 0) != version:
+                return
+            self._entradas[usuario_id] = (time.monotonic() + self.ttl, usuario)
+            self._entradas.move_to_end(usuario_id)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, usuario_id):
+        usuario_id = str(usuario_id)
+        with self._lock:
+            self._entradas.pop(usuario_id, None)
+            self._versiones[usuario_id] = self._versiones.get(usuario_id, 0) + 1
+            # Las versiones solo importan para ids con cargas en curso
+            if len(self._versiones) > self.maximo * 4:
+                self._versiones.clear()
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._versiones.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+_config_cache = getattr(settings, 'JWT_CACHE_USUARIOS', {})
+cache_usuarios = CacheUsuarios(
+    maximo=_config_cache.get('MAXIMO', 2048),
+    ttl=_config_cache.get('TTL', 30),
+)
+
+
+def obtener_usuario(usuario_id):
+    """
+    Usuario por id desde cache_usuarios (o la BD si no está); None si no existe
+    Retorna una copia: quien la recibe puede modificarla (ej: request.user)
+    """
+    usuario = cache_usuarios.obtener(usuario_id)
+    if usuario is None:
+        version = cache_usuarios.version(usuario_id)
+        usuario = Usuario.objects.filter(**{jwt_settings.USER_ID_FIELD: usuario_id}).first()
+        if usuario is None:
+            return None
+        cache_usuarios.guardar(usuario_id, usuario, version)
+    return copy.copy(usuario)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que resuelve el usuario desde cache_usuarios
+
+    Evita el SELECT de usuarios en cada request autenticado. Las entradas
+    se invalidan al guardar o eliminar el usuario (perfil, is_active,
+    contraseña, admin; ver api/signals.py). En despliegues con varios
+    procesos, el TTL acota cuánto puede tardar otro worker en ver el cambio.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        user = obtener_usuario(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                jwt_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
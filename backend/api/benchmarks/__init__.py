@@ -0,0 +1,24 @@
+"""
+Benchmarks de BikeMetro
+Archivo: backend/api/benchmarks/__init__.py
+
+Cada módulo expone:
+    agregar_argumentos(parser)  -> opciones propias del benchmark
+    ejecutar(opciones, salida)  -> dict con los resultados
+
+Uso: python manage.py benchmark <nombre> [opciones]
+"""
+
+BENCHMARKS = {
+    'login': 'api.benchmarks.login',
+    'autenticacion': 'api.benchmarks.autenticacion',
+    'hashing': 'api.benchmarks.hashing',
+    'rut': 'api.benchmarks.rut',
+    'endpoints': 'api.benchmarks.endpoints',
+    'instrumentacion': 'api.benchmarks.instrumentacion',
+    'bitacora': 'api.benchmarks.bitacora',
+    'sqlite': 'api.benchmarks.sqlite',
+    'asgi': 'api.benchmarks.asgi',
+    'respuestas': 'api.benchmarks.respuestas',
+    'serializacion': 'api.benchmarks.serializacion',
+}
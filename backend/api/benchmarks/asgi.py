@@ -0,0 +1,175 @@
+"""
+Benchmark bajo ASGI: vistas DRF síncronas vs vistas async con cache
+Archivo: backend/api/benchmarks/asgi.py
+
+Un solo event loop atiende --clientes corrutinas que piden en paralelo,
+como un worker de uvicorn: los requests se entregan directo al
+ASGIHandler de Django (sin sockets), con la cadena completa de middleware.
+Por ruta se comparan:
+- sync: la vista DRF de siempre (Django la corre en su hilo de vistas sync)
+- async: api/async_views.py con la cache de api/disponibilidad.py
+- async_sin_cache: la misma vista con TTL 0 (las cargas simultáneas aún se
+  comparten; mide el costo del ORM async más el render)
+
+Las variantes se alternan por rondas sobre una base con seed_data --escala.
+
+Uso: python manage.py benchmark asgi [--clientes 32] [--requests 400] [--escala 100]
+"""
+
+import asyncio
+import gc
+import time
+from datetime import timedelta
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.test.utils import override_settings
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.disponibilidad import cache_disponibilidad
+from api.models import Usuario, Estacion, EspacioEstacionamiento, Reserva
+from api.views import EstacionViewSet, ReservaViewSet
+from .utils import imprimir_tabla, resumen_tiempos
+
+
+RONDAS = 5
+
+# URLconf del benchmark: la API real más las vistas DRF en /sync/
+urlpatterns = [
+    path('api/', include('api.urls')),
+    path('sync/estaciones/', EstacionViewSet.as_view({'get': 'list'}, basename='estacion', detail=False)),
+    path('sync/estaciones/<int:pk>/espacios/', EstacionViewSet.as_view(
+        {'get': 'espacios'}, basename='estacion', detail=True, **EstacionViewSet.espacios.kwargs
+    )),
+    path('sync/reservas/activas/', ReservaViewSet.as_view(
+        {'get': 'activas'}, basename='reserva', detail=False, **ReservaViewSet.activas.kwargs
+    )),
+]
+
+
+def agregar_argumentos(parser):
+    parser.add_argument('--clientes', type=int, default=32, help='Clientes concurrentes (default: 32)')
+    parser.add_argument('--requests', type=int, default=400, help='Requests por ruta y variante (default: 400)')
+    parser.add_argument('--escala', type=int, default=100, help='Estaciones sintéticas (default: 100)')
+
+
+def _poblar(escala):
+    """Estaciones con espacios y un usuario con reservas activas; retorna (estacion_id, token)"""
+    call_command('seed_data', '--escala', str(escala), verbosity=0)
+    usuario = Usuario.objects.create_user(
+        username='asgi', email='asgi@bikemetro.cl', rut='22222222-2', password='Asgi-2024!'
+    )
+    estacion = Estacion.objects.filter(estado='ACTIVO').order_by('id').first()
+    for espacio in EspacioEstacionamiento.objects.filter(estacion=estacion)[:3]:
+        Reserva.objects.create(
+            usuario=usuario, estacion=estacion, espacio=espacio, estado='PENDIENTE',
+            fecha_expiracion_reserva=timezone.now() + timedelta(minutes=15),
+        )
+    return estacion.id, str(AccessToken.for_user(usuario))
+
+
+def _rutas(estacion_id):
+    return {
+        'estaciones': ('estaciones/', ('sync', 'async_sin_cache', 'async')),
+        'espacios': (f'estaciones/{estacion_id}/espacios/', ('sync', 'async_sin_cache', 'async')),
+        'activas': ('reservas/activas/', ('sync', 'async')),
+    }
+
+
+async def _pedir(aplicacion, ruta, cabeceras):
+    """Un request GET por ASGI; retorna el código de estado"""
+    terminado = asyncio.Event()
+    estado = {}
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': ruta, 'raw_path': ruta.encode(),
+        'query_string': b'', 'root_path': '', 'headers': cabeceras,
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+    enviado = False
+
+    async def recibir():
+        nonlocal enviado
+        if not enviado:
+            enviado = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await terminado.wait()
+        return {'type': 'http.disconnect'}
+
+    async def enviar(mensaje):
+        if mensaje['type'] == 'http.response.start':
+            estado['codigo'] = mensaje['status']
+        elif not mensaje.get('more_body', False):
+            terminado.set()
+
+    await aplicacion(scope, recibir, enviar)
+    return estado['codigo']
+
+
+async def _carga(aplicacion, ruta, cabeceras, clientes, total):
+    """Latencias de `total` requests repartidos en `clientes` corrutinas, y segundos totales"""
+    muestras = []
+    pendientes = iter(range(total))
+
+    async def cliente():
+        for _ in pendientes:
+            inicio = time.perf_counter()
+            codigo = await _pedir(aplicacion, ruta, cabeceras)
+            muestras.append(time.perf_counter() - inicio)
+            assert codigo == 200, (ruta, codigo)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(clientes)))
+    return muestras, time.perf_counter() - inicio
+
+
+async def _medir(opciones, estacion_id, token):
+    aplicacion = ASGIHandler()
+    cabeceras = [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())]
+    rutas = _rutas(estacion_id)
+    muestras = {(nombre, variante): [] for nombre, (_, variantes) in rutas.items() for variante in variantes}
+    segundos = dict.fromkeys(muestras, 0.0)
+    por_ronda = max(1, opciones['requests'] // RONDAS)
+    ttl = cache_disponibilidad.ttl
+
+    for ronda in range(RONDAS + 1):  # La ronda 0 calienta
+        for nombre, (ruta, variantes) in rutas.items():
+            for variante in variantes:
+                prefijo = '/sync/' if variante == 'sync' else '/api/'
+                cache_disponibilidad.ttl = 0 if variante == 'async_sin_cache' else ttl
+                gc.collect()  # Que la basura de una variante no se cobre en la siguiente
+                try:
+                    propias, duracion = await _carga(
+                        aplicacion, prefijo + ruta, cabeceras, opciones['clientes'], por_ronda
+                    )
+                finally:
+                    cache_disponibilidad.ttl = ttl
+                if ronda:
+                    muestras[(nombre, variante)].extend(propias)
+                    segundos[(nombre, variante)] += duracion
+
+    return {
+        clave: dict(resumen_tiempos(muestras[clave]), por_segundo=len(muestras[clave]) / segundos[clave])
+        for clave in muestras
+    }
+
+
+def ejecutar(opciones, salida):
+    estacion_id, token = _poblar(opciones['escala'])
+    with override_settings(ROOT_URLCONF=__name__):
+        medidas = asyncio.run(_medir(opciones, estacion_id, token))
+
+    resultados = {}
+    filas = []
+    for (nombre, variante), datos in medidas.items():
+        resultados.setdefault(nombre, {})[variante] = datos
+        filas.append(dict(ruta=nombre, variante=variante, **datos))
+
+    salida.write(
+        f"{opciones['clientes']} clientes en un event loop, {Estacion.objects.count()} estaciones "
+        f"(tiempos en ms)"
+    )
+    imprimir_tabla(salida, filas, ['ruta', 'variante', 'por_segundo', 'p50', 'p95', 'p99'])
+    return resultados
@@ -0,0 +1,59 @@
+"""
+Benchmark de autenticación JWT: usuario desde BD vs. desde cache en memoria
+Archivo: backend/api/benchmarks/autenticacion.py
+
+Uso: python manage.py benchmark autenticacion [--iteraciones 500]
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import CachedJWTAuthentication, cache_usuarios
+from api.models import Usuario
+from api.views import ReservaViewSet
+from .utils import cronometrar, imprimir_tabla, resumen_tiempos
+
+
+def agregar_argumentos(parser):
+    parser.add_argument('--iteraciones', type=int, default=500, help='Requests por variante (default: 500)')
+
+
+def _medir(clase, token, iteraciones):
+    """Latencia de GET /api/reservas/activas/ autenticando con `clase`"""
+    original = ReservaViewSet.authentication_classes
+    ReservaViewSet.authentication_classes = [clase]
+    cliente = APIClient()
+    cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    try:
+        cliente.get('/api/reservas/activas/')  # calentar
+        muestras = []
+        with CaptureQueriesContext(connection) as consultas:
+            for _ in range(iteraciones):
+                respuesta, segundos = cronometrar(cliente.get, '/api/reservas/activas/')
+                assert respuesta.status_code == 200, respuesta.content
+                muestras.append(segundos)
+    finally:
+        ReservaViewSet.authentication_classes = original
+    return dict(resumen_tiempos(muestras), consultas=len(consultas) / iteraciones)
+
+
+def ejecutar(opciones, salida):
+    usuario = Usuario.objects.create_user(
+        username='bench', email='bench@bikemetro.cl', rut='11111111-1',
+        telefono='+56900000000', password='Benchmark-2024!',
+    )
+    token = str(AccessToken.for_user(usuario))
+    cache_usuarios.limpiar()
+
+    resultados = {
+        'JWTAuthentication': _medir(JWTAuthentication, token, opciones['iteraciones']),
+        'CachedJWTAuthentication': _medir(CachedJWTAuthentication, token, opciones['iteraciones']),
+    }
+
+    imprimir_tabla(salida, [
+        dict(clase=clase, **datos) for clase, datos in resultados.items()
+    ], ['clase', 'n', 'consultas', 'media', 'p50', 'p95', 'p99'])
+    return resultados
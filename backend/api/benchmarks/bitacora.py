@@ -0,0 +1,163 @@
+"""
+Benchmark del logging: escritura síncrona vs cola con hilo escritor
+Archivo: backend/api/benchmarks/bitacora.py
+
+Variantes (todas escriben JSON a un archivo temporal, no a logs/):
+- sincrono: ArchivoRotativo directo en los loggers (escritura en el request)
+- cola: ManejadorCola -> ArchivoRotativo
+- cola+muestreo: además FiltroMuestreo al 1% para DEBUG del logger `bench`
+
+Bajo carga, --hilos clientes piden una ruta protegida sin credenciales
+(cada 401 escribe un WARNING de django.request) alternando variantes por rondas.
+--escritura-lenta-ms agrega una espera a cada escritura para simular un
+disco o una consola lentos. Aparte se mide el costo por llamada de
+logger.info / logger.debug en el hilo que loguea.
+
+Uso: python manage.py benchmark bitacora [--hilos 8] [--iteraciones 200] [--escritura-lenta-ms 0.5]
+"""
+
+import logging
+import logging.config
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.test import Client
+
+from api.bitacora import ArchivoRotativo
+from api.metricas import LOGS_DESCARTADOS
+from .utils import imprimir_tabla, resumen_tiempos
+
+
+VARIANTES = ('sincrono', 'cola', 'cola+muestreo')
+RUTA = '/api/reservas/'  # Sin credenciales: 401 liviano, sin BD
+RONDAS = 10
+
+
+def agregar_argumentos(parser):
+    parser.add_argument('--hilos', type=int, default=8, help='Clientes concurrentes (default: 8)')
+    parser.add_argument('--iteraciones', type=int, default=200, help='Requests por hilo y variante (default: 200)')
+    parser.add_argument('--escritura-lenta-ms', type=float, default=0.0, help='Espera por escritura (default: 0)')
+    parser.add_argument('--llamadas', type=int, default=20000, help='Llamadas al logger por variante (default: 20000)')
+
+
+class ArchivoLento(ArchivoRotativo):
+    def __init__(self, filename, retardo=0.0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.retardo = retardo
+
+    def emit(self, record):
+        if self.retardo:
+            time.sleep(self.retardo)
+        super().emit(record)
+
+
+def _configurar(variante, ruta, retardo):
+    handlers = {
+        'archivo': {'()': ArchivoLento, 'filename': ruta, 'retardo': retardo, 'formatter': 'json'},
+    }
+    destinos = ['archivo']
+    if variante != 'sincrono':
+        handlers['cola'] = {'()': 'api.bitacora.ManejadorCola', 'destino': 'bench.destinos'}
+        if variante == 'cola+muestreo':
+            handlers['cola']['filters'] = ['muestreo']
+        destinos = ['cola']
+    loggers = {
+        nombre: {'handlers': destinos, 'level': 'DEBUG', 'propagate': False}
+        for nombre in ('django', 'api', 'bench')
+    }
+    loggers['bench.destinos'] = {'handlers': ['archivo'], 'level': 'DEBUG', 'propagate': False}
+    logging.config.dictConfig({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {'json': {'()': 'api.bitacora.FormatoJSON'}},
+        'filters': {'muestreo': {'()': 'api.bitacora.FiltroMuestreo', 'tasas': {'bench': 0.01}}},
+        'handlers': handlers,
+        'loggers': loggers,
+    })
+
+
+def _carga(hilos, iteraciones):
+    """Latencias de `hilos` clientes concurrentes"""
+    muestras = [[] for _ in range(hilos)]
+    barrera = threading.Barrier(hilos)
+
+    def cliente(indice):
+        cliente = Client()
+        barrera.wait()
+        for _ in range(iteraciones):
+            inicio = time.perf_counter()
+            respuesta = cliente.get(RUTA)
+            muestras[indice].append(time.perf_counter() - inicio)
+            assert respuesta.status_code == 401, respuesta.status_code
+
+    trabajadores = [threading.Thread(target=cliente, args=(indice,)) for indice in range(hilos)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    return [muestra for lista in muestras for muestra in lista]
+
+
+def _descartados():
+    return sum(valor for _, valor in LOGS_DESCARTADOS.estado()['series'])
+
+
+def _llamadas(cantidad):
+    """Microsegundos por llamada en el hilo que loguea"""
+    logger = logging.getLogger('bench')
+    resultado = {}
+    for nivel, metodo in (('info', logger.info), ('debug', logger.debug)):
+        inicio = time.perf_counter()
+        for indice in range(cantidad):
+            metodo('Llamada %d', indice)
+        resultado[nivel] = (time.perf_counter() - inicio) / cantidad * 1e6
+    return resultado
+
+
+def ejecutar(opciones, salida):
+    retardo = opciones['escritura_lenta_ms'] / 1000
+    por_ronda = max(1, opciones['iteraciones'] // RONDAS)
+    muestras = {variante: [] for variante in VARIANTES}
+    descartados = dict.fromkeys(VARIANTES, 0)
+    llamadas = {}
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'bench.log')
+        try:
+            _configurar('sincrono', ruta, 0.0)
+            _carga(opciones['hilos'], 5)  # calentar
+            for _ in range(RONDAS):
+                for variante in VARIANTES:
+                    _configurar(variante, ruta, retardo)
+                    antes = _descartados()
+                    muestras[variante].extend(_carga(opciones['hilos'], por_ronda))
+                    descartados[variante] += _descartados() - antes
+            for variante in VARIANTES:
+                _configurar(variante, ruta, retardo)
+                llamadas[variante] = _llamadas(opciones['llamadas'])
+        finally:
+            # Restaurar LOGGING (cierra los handlers temporales y vacía la cola)
+            logging.config.dictConfig(settings.LOGGING)
+
+    resultados = {}
+    filas = []
+    for variante in VARIANTES:
+        resultados[variante] = dict(
+            resumen_tiempos(muestras[variante]),
+            descartados=descartados[variante],
+            llamada_info_us=llamadas[variante]['info'],
+            llamada_debug_us=llamadas[variante]['debug'],
+        )
+        filas.append(dict(variante=variante, **resultados[variante]))
+
+    salida.write(
+        f"{opciones['hilos']} hilos, escritura lenta {opciones['escritura_lenta_ms']} ms "
+        f"(latencia del request en ms, llamada al logger en µs)"
+    )
+    imprimir_tabla(salida, filas, [
+        'variante', 'n', 'media', 'p50', 'p95', 'p99', 'descartados', 'llamada_info_us', 'llamada_debug_us',
+    ])
+    return resultados
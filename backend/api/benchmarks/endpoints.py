@@ -0,0 +1,438 @@
+"""
+Benchmark de endpoints: latencia, consultas SQL y memoria por ruta
+Archivo: backend/api/benchmarks/endpoints.py
+
+Recorre todas las rutas de api/urls.py (CASOS define cómo llamar a cada
+una) sobre una base poblada con seed_data --escala y generar_carga. Por
+caso mide p50/p95/p99 de latencia, consultas SQL por request y el pico de
+memoria de Python (tracemalloc) en un request aparte.
+
+El resultado se compara con la línea base versionada
+(baseline/endpoints.json) usando los presupuestos de presupuestos.json:
+consultas extra permitidas (un N+1 nuevo falla siempre), tolerancia
+relativa de p95 y memoria, y topes absolutos por caso. Si algo se excede
+el comando termina con error.
+
+Uso:
+    python manage.py benchmark endpoints
+    python manage.py benchmark endpoints --solo reserva --iteraciones 50
+    python manage.py benchmark endpoints --guardar-baseline
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.urls import URLResolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import (
+    Usuario, Estacion, EspacioEstacionamiento, Reserva,
+    Pago, Resena, Notificacion, TicketSoporte
+)
+from api.revocacion import RefreshTokenRevocable
+from api.rut import formatear_rut
+from .utils import imprimir_tabla, resumen_tiempos
+
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(DIRECTORIO, 'baseline', 'endpoints.json')
+PRESUPUESTOS = os.path.join(DIRECTORIO, 'presupuestos.json')
+
+# Semilla de datos por defecto (la línea base se generó con estos valores)
+CONFIGURACION = {'escala': 200, 'usuarios': 20000, 'dias': 30, 'semilla': 42}
+
+PASSWORD_BENCH = 'Benchmark-2024!'
+
+
+# ============ CASOS ============
+@dataclass
+class Caso:
+    """
+    Un request contra una ruta con nombre de api/urls.py
+    `preparar(ctx)` corre antes de cada request, fuera del tiempo medido;
+    su resultado llega a `kwargs(ctx, p)` y `datos(ctx, p)`
+    """
+    ruta: str
+    metodo: str = 'get'
+    kwargs: object = None
+    consulta: str = ''
+    datos: object = None
+    preparar: object = None
+    autenticado: object = True  # False, True o 'staff'
+    estado: int = 200
+    max_iteraciones: int = None  # Para rutas que hashean contraseñas
+
+    @property
+    def nombre(self):
+        sufijo = f'?{self.consulta}' if self.consulta else ''
+        return f'{self.metodo.upper()} {self.ruta}{sufijo}'
+
+    def url(self, ctx, preparado):
+        kwargs = self.kwargs(ctx, preparado) if self.kwargs else None
+        url = reverse(self.ruta, kwargs=kwargs)
+        consulta = self.consulta.format(ctx=ctx) if self.consulta else ''
+        return f'{url}?{consulta}' if consulta else url
+
+
+def _reserva(ctx, estado, **extra):
+    """Reserva nueva del usuario del benchmark (sin espacio, para no agotarlos)"""
+    ahora = timezone.now()
+    return Reserva.objects.create(
+        usuario=ctx.usuario, estacion_id=ctx.estacion_id, estado=estado,
+        fecha_expiracion_reserva=ahora + timedelta(minutes=10), **extra
+    )
+
+
+def _espacio_libre(ctx):
+    if not ctx.espacios_libres:
+        raise RuntimeError('No quedan espacios disponibles para POST reserva-list')
+    return ctx.espacios_libres.pop()
+
+
+def _registro(ctx, _):
+    ctx.contador += 1
+    cuerpo = 40_000_000 + ctx.contador
+    return {
+        'nickname': f'benchreg{ctx.contador}', 'nombre': 'Bench',
+        'email': f'benchreg{ctx.contador}@bikemetro.cl', 'rut': formatear_rut(cuerpo),
+        'telefono': '+56900000000', 'password': PASSWORD_BENCH, 'password_confirm': PASSWORD_BENCH,
+    }
+
+
+def _pk(atributo):
+    return lambda ctx, _: {'pk': getattr(ctx, atributo)}
+
+
+def _pk_preparado(ctx, preparado):
+    return {'pk': preparado.pk}
+
+
+CASOS = [
+    Caso('api-root'),
+
+    # Autenticación
+    Caso('token_obtain_pair', 'post', autenticado=False, max_iteraciones=10,
+         datos=lambda ctx, _: {'login': ctx.usuario.username, 'password': PASSWORD_BENCH}),
+    Caso('token_refresh', 'post', autenticado=False,
+         preparar=lambda ctx: str(RefreshTokenRevocable.for_user(ctx.usuario)),
+         datos=lambda ctx, refresh: {'refresh': refresh}),
+    Caso('register', 'post', autenticado=False, estado=201, max_iteraciones=10, datos=_registro),
+
+    # Usuarios
+    Caso('usuario-list'),
+    Caso('usuario-detail', kwargs=lambda ctx, _: {'pk': ctx.usuario.pk}),
+    Caso('usuario-me'),
+    Caso('usuario-me', 'patch', datos=lambda ctx, _: {'telefono': '+56911111111'}),
+
+    # Estaciones
+    Caso('estacion-list', autenticado=False),
+    Caso('estacion-detail', kwargs=_pk('estacion_id'), autenticado=False),
+    Caso('estacion-espacios', kwargs=_pk('estacion_id'), autenticado=False),
+
+    # Reservas
+    Caso('reserva-list'),
+    Caso('reserva-list', 'post', estado=201, preparar=_espacio_libre,
+         datos=lambda ctx, espacio: {'estacion': espacio[0], 'espacio': espacio[1]}),
+    Caso('reserva-activas'),
+    Caso('reserva-historial'),
+    Caso('reserva-detail', kwargs=_pk('reserva_id')),
+    Caso('reserva-detail', 'patch', kwargs=_pk('reserva_id'), datos=lambda ctx, _: {'notas': 'bench'}),
+    Caso('reserva-detail', 'delete', estado=204, kwargs=_pk_preparado,
+         preparar=lambda ctx: _reserva(ctx, 'CANCELADA')),
+    Caso('reserva-confirmar', 'post', kwargs=_pk_preparado,
+         preparar=lambda ctx: _reserva(ctx, 'PENDIENTE'),
+         datos=lambda ctx, reserva: {'qr_code': str(reserva.qr_entrada)}),
+    Caso('reserva-finalizar', 'post', kwargs=_pk_preparado,
+         preparar=lambda ctx: _reserva(ctx, 'CONFIRMADA', fecha_entrada=timezone.now() - timedelta(hours=3)),
+         datos=lambda ctx, reserva: {'qr_code': str(reserva.qr_salida)}),
+    Caso('reserva-cancelar', 'post', kwargs=_pk_preparado,
+         preparar=lambda ctx: _reserva(ctx, 'PENDIENTE')),
+
+    # Pagos
+    Caso('pago-list'),
+    Caso('pago-detail', kwargs=_pk('pago_id')),
+
+    # Reseñas
+    Caso('resena-list'),
+    Caso('resena-list', consulta='estacion={ctx.estacion_id}'),
+    Caso('resena-list', consulta='resumen=1'),
+    Caso('resena-list', 'post', estado=201,
+         preparar=lambda ctx: _reserva(ctx, 'FINALIZADA'),
+         datos=lambda ctx, reserva: {'estacion': ctx.estacion_id, 'reserva': str(reserva.pk), 'calificacion': 4}),
+    Caso('resena-detail', kwargs=_pk('resena_id')),
+
+    # Notificaciones
+    Caso('notificacion-list'),
+    Caso('notificacion-detail', kwargs=_pk('notificacion_id')),
+    Caso('notificacion-no-leidas'),
+    Caso('notificacion-marcar-leida', 'post', kwargs=_pk_preparado,
+         preparar=lambda ctx: Notificacion.objects.create(
+             usuario=ctx.usuario, tipo='SISTEMA', titulo='Bench', mensaje='Benchmark de endpoints'
+         )),
+    Caso('notificacion-marcar-todas-leidas', 'post'),
+    Caso('notificacion-esperar', consulta='after={ctx.ultima_notificacion}&timeout=0'),
+
+    # Tickets
+    Caso('ticket-list'),
+    Caso('ticket-detail', kwargs=_pk('ticket_id')),
+    Caso('ticket-list', 'post', estado=201,
+         datos=lambda ctx, _: {'tipo': 'CONSULTA', 'asunto': 'Bench', 'descripcion': 'Benchmark de endpoints'}),
+
+    # Staff (al final: no cambia el orden ni el estado de cache de los casos anteriores)
+    Caso('instrumentacion', autenticado='staff'),
+]
+
+
+def rutas_api():
+    """Nombres de todas las rutas de api/urls.py"""
+    import api.urls
+
+    def recorrer(patrones):
+        for patron in patrones:
+            if isinstance(patron, URLResolver):
+                yield from recorrer(patron.url_patterns)
+            elif patron.name:
+                yield patron.name
+
+    return set(recorrer(api.urls.urlpatterns))
+
+
+def rutas_sin_caso():
+    return sorted(rutas_api() - {caso.ruta for caso in CASOS})
+
+
+# ============ DATOS ============
+class Contexto:
+    """Ids usados por los casos; el usuario es el que más reservas tiene"""
+
+    def __init__(self, usuario, tamano_pool):
+        self.usuario = usuario
+        self.contador = 0
+        self.estacion_id = Reserva.objects.filter(usuario=usuario).values_list(
+            'estacion_id', flat=True
+        ).first() or Estacion.objects.filter(estado='ACTIVO').values_list('id', flat=True).first()
+        self.reserva_id = Reserva.objects.filter(usuario=usuario).values_list('id', flat=True).first()
+        self.pago_id = Pago.objects.filter(reserva__usuario=usuario).values_list('id', flat=True).first()
+        self.resena_id = Resena.objects.values_list('id', flat=True).first()
+        self.notificacion_id = Notificacion.objects.filter(usuario=usuario).values_list('id', flat=True).first()
+        self.ultima_notificacion = Notificacion.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.ticket_id = TicketSoporte.objects.filter(usuario=usuario).values_list('id', flat=True).first()
+        self.espacios_libres = list(EspacioEstacionamiento.objects.filter(
+            estado='DISPONIBLE', estacion__estado='ACTIVO'
+        ).order_by('-id').values_list('estacion_id', 'id')[:tamano_pool])
+
+
+def poblar(configuracion):
+    """seed_data + generar_carga; retorna el usuario con más reservas"""
+    from api.carga_sintetica import generar_carga
+
+    call_command('seed_data', '--escala', str(configuracion['escala']),
+                 '--semilla', str(configuracion['semilla']), verbosity=0)
+    generar_carga(configuracion['usuarios'], configuracion['dias'], semilla=configuracion['semilla'])
+
+    usuario_id = Reserva.objects.values('usuario').annotate(
+        total=Count('id')
+    ).order_by('-total', 'usuario').values_list('usuario', flat=True).first()
+    usuario = Usuario.objects.get(pk=usuario_id)
+
+    # Un ticket y una reseña propios para los casos de detalle
+    if not TicketSoporte.objects.filter(usuario=usuario).exists():
+        TicketSoporte.objects.create(
+            usuario=usuario, tipo='CONSULTA', asunto='Bench', descripcion='Benchmark de endpoints'
+        )
+    usuario.set_password(PASSWORD_BENCH)
+    usuario.save(update_fields=['password'])
+    return usuario
+
+
+# ============ MEDICIÓN ============
+def _request(cliente, caso, ctx):
+    preparado = caso.preparar(ctx) if caso.preparar else None
+    url = caso.url(ctx, preparado)
+    datos = caso.datos(ctx, preparado) if caso.datos else None
+    funcion = getattr(cliente, caso.metodo)
+    return lambda: funcion(url, datos, format='json') if datos is not None else funcion(url)
+
+
+def _verificar(caso, respuesta):
+    if respuesta.status_code != caso.estado:
+        raise RuntimeError(
+            f'{caso.nombre}: se esperaba {caso.estado} y se obtuvo {respuesta.status_code} '
+            f'({respuesta.content[:200]!r})'
+        )
+
+
+def _contar(consultas):
+    # execute_wrapper en vez de CaptureQueriesContext: el cliente de pruebas
+    # emite request_started, que vacía connection.queries a mitad del request
+    def envoltura(ejecutar, sql, params, many, contexto):
+        consultas.append(sql)
+        return ejecutar(sql, params, many, contexto)
+    return envoltura
+
+
+def medir_caso(caso, ctx, clientes, iteraciones):
+    cliente = clientes[caso.autenticado]
+
+    # Request instrumentado: consultas y pico de memoria
+    enviar = _request(cliente, caso, ctx)
+    consultas = []
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        with connection.execute_wrapper(_contar(consultas)):
+            respuesta = enviar()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    _verificar(caso, respuesta)
+
+    # Requests cronometrados
+    if caso.max_iteraciones:
+        iteraciones = min(iteraciones, caso.max_iteraciones)
+    muestras = []
+    for _ in range(iteraciones):
+        enviar = _request(cliente, caso, ctx)
+        inicio = time.perf_counter()
+        respuesta = enviar()
+        muestras.append(time.perf_counter() - inicio)
+        _verificar(caso, respuesta)
+
+    tiempos = {clave: round(valor, 3) for clave, valor in resumen_tiempos(muestras).items()}
+    return dict(
+        tiempos,
+        consultas=len(consultas),
+        memoria_kb=round(pico / 1024, 1),
+    )
+
+
+# ============ COMPARACIÓN ============
+def _leer_json(ruta):
+    if not ruta or not os.path.isfile(ruta):
+        return None
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def comparar(resultados, baseline, presupuestos, misma_configuracion):
+    """Lista de (caso, mensaje) con cada presupuesto excedido"""
+    fallos = []
+    por_defecto = presupuestos.get('por_defecto', {})
+    referencia = (baseline or {}).get('casos', {})
+
+    for nombre, medido in resultados.items():
+        limites = dict(por_defecto, **presupuestos.get('casos', {}).get(nombre, {}))
+        base = referencia.get(nombre)
+
+        # Topes absolutos
+        for clave, tope in (('consultas', 'consultas'), ('p95', 'p95_ms'), ('memoria_kb', 'memoria_kb')):
+            if tope in limites and medido[clave] > limites[tope]:
+                fallos.append((nombre, f'{clave} {medido[clave]:g} > tope {limites[tope]:g}'))
+
+        if base is None:
+            continue
+
+        # Relativos a la línea base
+        permitidas = base['consultas'] + limites.get('consultas_extra', 0)
+        if medido['consultas'] > permitidas:
+            fallos.append((nombre, f"consultas {medido['consultas']} > {permitidas} (línea base {base['consultas']})"))
+
+        if not misma_configuracion:
+            continue  # Latencia y memoria solo son comparables con los mismos datos
+        for clave, tolerancia, minimo in (
+            ('p95', 'tolerancia_latencia', 'margen_latencia_ms'),
+            ('memoria_kb', 'tolerancia_memoria', 'margen_memoria_kb'),
+        ):
+            permitido = max(
+                base[clave] * (1 + limites.get(tolerancia, 0)),
+                base[clave] + limites.get(minimo, 0),
+            )
+            if medido[clave] > permitido:
+                fallos.append((nombre, f'{clave} {medido[clave]:.1f} > {permitido:.1f} (línea base {base[clave]:.1f})'))
+
+    return fallos
+
+
+# ============ EJECUCIÓN ============
+def agregar_argumentos(parser):
+    parser.add_argument('--iteraciones', type=int, default=100, help='Requests por caso (default: 100)')
+    parser.add_argument('--escala', type=int, default=CONFIGURACION['escala'], help='Estaciones sintéticas')
+    parser.add_argument('--usuarios', type=int, default=CONFIGURACION['usuarios'], help='Usuarios sintéticos')
+    parser.add_argument('--dias', type=int, default=CONFIGURACION['dias'], help='Días de actividad sintética')
+    parser.add_argument('--semilla', type=int, default=CONFIGURACION['semilla'], help='Semilla de los datos')
+    parser.add_argument('--solo', help='Medir solo los casos cuyo nombre contenga este texto')
+    parser.add_argument('--baseline', default=BASELINE, help='Línea base a comparar')
+    parser.add_argument('--presupuestos', default=PRESUPUESTOS, help='Presupuestos por caso (JSON)')
+    parser.add_argument(
+        '--guardar-baseline',
+        action='store_true',
+        help='Escribir los resultados como nueva línea base en vez de comparar',
+    )
+
+
+def ejecutar(opciones, salida):
+    configuracion = {clave: opciones[clave] for clave in CONFIGURACION}
+
+    inicio = time.perf_counter()
+    usuario = poblar(configuracion)
+    salida.write(f'Datos generados en {time.perf_counter() - inicio:.1f}s (usuario: {usuario.username})')
+
+    casos = [caso for caso in CASOS if not opciones['solo'] or opciones['solo'] in caso.nombre]
+    ctx = Contexto(usuario, tamano_pool=opciones['iteraciones'] * 2 + 10)
+
+    anonimo = APIClient()
+    autenticado = APIClient()
+    autenticado.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshTokenRevocable.for_user(usuario).access_token}')
+    staff = APIClient()
+    staff.force_authenticate(Usuario.objects.create_user(
+        username='benchstaff', email='benchstaff@bikemetro.cl', rut=formatear_rut(39_999_999),
+        telefono='+56900000000', password=PASSWORD_BENCH, is_staff=True,
+    ))
+    clientes = {False: anonimo, True: autenticado, 'staff': staff}
+
+    resultados = {}
+    for caso in casos:
+        resultados[caso.nombre] = medir_caso(caso, ctx, clientes, opciones['iteraciones'])
+
+    imprimir_tabla(salida, [
+        dict(caso=nombre, **datos) for nombre, datos in resultados.items()
+    ], ['caso', 'n', 'consultas', 'memoria_kb', 'p50', 'p95', 'p99'])
+
+    informe = {'configuracion': configuracion, 'casos': resultados}
+    sin_caso = rutas_sin_caso()
+
+    if opciones['guardar_baseline']:
+        os.makedirs(os.path.dirname(opciones['baseline']), exist_ok=True)
+        with open(opciones['baseline'], 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False, sort_keys=True)
+            archivo.write('\n')
+        salida.write(f"\n✓ Línea base guardada en {opciones['baseline']}")
+        return informe
+
+    baseline = _leer_json(opciones['baseline'])
+    if baseline is None:
+        salida.write(f"\n⚠ Sin línea base en {opciones['baseline']} (use --guardar-baseline)")
+    misma_configuracion = baseline is not None and baseline.get('configuracion') == configuracion
+    if baseline is not None and not misma_configuracion:
+        salida.write('\n⚠ Datos distintos a los de la línea base: solo se comparan consultas')
+
+    fallos = comparar(resultados, baseline, _leer_json(opciones['presupuestos']) or {}, misma_configuracion)
+    fallos.extend((ruta, 'ruta sin caso en api/benchmarks/endpoints.py') for ruta in sin_caso)
+
+    if fallos:
+        salida.write('\nPresupuestos excedidos:')
+        for nombre, mensaje in fallos:
+            salida.write(f'  ✗ {nombre}: {mensaje}')
+    else:
+        salida.write('\n✓ Dentro de los presupuestos')
+
+    informe['fallos'] = [{'caso': nombre, 'mensaje': mensaje} for nombre, mensaje in fallos]
+    return informe
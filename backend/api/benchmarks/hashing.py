@@ -0,0 +1,129 @@
+"""
+Benchmark de hash de contraseñas: pool de hilos vs. cálculo en línea
+Archivo: backend/api/benchmarks/hashing.py
+
+Lanza registros y logins concurrentes contra las vistas async y, en
+paralelo, requests baratos (long-poll con timeout=0) para medir cuánto
+esperan los demás requests mientras se calculan los hashes.
+
+Uso: python manage.py benchmark hashing [--concurrencia 8] [--requests 32]
+"""
+
+import asyncio
+import time
+
+from django.conf import settings
+from django.test import AsyncClient, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import Usuario
+from api.rut import formatear_rut
+from .utils import imprimir_tabla, resumen_tiempos
+
+
+PASSWORD = 'Benchmark-2024!'
+
+
+def agregar_argumentos(parser):
+    parser.add_argument('--concurrencia', type=int, default=8, help='Requests simultáneos de login/registro (default: 8)')
+    parser.add_argument('--requests', type=int, default=32, help='Registros y logins por variante (default: 32)')
+    parser.add_argument('--workers', type=int, default=None, help='Hilos del pool (default: PASSWORD_HASH_WORKERS)')
+
+
+async def _en_paralelo(funciones, concurrencia):
+    """Ejecutar corutinas con a lo más `concurrencia` simultáneas; retorna segundos totales"""
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def limitar(funcion):
+        async with semaforo:
+            await funcion()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(limitar(funcion) for funcion in funciones))
+    return time.perf_counter() - inicio
+
+
+async def _sondear(cliente, token, muestras, detener):
+    """Request barato repetido mientras dure la carga"""
+    while not detener.is_set():
+        inicio = time.perf_counter()
+        respuesta = await cliente.get(
+            '/api/notificaciones/esperar/?after=0&timeout=0',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        assert respuesta.status_code == 200, respuesta.content
+        muestras.append(time.perf_counter() - inicio)
+        await asyncio.sleep(0.01)
+
+
+async def _medir(variante, base_rut, token, opciones):
+    cliente = AsyncClient()
+    n = opciones['requests']
+
+    async def registrar(i):
+        respuesta = await cliente.post('/api/auth/register/', {
+            'nickname': f'{variante}{i}',
+            'nombre': 'Bench',
+            'email': f'{variante}{i}@bikemetro.cl',
+            'rut': formatear_rut(base_rut + i),
+            'telefono': '+56900000000',
+            'password': PASSWORD,
+            'password_confirm': PASSWORD,
+        }, content_type='application/json')
+        assert respuesta.status_code == 201, respuesta.content
+
+    async def ingresar(i):
+        respuesta = await cliente.post('/api/auth/login/', {
+            'login': f'{variante}{i}@bikemetro.cl', 'password': PASSWORD,
+        }, content_type='application/json')
+        assert respuesta.status_code == 200, respuesta.content
+
+    resultados = {}
+    for fase, funcion in (('registro', registrar), ('login', ingresar)):
+        sondeos, detener = [], asyncio.Event()
+        sonda = asyncio.create_task(_sondear(cliente, token, sondeos, detener))
+        segundos = await _en_paralelo(
+            [lambda i=i: funcion(i) for i in range(n)], opciones['concurrencia']
+        )
+        detener.set()
+        await sonda
+        resultados[fase] = {
+            'variante': variante,
+            'fase': fase,
+            'req_s': n / segundos,
+            'sondeo': resumen_tiempos(sondeos),
+        }
+    return resultados
+
+
+def ejecutar(opciones, salida):
+    usuario = Usuario.objects.create_user(
+        username='bench', email='bench@bikemetro.cl', rut='11111111-1',
+        telefono='+56900000000', password=PASSWORD,
+    )
+    token = str(AccessToken.for_user(usuario))
+    workers = opciones['workers'] or settings.PASSWORD_HASH_WORKERS or 1
+
+    with override_settings(PASSWORD_HASH_WORKERS=workers):
+        pool = asyncio.run(_medir('pool', 20_000_000, token, opciones))
+    with override_settings(PASSWORD_HASH_WORKERS=0):
+        en_linea = asyncio.run(_medir('inline', 21_000_000, token, opciones))
+
+    filas = [
+        {
+            'variante': datos['variante'],
+            'fase': datos['fase'],
+            'req_s': datos['req_s'],
+            'sondeo_p50': datos['sondeo']['p50'],
+            'sondeo_p95': datos['sondeo']['p95'],
+            'sondeo_p99': datos['sondeo']['p99'],
+            'sondeos': datos['sondeo']['n'],
+        }
+        for resultados in (pool, en_linea)
+        for datos in resultados.values()
+    ]
+    salida.write(f'Workers: {workers}  Concurrencia: {opciones["concurrencia"]}\n')
+    imprimir_tabla(salida, filas, [
+        'variante', 'fase', 'req_s', 'sondeo_p50', 'sondeo_p95', 'sondeo_p99', 'sondeos'
+    ])
+    return {'workers': workers, 'pool': pool, 'inline': en_linea}
@@ -0,0 +1,113 @@
+"""
+Benchmark del costo de InstrumentacionMiddleware
+Archivo: backend/api/benchmarks/instrumentacion.py
+
+Mide los mismos requests con la instrumentación activa e inactiva,
+alternando rondas para que la deriva de la máquina afecte a ambas
+variantes por igual, y el costo aislado del execute_wrapper por consulta.
+
+Uso: python manage.py benchmark instrumentacion [--iteraciones 300] [--reservas 200]
+"""
+
+import time
+
+from django.db import connection
+from rest_framework.test import APIClient
+
+from api.instrumentacion import InstrumentacionMiddleware, Medicion, _medicion
+from api.models import Usuario, Estacion, Reserva
+from .utils import imprimir_tabla, resumen_tiempos
+
+
+RUTAS = [
+    '/api/notificaciones/no_leidas/',   # 1 consulta, respuesta mínima
+    '/api/reservas/',                   # 3 consultas, 20 filas serializadas
+]
+RONDAS = 10
+
+
+def agregar_argumentos(parser):
+    parser.add_argument('--iteraciones', type=int, default=300, help='Requests por ruta y variante (default: 300)')
+    parser.add_argument('--reservas', type=int, default=200, help='Reservas del usuario de prueba (default: 200)')
+
+
+def _preparar(reservas):
+    from datetime import timedelta
+    from django.utils import timezone
+
+    usuario = Usuario.objects.create_user(
+        username='bench', email='bench@bikemetro.cl', rut='11111111-1',
+        telefono='+56900000000', password='Benchmark-2024!',
+    )
+    estacion = Estacion.objects.create(nombre='Bench')
+    expira = timezone.now() + timedelta(minutes=10)
+    Reserva.objects.bulk_create([
+        Reserva(usuario=usuario, estacion=estacion, estado='FINALIZADA', fecha_expiracion_reserva=expira)
+        for _ in range(reservas)
+    ])
+    return usuario
+
+
+def _medir_requests(cliente, ruta, iteraciones):
+    """Muestras por variante, alternando activa/inactiva en rondas"""
+    muestras = {True: [], False: []}
+    por_ronda = max(1, iteraciones // RONDAS)
+    original = InstrumentacionMiddleware.activa
+    try:
+        for _ in range(RONDAS):
+            for activa in (True, False):
+                InstrumentacionMiddleware.activa = activa
+                for _ in range(por_ronda):
+                    inicio = time.perf_counter()
+                    respuesta = cliente.get(ruta)
+                    muestras[activa].append(time.perf_counter() - inicio)
+                    assert respuesta.status_code == 200, respuesta.content
+    finally:
+        InstrumentacionMiddleware.activa = original
+    return muestras
+
+
+def _medir_consultas(iteraciones):
+    """Costo por consulta del execute_wrapper, con y sin medición activa"""
+    resultados = {}
+    with connection.cursor() as cursor:
+        for nombre, medicion in (('sin medicion', None), ('con medicion', Medicion())):
+            token = _medicion.set(medicion)
+            try:
+                inicio = time.perf_counter()
+                for _ in range(iteraciones):
+                    cursor.execute('SELECT 1')
+                resultados[nombre] = (time.perf_counter() - inicio) / iteraciones * 1e6
+            finally:
+                _medicion.reset(token)
+    return resultados
+
+
+def ejecutar(opciones, salida):
+    usuario = _preparar(opciones['reservas'])
+    cliente = APIClient()
+    cliente.force_authenticate(usuario)
+    for ruta in RUTAS:
+        cliente.get(ruta)  # calentar
+
+    filas = []
+    resultados = {}
+    for ruta in RUTAS:
+        muestras = _medir_requests(cliente, ruta, opciones['iteraciones'])
+        activa, inactiva = resumen_tiempos(muestras[True]), resumen_tiempos(muestras[False])
+        resultados[ruta] = {'activa': activa, 'inactiva': inactiva}
+        for variante, datos in (('activa', activa), ('inactiva', inactiva)):
+            filas.append(dict(ruta=ruta, variante=variante, **datos))
+        filas.append(dict(
+            ruta=ruta, variante='sobrecosto',
+            media=activa['media'] - inactiva['media'], p50=activa['p50'] - inactiva['p50'],
+        ))
+
+    imprimir_tabla(salida, filas, ['ruta', 'variante', 'n', 'media', 'p50', 'p95', 'p99'])
+
+    consultas = _medir_consultas(opciones['iteraciones'] * 20)
+    salida.write('\nexecute_wrapper por consulta (SELECT 1):')
+    for nombre, microsegundos in consultas.items():
+        salida.write(f'  {nombre:<14} {microsegundos:6.2f} µs')
+    resultados['consulta_us'] = consultas
+    return resultados
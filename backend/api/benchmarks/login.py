@@ -0,0 +1,86 @@
+"""
+Benchmark de login: búsqueda del usuario vs. verificación de contraseña
+Archivo: backend/api/benchmarks/login.py
+
+Uso: python manage.py benchmark login [--usuarios 5000] [--iteraciones 200]
+"""
+
+import random
+
+from django.contrib.auth.hashers import make_password
+from rest_framework.test import APIClient
+
+from api.authentication import buscar_usuario_por_login
+from api.models import Usuario
+from api.rut import formatear_rut
+from .utils import cronometrar, imprimir_tabla, resumen_tiempos
+
+
+PASSWORD = 'Benchmark-2024!'
+
+
+def agregar_argumentos(parser):
+    parser.add_argument('--usuarios', type=int, default=5000, help='Usuarios sintéticos (default: 5000)')
+    parser.add_argument('--iteraciones', type=int, default=200, help='Logins por medición (default: 200)')
+
+
+def _rut_con_puntos(rut):
+    cuerpo, dv = rut.split('-')
+    return f'{int(cuerpo):,}'.replace(',', '.') + '-' + dv.lower()
+
+
+def ejecutar(opciones, salida):
+    rng = random.Random(42)
+    hash_password = make_password(PASSWORD)
+
+    Usuario.objects.bulk_create([
+        Usuario(
+            username=f'bench{i}',
+            email=f'bench{i}@bikemetro.cl',
+            rut=formatear_rut(10_000_000 + i),
+            rut_numero=10_000_000 + i,
+            telefono='+56900000000',
+            first_name='Bench',
+            password=hash_password,
+        )
+        for i in range(opciones['usuarios'])
+    ], batch_size=1000)
+
+    identificadores = []
+    for _ in range(opciones['iteraciones']):
+        i = rng.randrange(opciones['usuarios'])
+        identificadores.append(rng.choice([
+            f'bench{i}@bikemetro.cl',
+            _rut_con_puntos(formatear_rut(10_000_000 + i)),
+            f'bench{i}',
+        ]))
+
+    busquedas, verificaciones, endpoint = [], [], []
+    for login in identificadores:
+        usuario, segundos = cronometrar(buscar_usuario_por_login, login)
+        assert usuario is not None, login
+        busquedas.append(segundos)
+        _, segundos = cronometrar(usuario.check_password, PASSWORD)
+        verificaciones.append(segundos)
+
+    cliente = APIClient()
+    for login in identificadores:
+        respuesta, segundos = cronometrar(
+            cliente.post, '/api/auth/login/', {'login': login, 'password': PASSWORD}, format='json'
+        )
+        assert respuesta.status_code == 200, respuesta.content
+        endpoint.append(segundos)
+
+    resultados = {
+        'busqueda': resumen_tiempos(busquedas),
+        'hash_password': resumen_tiempos(verificaciones),
+        'endpoint': resumen_tiempos(endpoint),
+    }
+
+    imprimir_tabla(salida, [
+        dict(fase=fase, **datos) for fase, datos in resultados.items()
+    ], ['fase', 'n', 'media', 'p50', 'p95', 'p99'])
+    proporcion = resultados['hash_password']['media'] / resultados['endpoint']['media']
+    salida.write(f'\nVerificación de contraseña: {proporcion:.0%} del tiempo del endpoint')
+
+    return resultados
@@ -0,0 +1,110 @@
+"""
+Benchmark de la cache de respuestas de EstacionViewSet
+Archivo: backend/api/benchmarks/respuestas.py
+
+Variantes (api/respuestas.py):
+- sin_cache: la vista DRF completa en cada request
+- memoria: LRU por proceso
+- archivo: LRU en un directorio temporal (compartible entre workers)
+
+Bajo carga, --hilos clientes piden el listado ordenado y el detalle de
+una estación (rutas que atiende la vista DRF, no las vistas async). Aparte
+se mide la estampida: tras una invalidación, todos los hilos piden la
+misma ruta a la vez y se cuentan las reconstrucciones.
+
+Uso: python manage.py benchmark respuestas [--hilos 8] [--iteraciones 200] [--escala 100]
+"""
+
+import tempfile
+import threading
+import time
+
+from django.core.management import call_command
+from django.test import Client
+
+from api import respuestas
+from api.metricas import CACHE_RESPUESTAS
+from api.models import Estacion
+from .utils import imprimir_tabla, resumen_tiempos
+
+
+VARIANTES = ('sin_cache', 'memoria', 'archivo')
+
+
+def agregar_argumentos(parser):
+    parser.add_argument('--hilos', type=int, default=8, help='Clientes concurrentes (default: 8)')
+    parser.add_argument('--iteraciones', type=int, default=200, help='Requests por hilo, ruta y variante (default: 200)')
+    parser.add_argument('--escala', type=int, default=100, help='Estaciones sintéticas (default: 100)')
+
+
+def _backend(variante, directorio):
+    if variante == 'memoria':
+        return respuestas.MemoriaLRU()
+    if variante == 'archivo':
+        return respuestas.ArchivoLRU(directorio)
+    return None
+
+
+def _carga(ruta, hilos, iteraciones):
+    """Latencias de `hilos` clientes concurrentes pidiendo `ruta`"""
+    muestras = [[] for _ in range(hilos)]
+    barrera = threading.Barrier(hilos)
+
+    def cliente(indice):
+        cliente = Client()
+        barrera.wait()
+        for _ in range(iteraciones):
+            inicio = time.perf_counter()
+            respuesta = cliente.get(ruta)
+            muestras[indice].append(time.perf_counter() - inicio)
+            assert respuesta.status_code == 200, respuesta.status_code
+
+    trabajadores = [threading.Thread(target=cliente, args=(indice,)) for indice in range(hilos)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    return [muestra for lista in muestras for muestra in lista]
+
+
+def _construcciones():
+    return sum(valor for etiquetas, valor in CACHE_RESPUESTAS.estado()['series'] if etiquetas == ['fallo'])
+
+
+def ejecutar(opciones, salida):
+    call_command('seed_data', '--escala', str(opciones['escala']), verbosity=0)
+    estacion_id = Estacion.objects.filter(estado='ACTIVO').order_by('id').values_list('id', flat=True).first()
+    rutas = {
+        'listado': '/api/estaciones/?ordering=nombre',
+        'detalle': f'/api/estaciones/{estacion_id}/',
+    }
+
+    original = respuestas.cache_respuestas.backend
+    resultados = {}
+    filas = []
+    try:
+        with tempfile.TemporaryDirectory() as directorio:
+            for variante in VARIANTES:
+                respuestas.cache_respuestas.backend = _backend(variante, directorio)
+                for nombre, ruta in rutas.items():
+                    _carga(ruta, opciones['hilos'], 5)  # calentar
+                    muestras = _carga(ruta, opciones['hilos'], opciones['iteraciones'])
+
+                    respuestas.cache_respuestas.invalidar()
+                    antes = _construcciones()
+                    _carga(ruta, opciones['hilos'], 1)
+                    estampida = _construcciones() - antes if variante != 'sin_cache' else opciones['hilos']
+
+                    resultados.setdefault(variante, {})[nombre] = dict(
+                        resumen_tiempos(muestras), reconstrucciones=estampida
+                    )
+                    filas.append(dict(variante=variante, ruta=nombre, **resultados[variante][nombre]))
+    finally:
+        respuestas.cache_respuestas.backend = original
+
+    salida.write(
+        f"{opciones['hilos']} hilos, {Estacion.objects.count()} estaciones (tiempos en ms; "
+        f"reconstrucciones tras invalidar con {opciones['hilos']} requests simultáneos)"
+    )
+    imprimir_tabla(salida, filas, ['variante', 'ruta', 'n', 'media', 'p50', 'p95', 'p99', 'reconstrucciones'])
+    return resultados
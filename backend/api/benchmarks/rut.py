@@ -0,0 +1,111 @@
+"""
+Benchmark de RUT: validación masiva y búsqueda por texto vs. por entero
+Archivo: backend/api/benchmarks/rut.py
+
+Uso: python manage.py benchmark rut [--ruts 200000] [--usuarios 20000] [--busquedas 2000]
+"""
+
+import random
+import re
+import time
+
+from django.db.models import Q
+
+from api.models import Usuario
+from api.rut import formatear_rut, normalizar_rut, parsear_rut, validar_rut
+from .utils import cronometrar, imprimir_tabla, resumen_tiempos
+
+
+# Validación anterior (solo formato, sin dígito verificador)
+_RUT_FORMATO_RE = re.compile(r'^\d{7,8}-[\dkK]$')
+
+
+def agregar_argumentos(parser):
+    parser.add_argument('--ruts', type=int, default=200_000, help='RUTs a validar (default: 200000)')
+    parser.add_argument('--usuarios', type=int, default=20_000, help='Usuarios sintéticos (default: 20000)')
+    parser.add_argument('--busquedas', type=int, default=2000, help='Búsquedas por variante (default: 2000)')
+
+
+def _formatos(cuerpo, dv):
+    """Mismo RUT escrito de distintas formas"""
+    con_puntos = f'{cuerpo:,}'.replace(',', '.')
+    return [f'{cuerpo}-{dv}', f'{con_puntos}-{dv}', f'{cuerpo}{dv}', f'{con_puntos}-{dv.lower()}']
+
+
+def _generar_ruts(cantidad, rng):
+    """Mezcla de RUTs válidos (en varios formatos) y con DV incorrecto"""
+    ruts = []
+    for _ in range(cantidad):
+        cuerpo = rng.randrange(5_000_000, 26_000_000)
+        dv = formatear_rut(cuerpo).split('-')[1]
+        if rng.random() < 0.2:
+            dv = rng.choice([d for d in '0123456789K' if d != dv])
+        ruts.append(rng.choice(_formatos(cuerpo, dv)))
+    return ruts
+
+
+def _medir_validacion(nombre, funcion, ruts):
+    inicio = time.perf_counter()
+    validos = sum(1 for rut in ruts if funcion(rut))
+    segundos = time.perf_counter() - inicio
+    return {
+        'fase': nombre,
+        'n': len(ruts),
+        'validos': validos,
+        'ruts_s': len(ruts) / segundos if segundos > 0 else 0.0,
+    }
+
+
+def ejecutar(opciones, salida):
+    rng = random.Random(42)
+
+    # Validación masiva
+    ruts = _generar_ruts(opciones['ruts'], rng)
+    validacion = [
+        _medir_validacion('solo formato (regex)', _RUT_FORMATO_RE.match, ruts),
+        _medir_validacion('parsear_rut', parsear_rut, ruts),
+        _medir_validacion('normalizar_rut', normalizar_rut, ruts),
+        _medir_validacion('validar_rut (DV)', validar_rut, ruts),
+    ]
+    imprimir_tabla(salida, validacion, ['fase', 'n', 'validos', 'ruts_s'])
+
+    # Búsqueda por RUT con formato libre
+    cuerpos = rng.sample(range(5_000_000, 26_000_000), opciones['usuarios'])
+    Usuario.objects.bulk_create([
+        Usuario(
+            username=f'bench{i}',
+            email=f'bench{i}@bikemetro.cl',
+            rut=formatear_rut(cuerpo),
+            rut_numero=cuerpo,
+            telefono='+56900000000',
+            first_name='Bench',
+        )
+        for i, cuerpo in enumerate(cuerpos)
+    ], batch_size=1000)
+
+    consultas = [
+        rng.choice(_formatos(cuerpo, formatear_rut(cuerpo).split('-')[1]))
+        for cuerpo in rng.choices(cuerpos, k=opciones['busquedas'])
+    ]
+
+    def por_texto(valor):
+        # Antes: comparar el texto normalizado, en mayúscula y minúscula
+        rut = normalizar_rut(valor)
+        return Usuario.objects.filter(Q(rut__in={rut, rut.lower()})).first()
+
+    def por_entero(valor):
+        return Usuario.objects.filter(rut_numero=parsear_rut(valor)[0]).first()
+
+    busqueda = []
+    for nombre, funcion in (('rut (texto)', por_texto), ('rut_numero (entero)', por_entero)):
+        muestras = []
+        for valor in consultas:
+            usuario, segundos = cronometrar(funcion, valor)
+            assert usuario is not None, valor
+            muestras.append(segundos)
+        busqueda.append(dict(fase=nombre, **resumen_tiempos(muestras)))
+
+    salida.write('')
+    imprimir_tabla(salida, busqueda, ['fase', 'n', 'media', 'p50', 'p95', 'p99'])
+
+    return {'validacion': validacion, 'busqueda': busqueda}
@@ -0,0 +1,98 @@
+"""
+Benchmark de serialización de listados grandes
+Archivo: backend/api/benchmarks/serializacion.py
+
+Mide por separado serializer.data y el render a JSON para el listado de
+estaciones y de espacios (objetos ya cargados: sin tiempo de BD):
+- anterior: CharField(source='get_*_display'), coordenadas DecimalField,
+  JSONRenderer de DRF (encoder de la biblioteca estándar)
+- etiquetas: EtiquetaOpcionField y coordenadas float, JSONRenderer de DRF
+- rapido: lo anterior más JSONRapidoRenderer (orjson si está instalado)
+
+Uso: python manage.py benchmark serializacion [--escala 2000] [--repeticiones 5]
+"""
+
+import time
+
+from django.core.management import call_command
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.models import EspacioEstacionamiento
+from api.serializers import EspacioEstacionamientoSerializer, EstacionListSerializer
+from api.views import EstacionViewSet
+from .utils import imprimir_tabla
+
+
+# ============ SERIALIZERS ANTERIORES ============
+class EstacionListAnterior(EstacionListSerializer):
+    latitud = serializers.DecimalField(max_digits=10, decimal_places=7, read_only=True)
+    longitud = serializers.DecimalField(max_digits=10, decimal_places=7, read_only=True)
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    linea_display = serializers.CharField(source='get_linea_display', read_only=True)
+
+
+class EspacioAnterior(EspacioEstacionamientoSerializer):
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+
+
+VARIANTES = {
+    'anterior': {'estaciones': EstacionListAnterior, 'espacios': EspacioAnterior, 'renderer': JSONRenderer},
+    'etiquetas': {
+        'estaciones': EstacionListSerializer, 'espacios': EspacioEstacionamientoSerializer,
+        'renderer': JSONRenderer,
+    },
+    'rapido': {
+        'estaciones': EstacionListSerializer, 'espacios': EspacioEstacionamientoSerializer,
+        'renderer': renderers.JSONRapidoRenderer,
+    },
+}
+
+
+def agregar_argumentos(parser):
+    parser.add_argument('--escala', type=int, default=2000, help='Estaciones sintéticas (default: 2000)')
+    parser.add_argument('--repeticiones', type=int, default=5, help='Mediciones por variante (default: 5)')
+
+
+def _mejor(funcion, repeticiones):
+    """Menor tiempo de `repeticiones` llamadas (segundos) y el último resultado"""
+    mejor, resultado = None, None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def ejecutar(opciones, salida):
+    call_command('seed_data', '--escala', str(opciones['escala']), verbosity=0)
+    listados = {
+        'estaciones': list(EstacionViewSet.queryset.all()),
+        'espacios': list(EspacioEstacionamiento.objects.order_by('estacion_id', 'fila', 'columna')),
+    }
+
+    resultados = {}
+    filas = []
+    for variante, clases in VARIANTES.items():
+        renderer = clases['renderer']()
+        for nombre, objetos in listados.items():
+            serializar, datos = _mejor(
+                lambda: clases[nombre](objetos, many=True).data, opciones['repeticiones']
+            )
+            renderizar, contenido = _mejor(lambda: renderer.render(datos), opciones['repeticiones'])
+            resultados.setdefault(variante, {})[nombre] = {
+                'filas': len(objetos),
+                'serializar_ms': serializar * 1000,
+                'render_ms': renderizar * 1000,
+                'total_ms': (serializar + renderizar) * 1000,
+                'kb': len(contenido) / 1024,
+            }
+            filas.append(dict(variante=variante, listado=nombre, **resultados[variante][nombre]))
+
+    salida.write(
+        f"Mejor de {opciones['repeticiones']} (orjson {'disponible' if renderers.orjson else 'no instalado'})"
+    )
+    imprimir_tabla(salida, filas, ['variante', 'listado', 'filas', 'serializar_ms', 'render_ms', 'total_ms', 'kb'])
+    return resultados
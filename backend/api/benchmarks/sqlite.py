@@ -0,0 +1,189 @@
+"""
+Benchmark de lecturas y escrituras concurrentes sobre SQLite en archivo
+Archivo: backend/api/benchmarks/sqlite.py
+
+Compara perfiles de conexión sobre copias de la misma base migrada:
+- por_defecto: django.db.backends.sqlite3 sin opciones, una conexión por request
+- wal: solo los PRAGMAs de init_command, BEGIN diferido, una conexión por request
+- ajustada: DATABASES['default'] de settings (PRAGMAs, BEGIN IMMEDIATE, CONN_MAX_AGE)
+
+Los escritores reservan un espacio (leer espacio, crear reserva y
+actualizar el espacio en una transacción); los lectores listan reservas
+de una estación. Al terminar cada operación se cierra la conexión si su
+CONN_MAX_AGE lo pide, como al final de un request.
+
+Uso: python manage.py benchmark sqlite [--escritores 4] [--lectores 4] [--segundos 5]
+"""
+
+import copy
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+from api.models import Usuario, Estacion, EspacioEstacionamiento, Reserva
+from .utils import imprimir_tabla, resumen_tiempos
+
+
+VARIANTES = ('por_defecto', 'wal', 'ajustada')
+
+
+def agregar_argumentos(parser):
+    parser.add_argument('--escritores', type=int, default=4, help='Hilos que escriben (default: 4)')
+    parser.add_argument('--lectores', type=int, default=4, help='Hilos que leen (default: 4)')
+    parser.add_argument('--segundos', type=float, default=5.0, help='Duración por variante (default: 5)')
+    parser.add_argument('--estaciones', type=int, default=20, help='Estaciones de 42 espacios (default: 20)')
+
+
+def _configuracion(variante, nombre):
+    ajustada = copy.deepcopy(settings.DATABASES['default'])
+    if variante == 'ajustada':
+        return dict(ajustada, NAME=nombre)
+    configuracion = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': nombre, 'CONN_MAX_AGE': 0}
+    if variante == 'wal':
+        configuracion.update(
+            ENGINE=ajustada['ENGINE'],
+            OPTIONS={'init_command': ajustada['OPTIONS']['init_command']},
+        )
+    return configuracion
+
+
+def _registrar_alias(alias, configuracion):
+    # configure_settings exige 'default': se pasa el actual para completar los valores por omisión
+    configuradas = connections.configure_settings({'default': connections.settings['default'], alias: configuracion})
+    connections.settings[alias] = configuradas[alias]
+
+
+def _quitar_alias(alias):
+    connections[alias].close()
+    del connections.settings[alias]
+
+
+def _plantilla(ruta, estaciones):
+    """Base migrada con usuarios, estaciones y espacios (se copia por variante)"""
+    alias = 'bench_plantilla'
+    _registrar_alias(alias, _configuracion('por_defecto', ruta))
+    try:
+        call_command('migrate', database=alias, verbosity=0)
+        Usuario.objects.using(alias).bulk_create([
+            Usuario(username=f'sqlite{i}', email=f'sqlite{i}@bikemetro.cl', rut=f'{i}-0', password='!')
+            for i in range(200)
+        ])
+        for indice in range(estaciones):
+            estacion = Estacion.objects.using(alias).create(nombre=f'SQLite {indice}')
+            EspacioEstacionamiento.objects.using(alias).bulk_create([
+                EspacioEstacionamiento(estacion=estacion, fila=fila, columna=columna)
+                for fila, columna in EspacioEstacionamiento.distribucion(estacion.espacios_totales)
+            ])
+    finally:
+        _quitar_alias(alias)
+
+
+def _datos(alias):
+    return {
+        'usuarios': list(Usuario.objects.using(alias).values_list('id', flat=True)),
+        'estaciones': list(Estacion.objects.using(alias).values_list('id', flat=True)),
+        'espacios': list(EspacioEstacionamiento.objects.using(alias).values_list('id', flat=True)),
+    }
+
+
+def _escribir(alias, datos, rng):
+    with transaction.atomic(using=alias):
+        espacio = EspacioEstacionamiento.objects.using(alias).get(pk=rng.choice(datos['espacios']))
+        Reserva.objects.using(alias).create(
+            usuario_id=rng.choice(datos['usuarios']), estacion_id=espacio.estacion_id, espacio=espacio,
+            fecha_expiracion_reserva=timezone.now() + timedelta(minutes=10),
+        )
+        espacio.estado = 'RESERVADO' if espacio.estado == 'DISPONIBLE' else 'DISPONIBLE'
+        espacio.save(update_fields=['estado', 'updated_at'])
+
+
+def _leer(alias, datos, rng):
+    list(
+        Reserva.objects.using(alias)
+        .filter(estacion_id=rng.choice(datos['estaciones']))
+        .select_related('espacio')[:20]
+    )
+
+
+def _medir(alias, opciones):
+    datos = _datos(alias)
+    connections[alias].close()
+    fin = time.perf_counter() + opciones['segundos']
+    muestras = {'escritura': [], 'lectura': []}
+    errores = {'escritura': 0, 'lectura': 0}
+    lock = threading.Lock()
+
+    def trabajar(tipo, operacion, semilla):
+        rng = random.Random(semilla)
+        propias, fallidas = [], 0
+        try:
+            while time.perf_counter() < fin:
+                inicio = time.perf_counter()
+                try:
+                    operacion(alias, datos, rng)
+                    propias.append(time.perf_counter() - inicio)
+                except OperationalError:  # database is locked
+                    fallidas += 1
+                connections[alias].close_if_unusable_or_obsolete()
+        finally:
+            connections[alias].close()
+        with lock:
+            muestras[tipo].extend(propias)
+            errores[tipo] += fallidas
+
+    hilos = [
+        threading.Thread(target=trabajar, args=('escritura', _escribir, indice))
+        for indice in range(opciones['escritores'])
+    ] + [
+        threading.Thread(target=trabajar, args=('lectura', _leer, 1000 + indice))
+        for indice in range(opciones['lectores'])
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    return {
+        tipo: dict(
+            resumen_tiempos(muestras[tipo]),
+            por_segundo=len(muestras[tipo]) / opciones['segundos'],
+            errores=errores[tipo],
+        )
+        for tipo in muestras
+    }
+
+
+def ejecutar(opciones, salida):
+    resultados = {}
+    filas = []
+    with tempfile.TemporaryDirectory() as directorio:
+        plantilla = os.path.join(directorio, 'plantilla.sqlite3')
+        _plantilla(plantilla, opciones['estaciones'])
+
+        for variante in VARIANTES:
+            ruta = os.path.join(directorio, f'{variante}.sqlite3')
+            shutil.copy(plantilla, ruta)
+            alias = f'bench_{variante}'
+            _registrar_alias(alias, _configuracion(variante, ruta))
+            try:
+                resultados[variante] = _medir(alias, opciones)
+            finally:
+                _quitar_alias(alias)
+            for tipo, datos in resultados[variante].items():
+                filas.append(dict(variante=variante, operacion=tipo, **datos))
+
+    salida.write(
+        f"{opciones['escritores']} escritores, {opciones['lectores']} lectores, "
+        f"{opciones['segundos']} s por variante (tiempos en ms)"
+    )
+    imprimir_tabla(salida, filas, ['variante', 'operacion', 'por_segundo', 'errores', 'p50', 'p95', 'p99'])
+    return resultados
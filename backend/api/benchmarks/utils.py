@@ -0,0 +1,67 @@
+"""
+Utilidades comunes para benchmarks
+Archivo: backend/api/benchmarks/utils.py
+"""
+
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+def resumen_tiempos(muestras):
+    """Estadísticas en milisegundos de una lista de duraciones en segundos"""
+    if not muestras:
+        return {'n': 0, 'media': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    ordenadas = sorted(muestras)
+
+    def percentil(p):
+        indice = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+        return ordenadas[indice] * 1000
+
+    return {
+        'n': len(ordenadas),
+        'media': statistics.fmean(ordenadas) * 1000,
+        'p50': percentil(50),
+        'p95': percentil(95),
+        'p99': percentil(99),
+    }
+
+
+def cronometrar(funcion, *args, **kwargs):
+    """Retorna (resultado, segundos)"""
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+@contextmanager
+def base_temporal():
+    """Crear una base de datos de prueba (con migraciones) y eliminarla al salir"""
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+
+def imprimir_tabla(salida, filas, columnas):
+    """Imprimir una lista de dicts como tabla de texto"""
+    anchos = {
+        columna: max(len(columna), *(len(_formato(fila.get(columna))) for fila in filas))
+        for columna in columnas
+    }
+    salida.write('  '.join(columna.ljust(anchos[columna]) for columna in columnas))
+    salida.write('  '.join('-' * anchos[columna] for columna in columnas))
+    for fila in filas:
+        salida.write('  '.join(
+            _formato(fila.get(columna)).ljust(anchos[columna]) for columna in columnas
+        ))
+
+
+def _formato(valor):
+    if isinstance(valor, float):
+        return f'{valor:.3f}'
+    return '' if valor is None else str(valor)
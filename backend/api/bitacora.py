@@ -0,0 +1,185 @@
+"""
+Logging sin escrituras bloqueantes en el request
+Archivo: backend/api/bitacora.py
+
+Piezas para LOGGING (settings.py):
+- ManejadorCola: el hilo que loguea solo encola el registro; un hilo
+  escritor (QueueListener) lo pasa a los handlers del logger `destino`
+  (uno sin uso propio, solo agrupa consola y archivo). Con la cola
+  llena se descartan los registros bajo ERROR (se cuentan en
+  bikemetro_logs_descartados_total); ERROR y CRITICAL esperan lugar.
+- ArchivoRotativo: rota por tamaño o por antigüedad, lo que ocurra primero.
+  Cada proceso rota su propio archivo: con varios workers conviene un
+  archivo por proceso o rotación externa.
+- FormatoJSON: una línea JSON por registro, con los `extra` del registro.
+- FiltroMuestreo: deja pasar solo una fracción de los registros DEBUG de
+  los loggers ruidosos (`tasas` por prefijo de logger). Solo sirve para
+  loggers configurados en DEBUG: en los demás el registro ni se crea.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# Atributos propios de LogRecord: el resto viene de `extra=`
+ATRIBUTOS_REGISTRO = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+# ============ COLA ============
+class ManejadorCola(logging.handlers.QueueHandler):
+    """
+    Encolar registros para un hilo escritor
+    Los destinos son los handlers del logger `destino`; se leen al primer
+    registro porque dictConfig configura los loggers después de los handlers.
+    """
+
+    def __init__(self, destino, capacidad=10000):
+        super().__init__(queue.Queue(capacidad))
+        self.destino = destino
+        self.listener = None
+        self.pid = None
+        self._lock = threading.Lock()
+        self._formato_excepcion = logging.Formatter()
+
+    def _iniciar(self):
+        with self._lock:
+            if self.pid == os.getpid():
+                return
+            # Tras un fork el hilo escritor del padre no existe en el hijo
+            handlers = logging.getLogger(self.destino).handlers
+            self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+            self.listener.start()
+            if self.pid is None:
+                atexit.register(self.detener)
+            self.pid = os.getpid()
+
+    def prepare(self, record):
+        """
+        Resolver mensaje y traceback en el hilo que loguea (los argumentos
+        pueden cambiar después); el formato final lo aplica cada destino
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._formato_excepcion.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if record.levelno >= logging.ERROR:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            from .metricas import LOGS_DESCARTADOS
+            LOGS_DESCARTADOS.incrementar(record.name)
+
+    def emit(self, record):
+        if self.pid != os.getpid():
+            self._iniciar()
+        super().emit(record)
+
+    def detener(self):
+        """Escribir lo pendiente y detener el hilo escritor"""
+        with self._lock:
+            if self.listener is not None and self.pid == os.getpid():
+                self.listener.stop()
+                self.listener = None
+                self.pid = None
+
+    def close(self):
+        self.detener()
+        super().close()
+
+
+# ============ ROTACIÓN ============
+class ArchivoRotativo(logging.handlers.RotatingFileHandler):
+    """Rotar al superar `max_bytes` o cada `segundos` (0 = solo por tamaño)"""
+
+    def __init__(self, filename, max_bytes=50 * 1024 * 1024, respaldos=5, segundos=86400, encoding='utf-8'):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=respaldos, encoding=encoding, delay=True)
+        self.segundos = segundos
+        try:
+            inicio = os.path.getmtime(self.baseFilename)
+        except OSError:
+            inicio = time.time()
+        self.proxima_rotacion = inicio + segundos if segundos else None
+
+    def shouldRollover(self, record):
+        if self.proxima_rotacion is not None and time.time() >= self.proxima_rotacion:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        if self.segundos:
+            self.proxima_rotacion = time.time() + self.segundos
+
+
+# ============ FORMATO ============
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro; los valores no serializables van como str"""
+
+    def format(self, record):
+        datos = {
+            'fecha': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'modulo': record.module,
+            'linea': record.lineno,
+            'proceso': record.process,
+            'hilo': record.threadName,
+        }
+        for clave, valor in vars(record).items():
+            if clave not in ATRIBUTOS_REGISTRO and not clave.startswith('_'):
+                datos[clave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            datos['excepcion'] = record.exc_text
+        if record.stack_info:
+            datos['pila'] = record.stack_info
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+# ============ MUESTREO ============
+class FiltroMuestreo(logging.Filter):
+    """
+    Dejar pasar una fracción de los registros hasta `nivel` según el
+    prefijo de logger más largo en `tasas` (ej: {'api': 0.1})
+    """
+
+    def __init__(self, tasas, nivel='DEBUG'):
+        super().__init__()
+        self.tasas = sorted(tasas.items(), key=lambda item: -len(item[0]))
+        self.nivel = nivel if isinstance(nivel, int) else logging.getLevelName(nivel)
+        self._por_logger = {}
+
+    def _tasa(self, nombre):
+        tasa = self._por_logger.get(nombre)
+        if tasa is None:
+            tasa = 1.0
+            for prefijo, valor in self.tasas:
+                if nombre == prefijo or nombre.startswith(prefijo + '.'):
+                    tasa = valor
+                    break
+            self._por_logger[nombre] = tasa
+        return tasa
+
+    def filter(self, record):
+        if record.levelno > self.nivel:
+            return True
+        tasa = self._tasa(record.name)
+        return tasa >= 1.0 or random.random() < tasa
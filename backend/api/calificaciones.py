@@ -0,0 +1,146 @@
+"""
+Resumen incremental de calificaciones por estación
+Archivo: backend/api/calificaciones.py
+
+Cada alta, edición o baja de una Resena aplica un delta sobre el
+ResumenResenas de su estación (cantidad, suma e histograma por aspecto),
+de modo que los promedios se leen sin agregar todas las reseñas.
+"""
+
+from django.db import transaction
+from django.db.models import Count
+
+from . import disponibilidad
+from .models import Resena, ResumenResenas
+
+
+ASPECTOS = Resena.ASPECTOS
+
+
+def agregados_vacios():
+    return {
+        aspecto: {'cantidad': 0, 'suma': 0, 'histograma': [0, 0, 0, 0, 0]}
+        for aspecto in ASPECTOS
+    }
+
+
+def aplicar_delta(estacion_id, valores, signo):
+    """
+    Sumar (signo=1) o restar (signo=-1) una reseña al resumen de la estación
+    `valores` es un dict {aspecto: calificación 1-5 o None}
+    """
+    with transaction.atomic():
+        resumenes = ResumenResenas.objects.select_for_update()
+        if signo > 0:
+            resumen, _ = resumenes.get_or_create(
+                estacion_id=estacion_id,
+                defaults={'agregados': agregados_vacios()},
+            )
+        else:
+            # Al eliminar en cascada una estación su resumen puede ya no existir
+            resumen = resumenes.filter(estacion_id=estacion_id).first()
+            if resumen is None:
+                return
+        agregados = resumen.agregados or agregados_vacios()
+
+        for aspecto in ASPECTOS:
+            valor = valores.get(aspecto)
+            if valor is None:
+                continue
+            datos = agregados.setdefault(
+                aspecto, {'cantidad': 0, 'suma': 0, 'histograma': [0, 0, 0, 0, 0]}
+            )
+            datos['cantidad'] = max(0, datos['cantidad'] + signo)
+            datos['suma'] = max(0, datos['suma'] + signo * valor)
+            datos['histograma'][valor - 1] = max(0, datos['histograma'][valor - 1] + signo)
+
+        resumen.total_resenas = max(0, resumen.total_resenas + signo)
+        resumen.agregados = agregados
+        resumen.save(update_fields=['total_resenas', 'agregados', 'updated_at'])
+
+
+def recalcular_resumenes(estacion_ids=None):
+    """
+    Reconstruir los resúmenes desde la tabla de reseñas
+    (una consulta agrupada por aspecto; para cargas masivas con bulk_create)
+    """
+    resenas = Resena.objects.order_by()
+    if estacion_ids is not None:
+        resenas = resenas.filter(estacion_id__in=estacion_ids)
+
+    resumenes = {}
+    for aspecto in ASPECTOS:
+        filas = resenas.filter(**{f'{aspecto}__isnull': False}).values(
+            'estacion_id', aspecto
+        ).annotate(cantidad=Count('id'))
+
+        for fila in filas:
+            agregados = resumenes.setdefault(fila['estacion_id'], agregados_vacios())
+            valor, cantidad = fila[aspecto], fila['cantidad']
+            agregados[aspecto]['cantidad'] += cantidad
+            agregados[aspecto]['suma'] += valor * cantidad
+            agregados[aspecto]['histograma'][valor - 1] += cantidad
+
+    with transaction.atomic():
+        existentes = ResumenResenas.objects.all()
+        if estacion_ids is not None:
+            existentes = existentes.filter(estacion_id__in=estacion_ids)
+        existentes.delete()
+
+        ResumenResenas.objects.bulk_create([
+            ResumenResenas(
+                estacion_id=estacion_id,
+                total_resenas=agregados['calificacion']['cantidad'],
+                agregados=agregados,
+            )
+            for estacion_id, agregados in resumenes.items()
+        ], batch_size=500)
+        transaction.on_commit(disponibilidad.invalidar)
+
+    return len(resumenes)
+
+
+def combinar_resumenes(resumenes):
+    """Sumar varios resúmenes en uno (sin guardar), ej: todas las estaciones"""
+    combinado = ResumenResenas(total_resenas=0, agregados=agregados_vacios())
+    for resumen in resumenes:
+        combinado.total_resenas += resumen.total_resenas
+        for aspecto in ASPECTOS:
+            datos = (resumen.agregados or {}).get(aspecto)
+            if not datos:
+                continue
+            destino = combinado.agregados[aspecto]
+            destino['cantidad'] += datos['cantidad']
+            destino['suma'] += datos['suma']
+            destino['histograma'] = [
+                a + b for a, b in zip(destino['histograma'], datos['histograma'])
+            ]
+    return combinado
+
+
+def formatear_resumen(resumen, detallado=False):
+    """Representación para la API; `resumen` puede ser None (sin reseñas)"""
+    agregados = resumen.agregados if resumen is not None else agregados_vacios()
+
+    def promedio(aspecto):
+        datos = agregados.get(aspecto) or {}
+        if not datos.get('cantidad'):
+            return None
+        return round(datos['suma'] / datos['cantidad'], 2)
+
+    resultado = {
+        'total_resenas': resumen.total_resenas if resumen is not None else 0,
+        'promedio': promedio('calificacion'),
+    }
+
+    if detallado:
+        resultado['aspectos'] = {
+            aspecto.replace('calificacion_', '') if aspecto != 'calificacion' else 'general': {
+                'promedio': promedio(aspecto),
+                'cantidad': (agregados.get(aspecto) or {}).get('cantidad', 0),
+                'histograma': (agregados.get(aspecto) or {}).get('histograma', [0, 0, 0, 0, 0]),
+            }
+            for aspecto in ASPECTOS
+        }
+
+    return resultado
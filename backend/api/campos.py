@@ -0,0 +1,195 @@
+"""
+Campos parciales en las lecturas: ?fields= y ?omit=
+Archivo: backend/api/campos.py
+
+?fields=id,nombre deja solo esos campos; ?omit=calificaciones los quita.
+Nombres desconocidos se ignoran. Aplica a GET y HEAD; las escrituras y
+sus respuestas usan siempre el serializer completo.
+
+- CamposDinamicosMixin (serializers): poda los campos del serializer raíz
+  de la respuesta (los anidados se muestran completos).
+- CamposDinamicosViewMixin (viewsets): además reduce la consulta con
+  .only() a las columnas de los campos que quedan, y deja en
+  select_related/prefetch_related solo las relaciones que se usan.
+
+Para reducir la consulta cada campo debe traducirse a columnas: campos del
+modelo, rutas `relacion.campo`, serializers anidados, o Meta.dependencias
+(rutas del ORM) para propiedades y SerializerMethodField. Si algún campo
+no se puede traducir, la consulta queda como estaba y solo se podan los
+campos. Las anotaciones de la consulta no se tocan.
+
+Solo GET y HEAD: las instancias quedan con campos diferidos, y los
+snapshots de from_db (Reserva, Resena, Notificacion) omiten los campos que
+no se leyeron en vez de registrarlos como None.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+METODOS_LECTURA = ('GET', 'HEAD')
+
+
+def _nombres(valor):
+    return {nombre.strip() for nombre in valor.split(',') if nombre.strip()}
+
+
+def campos_solicitados(request):
+    """(fields o None, omit) si el request pide campos parciales; si no, None"""
+    if request is None or request.method not in METODOS_LECTURA:
+        return None
+    parametros = getattr(request, 'query_params', request.GET)
+    fields, omit = parametros.get('fields'), parametros.get('omit')
+    if fields is None and omit is None:
+        return None
+    return (_nombres(fields) if fields is not None else None, _nombres(omit or ''))
+
+
+def campo_incluido(request, nombre):
+    solicitados = campos_solicitados(request)
+    if solicitados is None:
+        return True
+    fields, omit = solicitados
+    return (fields is None or nombre in fields) and nombre not in omit
+
+
+# ============ SERIALIZERS ============
+class CamposDinamicosMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self._context.get('request')
+        if campos_solicitados(request) is not None:
+            for nombre in list(self.fields):
+                if not campo_incluido(request, nombre):
+                    self.fields.pop(nombre)
+
+
+# ============ CONSULTA ============
+def _resolver(modelo, ruta, columnas, relaciones):
+    """Agregar las columnas y relaciones de una ruta del ORM; False si no es traducible"""
+    partes = ruta.split('__')
+    actual = modelo
+    for indice, parte in enumerate(partes):
+        try:
+            campo = actual._meta.get_field(parte)
+        except FieldDoesNotExist:
+            return False  # Propiedad o anotación
+        prefijo = '__'.join(partes[:indice + 1])
+        ultima = indice == len(partes) - 1
+        if not campo.is_relation:
+            if not ultima:
+                return False
+            columnas.add(prefijo)
+            return True
+        if campo.many_to_many or campo.one_to_many:
+            # Se lee con su propia consulta (prefetch o una por objeto)
+            if ultima:
+                relaciones.add(prefijo)
+                return True
+            return False
+        if campo.concrete:
+            columnas.add(prefijo)  # FK: su columna, y recorrerla exige no diferirla
+        elif ultima:
+            relaciones.add(prefijo)  # One-to-one inverso: se lee por el JOIN
+        if ultima:
+            return True
+        relaciones.add(prefijo)
+        actual = campo.related_model
+    return True
+
+
+def _rutas(serializer, prefijo=''):
+    """Rutas del ORM que necesitan los campos del serializer; None si alguna no se conoce"""
+    dependencias = getattr(getattr(serializer, 'Meta', None), 'dependencias', {})
+    rutas = []
+    for nombre, campo in serializer.fields.items():
+        if campo.write_only:
+            continue
+        if nombre in dependencias:
+            propias = list(dependencias[nombre])
+        elif isinstance(campo, serializers.ListSerializer):
+            propias = [campo.source.replace('.', '__')]
+        elif isinstance(campo, serializers.BaseSerializer):
+            anidadas = _rutas(campo)
+            if anidadas is None:
+                return None
+            fuente = campo.source.replace('.', '__')
+            propias = [fuente] + [f'{fuente}__{ruta}' for ruta in anidadas]
+        elif campo.source == '*':
+            return None
+        else:
+            propias = [campo.source.replace('.', '__')]
+        rutas.extend(f'{prefijo}{ruta}' for ruta in propias)
+    return rutas
+
+
+def _rutas_select_related(arbol, prefijo=''):
+    for nombre, hijos in arbol.items():
+        ruta = f'{prefijo}{nombre}'
+        yield ruta
+        yield from _rutas_select_related(hijos, f'{ruta}__')
+
+
+def reducir_consulta(queryset, serializer, columnas_extra=()):
+    """
+    .only() y relaciones según los campos del serializer (ya podado)
+    `columnas_extra`: columnas que el llamador necesita aunque no se muestren
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    rutas = _rutas(serializer)
+    modelo = queryset.model
+    if rutas is None or queryset.query.select_related is True:
+        return queryset
+
+    columnas, relaciones = {modelo._meta.pk.name, *columnas_extra}, set()
+    for ruta in rutas:
+        if not _resolver(modelo, ruta, columnas, relaciones):
+            return queryset
+    # El orden puede necesitar columnas que no se muestran (ej: cursor de paginación)
+    for orden in queryset.query.order_by or modelo._meta.ordering:
+        if isinstance(orden, str) and '__' not in orden:
+            _resolver(modelo, orden.lstrip('-'), columnas, set())
+
+    if queryset.query.select_related:
+        conservadas = [
+            ruta for ruta in _rutas_select_related(queryset.query.select_related)
+            if ruta in relaciones
+        ]
+        queryset = queryset.select_related(None)
+        if conservadas:  # select_related() sin argumentos son todas
+            queryset = queryset.select_related(*conservadas)
+    if queryset._prefetch_related_lookups:
+        conservadas = [
+            busqueda for busqueda in queryset._prefetch_related_lookups
+            if getattr(busqueda, 'prefetch_through', busqueda).split('__')[0] in relaciones
+        ]
+        queryset = queryset.prefetch_related(None).prefetch_related(*conservadas)
+    return queryset.only(*columnas)
+
+
+# ============ VISTAS ============
+class CamposDinamicosViewMixin:
+    """
+    Reduce la consulta en list y retrieve (en filter_queryset, así aplica
+    aunque el ViewSet defina su propio get_queryset); las acciones propias
+    llaman a reducir_consulta
+    """
+
+    acciones_reducibles = ('list', 'retrieve')
+
+    def usa_campo(self, nombre):
+        return campo_incluido(self.request, nombre)
+
+    def reducir_consulta(self, queryset, serializer=None, columnas_extra=()):
+        # Solo lecturas (campos_solicitados es None fuera de METODOS_LECTURA):
+        # las instancias con campos diferidos no se guardan
+        if campos_solicitados(self.request) is None:
+            return queryset
+        return reducir_consulta(queryset, serializer or self.get_serializer(), columnas_extra)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in self.acciones_reducibles:
+            queryset = self.reducir_consulta(queryset)
+        return queryset
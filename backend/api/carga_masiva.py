@@ -0,0 +1,101 @@
+"""
+Inserción masiva por lotes
+Archivo: backend/api/carga_masiva.py
+
+Dos caminos, según el volumen:
+
+- crear_en_lotes: instancias sin guardar (puede ser un generador) insertadas
+  con bulk_create en lotes de `tamano_lote`, sin tener todas las filas en
+  memoria. Django convierte cada valor y reparte cada lote en los INSERT
+  que permita la BD. ~11k filas/s en SQLite: casi todo el tiempo se va en
+  crear las instancias y en la preparación de cada valor.
+- insertar_filas: tuplas con los valores ya convertidos al formato de la BD
+  (ver valor_bd) y un INSERT preparado con executemany. ~100k filas/s en
+  SQLite. Para las tablas grandes: los ~322k espacios de
+  seed_data --escala 10000 y usuarios, reservas, pagos y notificaciones de
+  la carga sintética.
+
+Ninguno ejecuta save() ni señales. bulk_create completa auto_now/auto_now_add
+con la hora actual (para fechas históricas use conservar_fechas=True);
+insertar_filas no completa nada: cada fila trae todas sus columnas.
+"""
+
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+
+from django.db import connection, transaction
+
+
+# Instancias por llamada a bulk_create / filas por executemany
+TAMANO_LOTE = 2000
+
+
+@contextmanager
+def fechas_explicitas(modelo):
+    """
+    Desactivar auto_now/auto_now_add de `modelo` mientras dura el bloque
+    Modifica los campos del modelo para todo el proceso: solo para comandos
+    de carga, no dentro de un request
+    """
+    campos = [
+        (campo, campo.auto_now, campo.auto_now_add)
+        for campo in modelo._meta.concrete_fields
+        if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)
+    ]
+    for campo, _, _ in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in campos:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def crear_en_lotes(modelo, objetos, tamano_lote=TAMANO_LOTE, conservar_fechas=False):
+    """
+    Insertar las instancias de `objetos` con bulk_create por lotes
+    Retorna la cantidad de filas insertadas
+    """
+    objetos = iter(objetos)
+    total = 0
+    with transaction.atomic(), (fechas_explicitas(modelo) if conservar_fechas else nullcontext()):
+        while lote := list(islice(objetos, tamano_lote)):
+            modelo.objects.bulk_create(lote)
+            total += len(lote)
+    return total
+
+
+# ============ EXECUTEMANY ============
+def sql_insercion(modelo, campos):
+    """INSERT parametrizado a partir de los metadatos del modelo"""
+    opts = modelo._meta
+    qn = connection.ops.quote_name
+    return 'INSERT INTO {} ({}) VALUES ({})'.format(
+        qn(opts.db_table),
+        ', '.join(qn(opts.get_field(campo).column) for campo in campos),
+        ', '.join(['%s'] * len(campos)),
+    )
+
+
+def valor_bd(modelo, campo, valor):
+    """
+    Convertir un valor de Python al formato que espera la BD para `campo`
+    Para valores repetidos en todas las filas (ej: la hora de la carga)
+    """
+    return modelo._meta.get_field(campo).get_db_prep_save(valor, connection)
+
+
+def insertar_filas(modelo, campos, filas, tamano_lote=TAMANO_LOTE):
+    """
+    Insertar tuplas con los valores de `campos` (en ese orden), ya convertidos
+    al formato de la BD, con executemany por lotes
+    Retorna la cantidad de filas insertadas
+    """
+    sql = sql_insercion(modelo, campos)
+    filas = iter(filas)
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        while lote := list(islice(filas, tamano_lote)):
+            cursor.executemany(sql, lote)
+            total += len(lote)
+    return total
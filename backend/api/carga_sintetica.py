@@ -0,0 +1,565 @@
+"""
+Generador de carga sintética (usuarios, reservas, pagos, reseñas,
+notificaciones y tickets)
+Archivo: backend/api/carga_sintetica.py
+
+Todo se genera con NumPy, día por día. Las tablas grandes (usuarios,
+reservas, pagos y notificaciones) se insertan con executemany sobre columnas
+ya convertidas al formato de la BD (fechas y UUID desde los arreglos de
+NumPy); reseñas y tickets, con bulk_create por lotes (api/carga_masiva.py).
+Medido con SQLite: --usuarios 5000 --dias 14 (~33k filas) en ~1.3 s, y
+--usuarios 200000 --dias 30 sobre seed_data --escala 2000 (~2.6M filas) en
+~150 s, ~17k filas/s. Casi todo ese tiempo es SQLite manteniendo los
+índices de reservas y notificaciones, que crece con el tamaño de las tablas.
+
+La demanda de cada estación sigue una curva
+horaria: punta de mañana y de tarde en días hábiles (cada estación con su
+propia proporción entre ambas) y una curva más plana el fin de semana.
+Cada espacio atiende una reserva a la vez: si la estación no tiene un
+espacio libre a esa hora, la reserva no se genera.
+
+Las reservas recorren el ciclo de vida completo según su antigüedad:
+PENDIENTE -> CONFIRMADA -> EN_CURSO -> FINALIZADA, o CANCELADA/EXPIRADA.
+Al terminar se recalculan los contadores desnormalizados (notificaciones
+no leídas, resúmenes de reseñas) y el estado de los espacios en uso.
+
+Requiere NumPy (solo este módulo; ver requirements.txt).
+"""
+
+import datetime
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import disponibilidad
+from .calificaciones import recalcular_resumenes
+from .carga_masiva import crear_en_lotes, insertar_filas, valor_bd
+from .models import (
+    Usuario, Estacion, EspacioEstacionamiento, Reserva,
+    Pago, Resena, Notificacion, TicketSoporte
+)
+from .notificaciones import ESTADOS_RESERVA_ACTIVA, reconciliar_no_leidas
+from .rut import calcular_dv
+
+
+PASSWORD = 'Carga-2024!'
+
+# Viajes (reservas) por usuario y día hábil; el fin de semana se multiplica
+TASA_RESERVAS = 0.15
+FACTOR_FIN_DE_SEMANA = 0.5
+
+# Desenlace de las reservas ya cerradas
+PROB_CANCELADA = 0.08
+PROB_EXPIRADA = 0.10
+
+# Fracciones sobre reservas finalizadas / totales
+PROB_RESENA = 0.12
+PROB_TICKET = 0.004
+PROB_PAGO_RECHAZADO = 0.04
+
+MINUTOS_RESERVA = 10  # Vigencia de una reserva PENDIENTE
+HORAS_GRATIS = 2
+COSTO_HORA_EXTRA = 500
+
+METODOS_PAGO = np.array(['TARJETA_BIP', 'TARJETA_DEBITO', 'TARJETA_CREDITO', 'EFECTIVO'])
+PROB_METODOS_PAGO = [0.55, 0.25, 0.15, 0.05]
+TIPOS_TICKET = np.array([codigo for codigo, _ in TicketSoporte.TIPO_CHOICES])
+PRIORIDADES_TICKET = np.array([codigo for codigo, _ in TicketSoporte.PRIORIDAD_CHOICES])
+
+# Fin de ocupación de los espacios con reservas vigentes
+SIN_FIN = np.iinfo(np.int64).max
+
+# Columnas de las tablas que se insertan con executemany (insertar_filas)
+CAMPOS_USUARIO = (
+    'password', 'is_superuser', 'username', 'first_name', 'last_name', 'email',
+    'is_staff', 'is_active', 'date_joined', 'rut', 'rut_numero', 'telefono',
+    'numero_tarjeta_bip', 'email_verificado', 'telefono_verificado',
+    'notificaciones_no_leidas', 'created_at', 'updated_at',
+)
+CAMPOS_RESERVA = (
+    'id', 'usuario', 'estacion', 'espacio', 'estado', 'fecha_reserva',
+    'fecha_expiracion_reserva', 'fecha_entrada', 'fecha_salida', 'qr_entrada',
+    'qr_salida', 'horas_gratis', 'costo_hora_extra', 'costo_total', 'pagado',
+    'pasaje_usado', 'notas', 'created_at', 'updated_at',
+)
+CAMPOS_PAGO = (
+    'reserva', 'monto', 'metodo_pago', 'estado', 'transaccion_id', 'fecha_pago',
+    'numero_recibo', 'created_at', 'updated_at',
+)
+CAMPOS_NOTIFICACION = (
+    'usuario', 'reserva', 'tipo', 'titulo', 'mensaje', 'leida', 'fecha_leida', 'created_at',
+)
+
+# tipo -> (título, mensaje)
+TEXTOS_NOTIFICACION = {
+    'RESERVA_CONFIRMADA': ('Reserva confirmada', 'Tu reserva fue confirmada. Tienes 10 minutos para llegar.'),
+    'RESERVA_EXPIRADA': ('Reserva expirada', 'Tu reserva expiró y el espacio fue liberado.'),
+    'PAGO_EXITOSO': ('Pago exitoso', 'Recibimos el pago de tu estacionamiento.'),
+    'PAGO_REQUERIDO': ('Pago requerido', 'Tienes un pago pendiente por tiempo adicional.'),
+}
+
+
+@dataclass
+class ResultadoCarga:
+    filas: dict = field(default_factory=dict)    # tabla -> filas insertadas
+    tiempos: dict = field(default_factory=dict)  # fase -> segundos
+
+    def sumar(self, tabla, cantidad):
+        self.filas[tabla] = self.filas.get(tabla, 0) + cantidad
+
+    @property
+    def total(self):
+        return sum(self.filas.values())
+
+
+# ============ CONVERSIONES ============
+def _fechas(microsegundos):
+    """Epoch en microsegundos (UTC) -> datetimes con zona horaria"""
+    fechas = microsegundos.astype('datetime64[us]').astype(object)
+    return [valor.replace(tzinfo=datetime.timezone.utc) for valor in fechas]
+
+
+def _fechas_bd(microsegundos):
+    """Epoch en microsegundos (UTC) -> valores para la BD (insertar_filas)"""
+    fechas = microsegundos.astype('datetime64[us]')
+    if connection.vendor == 'sqlite':
+        # Mismo formato de texto que usa Django ('YYYY-MM-DD HH:MM:SS.ffffff', UTC)
+        return np.char.replace(np.datetime_as_string(fechas, unit='us'), 'T', ' ').tolist()
+    return [valor.replace(tzinfo=datetime.timezone.utc) for valor in fechas.astype(object)]
+
+
+def _opcionales(valores, presentes):
+    return [valor if presente else None for valor, presente in zip(valores, presentes.tolist())]
+
+
+def _uuids(rng, cantidad, microsegundos=None):
+    """
+    UUID aleatorios como hex de 32 caracteres (lo que UUIDField acepta y
+    el formato en que lo guarda SQLite)
+    Con `microsegundos`, UUIDv7: los 48 bits altos son el epoch en ms, así
+    las claves de filas ordenadas por fecha se agregan al final del índice
+    en vez de caer en páginas al azar (la mayor parte del costo de insertar)
+    """
+    datos = rng.integers(0, 256, size=(cantidad, 16), dtype=np.uint8)
+    version = 0x40
+    if microsegundos is not None:
+        milisegundos = (microsegundos // 1000).astype('>u8')
+        datos[:, :6] = milisegundos.view(np.uint8).reshape(-1, 8)[:, 2:]
+        version = 0x70
+    datos[:, 6] = (datos[:, 6] & 0x0F) | version
+    datos[:, 8] = (datos[:, 8] & 0x3F) | 0x80
+    texto = datos.tobytes().hex()
+    return [texto[i:i + 32] for i in range(0, len(texto), 32)]
+
+
+def _microsegundos(fecha):
+    return int(fecha.timestamp() * 1_000_000)
+
+
+# ============ DEMANDA ============
+@dataclass
+class Red:
+    """Estaciones y espacios disponibles para la carga, como arreglos"""
+    estacion_ids: np.ndarray
+    popularidad: np.ndarray    # Probabilidad de elegir cada estación
+    punta_manana: np.ndarray   # Proporción de la demanda en la punta de la mañana
+    calidad: np.ndarray        # Nota media de las reseñas (1-5)
+    espacio_ids: np.ndarray    # Espacios ordenados por estación
+    inicio_espacios: np.ndarray
+    cantidad_espacios: np.ndarray
+    libre_desde: np.ndarray    # Por espacio: epoch (us) en que termina su última reserva
+
+
+def cargar_red(rng):
+    estaciones = np.array(
+        Estacion.objects.filter(estado='ACTIVO').order_by('id').values_list('id', flat=True),
+        dtype=np.int64,
+    )
+    espacios = np.array(
+        EspacioEstacionamiento.objects.filter(
+            estacion__estado='ACTIVO'
+        ).order_by('estacion_id', 'id').values_list('estacion_id', 'id'),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+
+    # Solo estaciones con espacios
+    estaciones = estaciones[np.isin(estaciones, espacios[:, 0])]
+    if not len(estaciones):
+        return None
+
+    inicio = np.searchsorted(espacios[:, 0], estaciones, side='left')
+    fin = np.searchsorted(espacios[:, 0], estaciones, side='right')
+
+    # Los espacios con reservas vigentes en la BD no se liberan durante la carga
+    libre_desde = np.zeros(len(espacios), dtype=np.int64)
+    libre_desde[np.isin(espacios[:, 1], np.array(
+        Reserva.objects.filter(
+            estado__in=ESTADOS_RESERVA_ACTIVA, espacio__isnull=False
+        ).values_list('espacio_id', flat=True),
+        dtype=np.int64,
+    ))] = SIN_FIN
+
+    # Pocas estaciones concentran la mayor parte de la demanda (log-normal)
+    popularidad = rng.lognormal(mean=0.0, sigma=1.0, size=len(estaciones))
+    return Red(
+        estacion_ids=estaciones,
+        popularidad=popularidad / popularidad.sum(),
+        punta_manana=rng.beta(2, 2, size=len(estaciones)),
+        calidad=np.clip(rng.normal(3.9, 0.5, size=len(estaciones)), 1.5, 5.0),
+        espacio_ids=espacios[:, 1],
+        inicio_espacios=inicio,
+        cantidad_espacios=fin - inicio,
+        libre_desde=libre_desde,
+    )
+
+
+def asignar_espacios(rng, red, estacion_idx, t_reserva, t_fin):
+    """
+    Índice (en red.espacio_ids) del espacio de cada reserva, o -1 si su
+    estación no tiene un espacio libre a esa hora
+    Las reservas deben venir ordenadas por t_reserva; cada espacio queda
+    ocupado hasta t_fin de la reserva que lo toma (red.libre_desde)
+    """
+    n = len(t_reserva)
+    asignados = [-1] * n
+    libre_desde = red.libre_desde
+    desplazamientos = rng.random(n)
+    for i, (inicio, cantidad, t, fin, desplazamiento) in enumerate(zip(
+        red.inicio_espacios[estacion_idx].tolist(), red.cantidad_espacios[estacion_idx].tolist(),
+        t_reserva.tolist(), t_fin.tolist(), desplazamientos.tolist(),
+    )):
+        # Desde un espacio al azar, el primero libre de la estación
+        primero = int(desplazamiento * cantidad)
+        for k in range(cantidad):
+            j = inicio + (primero + k) % cantidad
+            if libre_desde[j] <= t:
+                libre_desde[j] = fin
+                asignados[i] = j
+                break
+    return np.array(asignados, dtype=np.int64)
+
+
+def minutos_del_dia(rng, punta_manana, fin_de_semana):
+    """Minuto local (0-1439) de cada reserva según la curva de su estación"""
+    n = len(punta_manana)
+    if fin_de_semana:
+        minutos = rng.normal(13 * 60, 3 * 60, size=n)
+    else:
+        componente = rng.random(n)
+        base = rng.random(n) < 0.15
+        minutos = np.where(
+            componente < punta_manana,
+            rng.normal(7.75 * 60, 60, size=n),     # Punta mañana ~07:45
+            rng.normal(18.25 * 60, 75, size=n),    # Punta tarde ~18:15
+        )
+        minutos = np.where(base, rng.uniform(6 * 60, 23 * 60, size=n), minutos)
+    return np.clip(minutos, 5.5 * 60, 23 * 60 + 59).astype(np.int64)
+
+
+def duraciones_minutos(rng, n):
+    """Tiempo estacionado: jornada laboral (~9 h) o trámites (~1.5 h)"""
+    jornada = rng.random(n) < 0.6
+    minutos = np.where(
+        jornada,
+        rng.normal(9 * 60, 90, size=n),
+        rng.lognormal(mean=np.log(90), sigma=0.6, size=n),
+    )
+    return np.clip(minutos, 10, 16 * 60).astype(np.int64)
+
+
+def costo_total(minutos):
+    """Mismo cálculo que Reserva.calcular_costo, vectorizado"""
+    horas_extras = np.maximum(0, minutos / 60 - HORAS_GRATIS)
+    medias_horas = (horas_extras * 2 + 0.5).astype(np.int64)
+    return medias_horas * (COSTO_HORA_EXTRA // 2)
+
+
+# ============ USUARIOS ============
+def generar_usuarios(rng, cantidad, prefijo, tamano_lote):
+    """Insertar `cantidad` usuarios; retorna sus ids como arreglo"""
+    ultimo = Usuario.objects.order_by('-rut_numero').values_list('rut_numero', flat=True).first()
+    base_rut = max(30_000_000, (ultimo or 0) + 1)
+    password = make_password(PASSWORD)
+    ahora = valor_bd(Usuario, 'date_joined', timezone.now())
+
+    cuerpos = base_rut + np.arange(cantidad)
+    verificado = (rng.random(cantidad) < 0.7).tolist()
+    tarjetas = rng.integers(0, 10_000, size=cantidad).tolist()
+
+    insertar_filas(Usuario, CAMPOS_USUARIO, (
+        (
+            password, False, f'{prefijo}{i}', 'Usuario', f'Carga {i}',
+            f'{prefijo}{i}@carga.bikemetro.cl', False, True, ahora,
+            f'{cuerpo}-{calcular_dv(cuerpo)}', cuerpo, '+56900000000', f'{tarjetas[i]:04d}',
+            verificado[i], verificado[i], 0, ahora, ahora,
+        )
+        for i, cuerpo in enumerate(cuerpos.tolist())
+    ), tamano_lote)
+    return np.array(
+        Usuario.objects.filter(
+            rut_numero__gte=base_rut, rut_numero__lt=base_rut + cantidad
+        ).order_by('id').values_list('id', flat=True),
+        dtype=np.int64,
+    )
+
+
+# ============ UN DÍA ============
+def generar_dia(rng, red, usuario_ids, dia, ahora_us, resultado, tamano_lote):
+    """Generar e insertar las reservas de un día (y sus filas asociadas)"""
+    zona = timezone.get_default_timezone()
+    inicio_dia = datetime.datetime.combine(dia, datetime.time.min, tzinfo=zona)
+    inicio_us = _microsegundos(inicio_dia)
+    fin_de_semana = dia.weekday() >= 5
+
+    esperadas = len(usuario_ids) * TASA_RESERVAS * (FACTOR_FIN_DE_SEMANA if fin_de_semana else 1)
+    n = int(rng.poisson(esperadas))
+    if n == 0:
+        return
+
+    # Quién, dónde y cuándo
+    estacion_idx = rng.choice(len(red.estacion_ids), size=n, p=red.popularidad)
+    usuarios = usuario_ids[rng.integers(0, len(usuario_ids), size=n)]
+    minuto = minutos_del_dia(rng, red.punta_manana[estacion_idx], fin_de_semana)
+    t_reserva = inicio_us + minuto * 60_000_000 + rng.integers(0, 60_000_000, size=n)
+    orden = np.argsort(t_reserva)
+    estacion_idx, usuarios, t_reserva = estacion_idx[orden], usuarios[orden], t_reserva[orden]
+
+    # Reservas futuras respecto de ahora no existen todavía
+    pasadas = t_reserva <= ahora_us
+    if not pasadas.all():
+        estacion_idx, usuarios, t_reserva = estacion_idx[pasadas], usuarios[pasadas], t_reserva[pasadas]
+        n = len(t_reserva)
+        if n == 0:
+            return
+
+    # Ciclo de vida
+    t_expiracion = t_reserva + MINUTOS_RESERVA * 60_000_000
+    desenlace = rng.random(n)
+    cancelada = desenlace < PROB_CANCELADA
+    expirada = (desenlace >= PROB_CANCELADA) & (desenlace < PROB_CANCELADA + PROB_EXPIRADA)
+    llega = ~(cancelada | expirada)
+
+    t_entrada = t_reserva + rng.integers(60, MINUTOS_RESERVA * 60, size=n) * 1_000_000
+    duracion = duraciones_minutos(rng, n)
+    t_salida = t_entrada + duracion * 60_000_000
+    t_cancelacion = t_reserva + rng.integers(30, MINUTOS_RESERVA * 60, size=n) * 1_000_000
+
+    estado = np.full(n, 'FINALIZADA', dtype='<U10')
+    estado[cancelada] = np.where(t_cancelacion[cancelada] <= ahora_us, 'CANCELADA', 'PENDIENTE')
+    estado[expirada] = np.where(t_expiracion[expirada] <= ahora_us, 'EXPIRADA', 'PENDIENTE')
+    en_curso = llega & (t_entrada <= ahora_us) & (t_salida > ahora_us)
+    # Recién escaneado el QR: CONFIRMADA durante los primeros minutos
+    confirmada = en_curso & (ahora_us - t_entrada < 3 * 60_000_000)
+    estado[en_curso] = 'EN_CURSO'
+    estado[confirmada] = 'CONFIRMADA'
+    estado[llega & (t_entrada > ahora_us)] = 'PENDIENTE'
+
+    # Espacio: libre desde la reserva hasta que termina (las vigentes no lo sueltan)
+    t_fin = np.select(
+        [estado == 'FINALIZADA', estado == 'CANCELADA', estado == 'EXPIRADA'],
+        [t_salida, t_cancelacion, t_expiracion],
+        default=SIN_FIN,
+    )
+    indice_espacio = asignar_espacios(rng, red, estacion_idx, t_reserva, t_fin)
+    asignada = indice_espacio >= 0
+    if not asignada.all():
+        (
+            estacion_idx, usuarios, t_reserva, t_expiracion, t_entrada, t_salida,
+            t_cancelacion, duracion, estado, indice_espacio,
+        ) = (
+            valores[asignada] for valores in (
+                estacion_idx, usuarios, t_reserva, t_expiracion, t_entrada, t_salida,
+                t_cancelacion, duracion, estado, indice_espacio,
+            )
+        )
+        n = len(t_reserva)
+        if n == 0:
+            return
+    estaciones = red.estacion_ids[estacion_idx]
+    espacios = red.espacio_ids[indice_espacio]
+
+    con_entrada = np.isin(estado, ('FINALIZADA', 'EN_CURSO', 'CONFIRMADA'))
+    finalizada = estado == 'FINALIZADA'
+    costo = np.where(finalizada, costo_total(duracion), 0)
+    con_pago = finalizada & (costo > 0)
+    pago_rechazado = con_pago & (rng.random(n) < PROB_PAGO_RECHAZADO)
+    pagado = finalizada & ~pago_rechazado
+    pasaje_usado = con_entrada & (rng.random(n) < 0.7)
+
+    # Última modificación de cada reserva
+    t_actualizacion = np.select(
+        [finalizada, con_entrada, estado == 'CANCELADA', estado == 'EXPIRADA'],
+        [t_salida, t_entrada, t_cancelacion, t_expiracion],
+        default=t_reserva,
+    )
+
+    ids = _uuids(rng, n, t_reserva)
+    qr_entrada = _uuids(rng, n)
+    qr_salida = _uuids(rng, n)
+    f_reserva = _fechas_bd(t_reserva)
+    f_expiracion = _fechas_bd(t_expiracion)
+    f_entrada = _opcionales(_fechas_bd(t_entrada), con_entrada)
+    f_salida = _opcionales(_fechas_bd(t_salida), finalizada)
+    f_actualizacion = _fechas_bd(t_actualizacion)
+
+    resultado.sumar('reservas', insertar_filas(Reserva, CAMPOS_RESERVA, zip(
+        ids, usuarios.tolist(), estaciones.tolist(), espacios.tolist(), estado.tolist(),
+        f_reserva, f_expiracion, f_entrada, f_salida, qr_entrada, qr_salida,
+        [HORAS_GRATIS] * n, [COSTO_HORA_EXTRA] * n, costo.tolist(), pagado.tolist(),
+        pasaje_usado.tolist(), [''] * n, f_reserva, f_actualizacion,
+    ), tamano_lote))
+
+    # Pagos
+    indices = np.flatnonzero(con_pago)
+    if len(indices):
+        metodos = rng.choice(METODOS_PAGO, size=len(indices), p=PROB_METODOS_PAGO)
+        estados_pago = np.where(pago_rechazado[indices], 'RECHAZADO', 'APROBADO')
+        resultado.sumar('pagos', insertar_filas(Pago, CAMPOS_PAGO, (
+            (
+                ids[i], costo[i].item(), metodo, estado_pago, f'TX-{ids[i][:16]}', f_salida[i],
+                f'REC-{dia:%Y%m%d}-{ids[i]}', f_salida[i], f_salida[i],
+            )
+            for i, metodo, estado_pago in zip(indices.tolist(), metodos.tolist(), estados_pago.tolist())
+        ), tamano_lote))
+
+    # Reseñas (una por reserva, después de retirar la bicicleta)
+    indices = np.flatnonzero(finalizada & (rng.random(n) < PROB_RESENA))
+    if len(indices):
+        m = len(indices)
+        media = red.calidad[estacion_idx[indices]]
+        notas = np.clip(np.rint(rng.normal(media[:, None], 0.9, size=(m, 4))), 1, 5).astype(np.int64)
+        omitido = rng.random((m, 3)) < 0.3
+        t_resena = t_salida[indices] + rng.integers(1, 120, size=m) * 60_000_000
+        f_resena = _fechas(t_resena)
+        aspectos = [
+            [None if omitir else nota for nota, omitir in zip(notas[:, k + 1].tolist(), omitido[:, k].tolist())]
+            for k in range(3)
+        ]
+        resultado.sumar('resenas', crear_en_lotes(Resena, (
+            Resena(
+                usuario_id=usuario, estacion_id=estacion, reserva_id=ids[i], calificacion=nota,
+                calificacion_seguridad=seguridad, calificacion_limpieza=limpieza,
+                calificacion_accesibilidad=accesibilidad, created_at=fecha, updated_at=fecha,
+            )
+            for i, usuario, estacion, nota, seguridad, limpieza, accesibilidad, fecha in zip(
+                indices.tolist(), usuarios[indices].tolist(), estaciones[indices].tolist(),
+                notas[:, 0].tolist(), aspectos[0], aspectos[1], aspectos[2], f_resena,
+            )
+        ), tamano_lote, conservar_fechas=True))
+
+    # Notificaciones: confirmación de cada reserva, expiraciones y pagos
+    antiguedad = ahora_us - t_reserva
+    leida = (rng.random(n) < np.where(antiguedad > 2 * 86_400_000_000, 0.92, 0.35)).tolist()
+    f_lectura = _fechas_bd(np.minimum(t_reserva + rng.integers(1, 3600, size=n) * 1_000_000, ahora_us))
+    lista_usuarios = usuarios.tolist()
+    notificaciones = []
+    for tipo, mascara in (
+        ('RESERVA_CONFIRMADA', np.ones(n, dtype=bool)),
+        ('RESERVA_EXPIRADA', estado == 'EXPIRADA'),
+        ('PAGO_EXITOSO', con_pago & ~pago_rechazado),
+        ('PAGO_REQUERIDO', pago_rechazado),
+    ):
+        titulo, mensaje = TEXTOS_NOTIFICACION[tipo]
+        fechas = {
+            'RESERVA_CONFIRMADA': f_reserva,
+            'RESERVA_EXPIRADA': f_expiracion,
+        }.get(tipo, f_salida)
+        for i in np.flatnonzero(mascara).tolist():
+            notificaciones.append((
+                lista_usuarios[i], ids[i], tipo, titulo, mensaje,
+                leida[i], f_lectura[i] if leida[i] else None, fechas[i],
+            ))
+    resultado.sumar('notificaciones', insertar_filas(
+        Notificacion, CAMPOS_NOTIFICACION, notificaciones, tamano_lote
+    ))
+
+    # Tickets de soporte
+    indices = np.flatnonzero(rng.random(n) < PROB_TICKET)
+    if len(indices):
+        m = len(indices)
+        tipos = rng.choice(TIPOS_TICKET, size=m)
+        prioridades = rng.choice(PRIORIDADES_TICKET, size=m, p=[0.3, 0.45, 0.2, 0.05])
+        t_ticket = t_reserva[indices] + rng.integers(5, 240, size=m) * 60_000_000
+        t_resolucion = t_ticket + rng.integers(1, 72, size=m) * 3_600_000_000
+        resuelto = t_resolucion <= ahora_us
+        estados_ticket = np.where(resuelto, np.where(rng.random(m) < 0.5, 'RESUELTO', 'CERRADO'), 'EN_PROCESO')
+        estados_ticket = np.where(
+            ~resuelto & (ahora_us - t_ticket < 3_600_000_000), 'ABIERTO', estados_ticket
+        )
+        f_ticket = _fechas(t_ticket)
+        f_resolucion = _opcionales(_fechas(t_resolucion), resuelto)
+        numeros = _uuids(rng, m)
+        resultado.sumar('tickets', crear_en_lotes(TicketSoporte, (
+            TicketSoporte(
+                numero_ticket=f'TKT-{numero[:16].upper()}', usuario_id=lista_usuarios[i], tipo=tipo,
+                prioridad=prioridad, estado=estado_ticket, asunto='Consulta sobre mi reserva',
+                descripcion='Ticket generado por la carga sintética.', reserva_id=ids[i],
+                fecha_resolucion=fecha_resolucion,
+                respuesta='Resuelto por soporte.' if fecha_resolucion else '',
+                created_at=fecha, updated_at=fecha_resolucion or fecha,
+            )
+            for i, numero, tipo, prioridad, estado_ticket, fecha, fecha_resolucion in zip(
+                indices.tolist(), numeros, tipos.tolist(), prioridades.tolist(),
+                estados_ticket.tolist(), f_ticket, f_resolucion,
+            )
+        ), tamano_lote, conservar_fechas=True))
+
+
+# ============ CARGA COMPLETA ============
+def generar_carga(usuarios, dias, semilla=42, prefijo='carga', tamano_lote=5000, progreso=None):
+    """
+    Generar `usuarios` usuarios nuevos y `dias` días de actividad hasta ahora
+    `progreso(dia, resultado)` se llama al terminar cada día
+    Retorna un ResultadoCarga con filas por tabla y tiempos por fase
+    """
+    rng = np.random.default_rng(semilla)
+    resultado = ResultadoCarga()
+
+    red = cargar_red(rng)
+    if red is None:
+        raise ValueError('No hay estaciones activas con espacios (ejecute seed_data o cargar_catalogo)')
+    if Usuario.objects.filter(username=f'{prefijo}0').exists():
+        raise ValueError(f"Ya existen usuarios con el prefijo '{prefijo}' (use --prefijo)")
+
+    inicio = time.perf_counter()
+    with transaction.atomic():
+        usuario_ids = generar_usuarios(rng, usuarios, prefijo, tamano_lote)
+    resultado.sumar('usuarios', len(usuario_ids))
+    resultado.tiempos['usuarios'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    ahora = timezone.localtime()
+    ahora_us = _microsegundos(ahora)
+    for desplazamiento in range(dias - 1, -1, -1):
+        dia = ahora.date() - datetime.timedelta(days=desplazamiento)
+        with transaction.atomic():
+            generar_dia(rng, red, usuario_ids, dia, ahora_us, resultado, tamano_lote)
+        if progreso is not None:
+            progreso(dia, resultado)
+    resultado.tiempos['actividad'] = time.perf_counter() - inicio
+
+    # Contadores desnormalizados y estado actual de los espacios
+    inicio = time.perf_counter()
+    with transaction.atomic():
+        reconciliar_no_leidas()
+        recalcular_resumenes()
+        actualizar_espacios()
+    resultado.tiempos['contadores'] = time.perf_counter() - inicio
+
+    return resultado
+
+
+def actualizar_espacios():
+    """Marcar RESERVADO/OCUPADO los espacios de reservas vigentes"""
+    for estados, estado_espacio in (
+        (['PENDIENTE'], 'RESERVADO'),
+        (['CONFIRMADA', 'EN_CURSO'], 'OCUPADO'),
+    ):
+        EspacioEstacionamiento.objects.filter(
+            id__in=Reserva.objects.filter(estado__in=estados).values('espacio_id')
+        ).update(estado=estado_espacio, updated_at=timezone.now())
+    transaction.on_commit(disponibilidad.invalidar)
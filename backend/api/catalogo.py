@@ -0,0 +1,278 @@
+"""
+Catálogo de estaciones: carga desde archivos y sincronización con la BD
+Archivo: backend/api/catalogo.py
+
+Los registros se leen en streaming (CSV, JSON o JSON Lines) y se comparan
+contra las estaciones existentes, leídas en una sola consulta. El
+resultado (CambiosCatalogo) se puede mostrar sin escribir (--dry-run) o
+aplicar en bloque en una transacción: bulk_create, bulk_update, un UPDATE
+por lote para las desactivaciones y un INSERT con executemany por lotes para
+los espacios (api/carga_masiva.py).
+
+Campos por estación: nombre, linea, orden, latitud, longitud,
+tiene_bicicletero, espacios_totales (o capacidad) y estado (opcional).
+Solo se guardan estaciones con bicicletero; las existentes que lo pierden,
+o que faltan en el catálogo de su línea, quedan INACTIVAS.
+"""
+
+import csv
+import json
+import os
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import disponibilidad
+from .carga_masiva import insertar_filas, valor_bd
+from .models import Estacion, EspacioEstacionamiento
+
+
+CAMPOS = ('linea', 'orden', 'latitud', 'longitud', 'espacios_totales', 'estado')
+LINEAS = {codigo for codigo, _ in Estacion.LINEAS_CHOICES}
+ESTADOS = {codigo for codigo, _ in Estacion.ESTADO_CHOICES}
+VERDADEROS = {'1', 'true', 'si', 'sí', 's', 'x', 'yes'}
+FALSOS = {'0', 'false', 'no', 'n', ''}
+
+# Ids por UPDATE ... WHERE id IN (...)
+TAMANO_LOTE_ACTUALIZACION = 900
+
+# Columnas de los espacios nuevos (insertar_filas)
+CAMPOS_ESPACIO = ('estacion', 'fila', 'columna', 'estado', 'created_at', 'updated_at')
+
+
+@dataclass
+class CambiosCatalogo:
+    nuevas: list = field(default_factory=list)          # [Estacion]
+    actualizadas: list = field(default_factory=list)    # [(Estacion, {campo: (antes, después)})]
+    desactivadas: list = field(default_factory=list)    # [Estacion]
+    errores: list = field(default_factory=list)         # [(origen, mensaje)]
+    avisos: list = field(default_factory=list)          # [(origen, mensaje)]
+    sin_cambios: int = 0
+
+    @property
+    def total(self):
+        return len(self.nuevas) + len(self.actualizadas) + len(self.desactivadas)
+
+
+# ============ LECTURA ============
+def leer_catalogo(ruta):
+    """Generar (origen, registro) desde un .csv, .json o .jsonl"""
+    nombre = os.path.basename(ruta)
+    extension = os.path.splitext(ruta)[1].lower()
+
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        if extension == '.csv':
+            lector = csv.DictReader(archivo)
+            for registro in lector:
+                yield f'{nombre}:{lector.line_num}', registro
+        elif extension in ('.jsonl', '.ndjson'):
+            for numero, linea in enumerate(archivo, start=1):
+                if linea.strip():
+                    yield f'{nombre}:{numero}', json.loads(linea)
+        elif extension == '.json':
+            datos = json.load(archivo)
+            if isinstance(datos, dict):
+                datos = datos.get('estaciones', [])
+            for indice, registro in enumerate(datos):
+                yield f'{nombre}[{indice}]', registro
+        else:
+            raise ValueError(f'Formato no soportado: {nombre} (use .csv, .json o .jsonl)')
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor).strip()
+
+
+def _booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    texto = _texto(valor).lower()
+    if texto in VERDADEROS:
+        return True
+    if texto in FALSOS:
+        return False
+    raise ValueError(f'tiene_bicicletero inválido: {valor}')
+
+
+def _coordenada(valor, minimo, maximo, nombre):
+    texto = _texto(valor)
+    if not texto:
+        return None
+    try:
+        numero = Decimal(texto).quantize(Decimal('0.0000001'))
+    except InvalidOperation:
+        raise ValueError(f'{nombre} inválida: {valor}')
+    if not minimo <= numero <= maximo:
+        raise ValueError(f'{nombre} fuera de rango: {valor}')
+    return numero
+
+
+def normalizar_registro(registro):
+    """Validar y convertir un registro del catálogo; lanza ValueError"""
+    registro = {(clave or '').strip().lower(): valor for clave, valor in registro.items()}
+
+    nombre = _texto(registro.get('nombre'))
+    if not nombre:
+        raise ValueError('Falta el nombre')
+
+    linea = _texto(registro.get('linea')).upper()
+    if linea not in LINEAS:
+        raise ValueError(f'Línea inválida: {linea or "(vacía)"}')
+
+    orden = _texto(registro.get('orden'))
+    try:
+        orden = int(orden) if orden else None
+    except ValueError:
+        raise ValueError(f'Orden inválido: {orden}')
+
+    capacidad = _texto(registro.get('espacios_totales', registro.get('capacidad')))
+    try:
+        capacidad = int(capacidad) if capacidad else 42
+    except ValueError:
+        raise ValueError(f'Capacidad inválida: {capacidad}')
+    EspacioEstacionamiento.distribucion(capacidad)  # valida el rango
+
+    estado = _texto(registro.get('estado')).upper() or 'ACTIVO'
+    if estado not in ESTADOS:
+        raise ValueError(f'Estado inválido: {estado}')
+
+    tiene_bicicletero = registro.get('tiene_bicicletero')
+    tiene_bicicletero = True if tiene_bicicletero is None else _booleano(tiene_bicicletero)
+
+    return {
+        'nombre': nombre,
+        'linea': linea,
+        'orden': orden,
+        'latitud': _coordenada(registro.get('latitud'), -90, 90, 'Latitud'),
+        'longitud': _coordenada(registro.get('longitud'), -180, 180, 'Longitud'),
+        'espacios_totales': capacidad,
+        'estado': estado if tiene_bicicletero else 'INACTIVO',
+        'tiene_bicicletero': tiene_bicicletero,
+    }
+
+
+# ============ DIFERENCIAS ============
+def calcular_cambios(registros, desactivar_faltantes=True):
+    """
+    Comparar (origen, registro) con la BD, sin escribir
+    Con desactivar_faltantes, las estaciones activas de las líneas presentes
+    en el catálogo que no aparecen en él quedan para desactivar
+    """
+    cambios = CambiosCatalogo()
+    existentes = {estacion.nombre: estacion for estacion in Estacion.objects.all()}
+    vistas = {}  # nombre -> origen
+    lineas = set()
+
+    for origen, registro in registros:
+        try:
+            datos = normalizar_registro(registro)
+        except ValueError as exc:
+            cambios.errores.append((origen, str(exc)))
+            continue
+
+        nombre = datos['nombre']
+        lineas.add(datos['linea'])
+        if nombre in vistas:
+            # Estaciones de combinación: el nombre es único, vale la primera línea
+            cambios.avisos.append((origen, f'{nombre} ya está definida en {vistas[nombre]}; se omite'))
+            continue
+        vistas[nombre] = origen
+
+        estacion = existentes.get(nombre)
+        if estacion is None:
+            if datos['tiene_bicicletero']:
+                cambios.nuevas.append(Estacion(
+                    nombre=nombre, **{campo: datos[campo] for campo in CAMPOS}
+                ))
+            continue
+
+        if not datos['tiene_bicicletero']:
+            if estacion.estado != 'INACTIVO':
+                cambios.desactivadas.append(estacion)
+            else:
+                cambios.sin_cambios += 1
+            continue
+
+        diferencias = {
+            campo: (getattr(estacion, campo), datos[campo])
+            for campo in CAMPOS
+            if getattr(estacion, campo) != datos[campo]
+        }
+        if diferencias:
+            cambios.actualizadas.append((estacion, diferencias))
+        else:
+            cambios.sin_cambios += 1
+
+    if desactivar_faltantes:
+        cambios.desactivadas.extend(
+            estacion for nombre, estacion in existentes.items()
+            if nombre not in vistas and estacion.linea in lineas and estacion.estado != 'INACTIVO'
+        )
+
+    return cambios
+
+
+# ============ APLICACIÓN ============
+@transaction.atomic
+def aplicar_cambios(cambios):
+    """
+    Escribir los cambios en bloque
+    Retorna (espacios creados, espacios sobrantes), ver completar_espacios
+    """
+    Estacion.objects.bulk_create(cambios.nuevas, batch_size=1000)
+
+    ahora = timezone.now()
+    actualizadas = []
+    for estacion, diferencias in cambios.actualizadas:
+        for campo, (_, valor) in diferencias.items():
+            setattr(estacion, campo, valor)
+        estacion.updated_at = ahora  # bulk_update no aplica auto_now
+        actualizadas.append(estacion)
+    if actualizadas:
+        Estacion.objects.bulk_update(actualizadas, list(CAMPOS) + ['updated_at'], batch_size=500)
+
+    ids = [estacion.id for estacion in cambios.desactivadas]
+    for i in range(0, len(ids), TAMANO_LOTE_ACTUALIZACION):
+        Estacion.objects.filter(id__in=ids[i:i + TAMANO_LOTE_ACTUALIZACION]).update(
+            estado='INACTIVO', updated_at=ahora
+        )
+
+    # bulk_create/bulk_update/update no emiten señales
+    transaction.on_commit(disponibilidad.invalidar)
+    return completar_espacios()
+
+
+def completar_espacios():
+    """
+    Crear los espacios que faltan según EspacioEstacionamiento.distribucion
+    Retorna (espacios creados, espacios que exceden la capacidad de su estación)
+    Los sobrantes no se eliminan: pueden tener reservas asociadas
+    """
+    ocupadas = {}
+    for estacion_id, fila, columna in EspacioEstacionamiento.objects.values_list(
+        'estacion_id', 'fila', 'columna'
+    ).order_by():
+        ocupadas.setdefault(estacion_id, set()).add((fila, columna))
+
+    distribuciones = {}
+    sobrantes = 0
+    ahora = valor_bd(EspacioEstacionamiento, 'created_at', timezone.now())
+
+    def espacios():
+        nonlocal sobrantes
+        for estacion_id, capacidad in Estacion.objects.values_list(
+            'id', 'espacios_totales'
+        ).order_by():
+            if capacidad not in distribuciones:
+                distribuciones[capacidad] = EspacioEstacionamiento.distribucion(capacidad)
+            posiciones = distribuciones[capacidad]
+            existentes = ocupadas.get(estacion_id, set())
+            sobrantes += len(existentes - set(posiciones))
+            for fila, columna in posiciones:
+                if (fila, columna) not in existentes:
+                    yield estacion_id, fila, columna, 'DISPONIBLE', ahora, ahora
+
+    creados = insertar_filas(EspacioEstacionamiento, CAMPOS_ESPACIO, espacios())
+    return creados, sobrantes
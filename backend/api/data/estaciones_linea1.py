@@ -6,13 +6,16 @@ Archivo: backend/api/data/estaciones_linea1.py
 """
 
 # Estaciones completas de la Línea 1 del Metro de Santiago
-# De San Pablo a Los Dominicos (23 estaciones)
+# De San Pablo a Los Dominicos (27 estaciones)
+# Coordenadas aproximadas (acceso principal), 4 decimales
 
 ESTACIONES_LINEA1 = [
     {
         'nombre': 'San Pablo',
         'linea': 'L1',
         'orden': 1,
+        'latitud': -33.4444,
+        'longitud': -70.7233,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -21,6 +24,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Neptuno',
         'linea': 'L1',
         'orden': 2,
+        'latitud': -33.4518,
+        'longitud': -70.7118,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -29,6 +34,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Pajaritos',
         'linea': 'L1',
         'orden': 3,
+        'latitud': -33.4577,
+        'longitud': -70.6982,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -37,6 +44,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Las Rejas',
         'linea': 'L1',
         'orden': 4,
+        'latitud': -33.4572,
+        'longitud': -70.6924,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': False,  # Para el prototipo, no todas tienen
@@ -45,6 +54,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Ecuador',
         'linea': 'L1',
         'orden': 5,
+        'latitud': -33.4533,
+        'longitud': -70.69,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -53,6 +64,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'San Alberto Hurtado',
         'linea': 'L1',
         'orden': 6,
+        'latitud': -33.4535,
+        'longitud': -70.6867,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': False,
@@ -61,6 +74,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Universidad de Santiago',
         'linea': 'L1',
         'orden': 7,
+        'latitud': -33.4525,
+        'longitud': -70.6832,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -69,6 +84,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Estación Central',
         'linea': 'L1',
         'orden': 8,
+        'latitud': -33.451,
+        'longitud': -70.679,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -77,6 +94,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Unión Latinoamericana',
         'linea': 'L1',
         'orden': 9,
+        'latitud': -33.4494,
+        'longitud': -70.672,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': False,
@@ -85,6 +104,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'República',
         'linea': 'L1',
         'orden': 10,
+        'latitud': -33.4481,
+        'longitud': -70.6662,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -93,6 +114,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Los Héroes',
         'linea': 'L1',
         'orden': 11,
+        'latitud': -33.4466,
+        'longitud': -70.6604,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -102,6 +125,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'La Moneda',
         'linea': 'L1',
         'orden': 12,
+        'latitud': -33.4441,
+        'longitud': -70.6545,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -110,6 +135,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Universidad de Chile',
         'linea': 'L1',
         'orden': 13,
+        'latitud': -33.4433,
+        'longitud': -70.6502,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -119,6 +146,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Santa Lucía',
         'linea': 'L1',
         'orden': 14,
+        'latitud': -33.4422,
+        'longitud': -70.6445,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -127,6 +156,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Universidad Católica',
         'linea': 'L1',
         'orden': 15,
+        'latitud': -33.4405,
+        'longitud': -70.6403,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -135,6 +166,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Baquedano',
         'linea': 'L1',
         'orden': 16,
+        'latitud': -33.4372,
+        'longitud': -70.634,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -144,6 +177,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Salvador',
         'linea': 'L1',
         'orden': 17,
+        'latitud': -33.433,
+        'longitud': -70.627,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -152,6 +187,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Manuel Montt',
         'linea': 'L1',
         'orden': 18,
+        'latitud': -33.4294,
+        'longitud': -70.619,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -160,6 +197,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Pedro de Valdivia',
         'linea': 'L1',
         'orden': 19,
+        'latitud': -33.4254,
+        'longitud': -70.613,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -168,6 +207,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Los Leones',
         'linea': 'L1',
         'orden': 20,
+        'latitud': -33.4216,
+        'longitud': -70.607,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -176,6 +217,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Tobalaba',
         'linea': 'L1',
         'orden': 21,
+        'latitud': -33.418,
+        'longitud': -70.601,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -185,6 +228,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'El Golf',
         'linea': 'L1',
         'orden': 22,
+        'latitud': -33.4167,
+        'longitud': -70.596,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': False,
@@ -193,6 +238,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Alcántara',
         'linea': 'L1',
         'orden': 23,
+        'latitud': -33.4149,
+        'longitud': -70.589,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': False,
@@ -201,6 +248,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Escuela Militar',
         'linea': 'L1',
         'orden': 24,
+        'latitud': -33.4136,
+        'longitud': -70.584,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -209,6 +258,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Manquehue',
         'linea': 'L1',
         'orden': 25,
+        'latitud': -33.409,
+        'longitud': -70.573,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': False,
@@ -217,6 +268,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Hernando de Magallanes',
         'linea': 'L1',
         'orden': 26,
+        'latitud': -33.4064,
+        'longitud': -70.563,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
@@ -225,6 +278,8 @@ ESTACIONES_LINEA1 = [
         'nombre': 'Los Dominicos',
         'linea': 'L1',
         'orden': 27,
+        'latitud': -33.408,
+        'longitud': -70.551,
         'estado': 'ACTIVO',
         'espacios_totales': 42,
         'tiene_bicicletero': True,
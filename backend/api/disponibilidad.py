@@ -0,0 +1,181 @@
+"""
+Cache de disponibilidad de estaciones para las vistas async
+Archivo: backend/api/disponibilidad.py
+
+Guarda el JSON ya renderizado del listado de estaciones y de los espacios
+de cada estación (ver api/async_views.py). Cada entrada recuerda la versión
+con que se calculó:
+- invalidar(estacion_id) sube la versión global (listado) y la de esa
+  estación; invalidar() sin estación invalida todo. También invalida la
+  cache de respuestas de EstacionViewSet (api/respuestas.py). Las cargas
+  masivas la llaman al confirmar su transacción.
+- invalidar_al_confirmar(estacion_id), desde las señales de Estacion,
+  EspacioEstacionamiento y ResumenResenas: junta las estaciones tocadas en
+  la transacción e invalida una sola vez al confirmarla. Si la transacción
+  se revierte no se invalida nada.
+- Además las entradas vencen a los DISPONIBILIDAD['TTL'] segundos: las
+  versiones son por proceso, así que el TTL acota cuánto tarda un worker
+  en ver lo que cambió otro.
+
+Las cargas leen de `default` aunque el request tenga réplica (ver
+api/replicas.py): el valor se comparte con todos los usuarios durante el
+TTL, incluido el que acaba de reservar, y una réplica atrasada rompería su
+lectura de las escrituras propias.
+
+Segura entre hilos (las vistas sync invalidan desde su hilo; el lock nunca
+se toma a través de un await) y entre corrutinas: las lecturas que no
+encuentran la entrada a la vez comparten una sola carga por event loop.
+"""
+
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from . import replicas
+from .respuestas import cache_respuestas
+
+
+ESTACIONES = 'estaciones'
+
+
+def clave_espacios(estacion_id):
+    return ('espacios', int(estacion_id))
+
+
+class CacheDisponibilidad:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._global = 0
+        self._epoca = 0
+        self._por_estacion = {}
+        self._entradas = {}  # clave -> (versión, expira, valor)
+        self._cargas = {}    # (clave, versión) -> (loop, future)
+
+    def _version(self, clave):
+        if clave == ESTACIONES:
+            return self._global
+        return (self._epoca, self._por_estacion.get(clave[1], 0))
+
+    def version(self):
+        """Versión global: cambia con cualquier invalidación"""
+        return self._global
+
+    def invalidar(self, estacion_id=None):
+        with self._lock:
+            self._global += 1
+            if estacion_id is None:
+                self._epoca += 1
+                self._por_estacion.clear()
+            else:
+                estacion_id = int(estacion_id)
+                self._por_estacion[estacion_id] = self._por_estacion.get(estacion_id, 0) + 1
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    async def obtener(self, clave, cargar):
+        """Valor de `clave`, o el resultado de `await cargar()` si no está vigente"""
+        with self._lock:
+            version = self._version(clave)
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] == version and entrada[1] > time.monotonic():
+                return entrada[2]
+            loop = asyncio.get_running_loop()
+            carga = self._cargas.get((clave, version))
+            propia = carga is None or carga[0] is not loop
+            if propia:
+                futuro = loop.create_future()
+                self._cargas[(clave, version)] = (loop, futuro)
+            else:
+                futuro = carga[1]
+
+        if not propia:
+            try:
+                return await asyncio.shield(futuro)
+            except asyncio.CancelledError:
+                if futuro.cancelled():  # Se canceló quien cargaba, no este request
+                    return await self.obtener(clave, cargar)
+                raise
+
+        try:
+            with replicas.lecturas_en_primaria():
+                valor = await cargar()
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except Exception as exc:
+            futuro.set_exception(exc)
+            futuro.exception()  # Sin esperas pendientes no se avisa "never retrieved"
+            raise
+        else:
+            futuro.set_result(valor)
+            with self._lock:
+                # Si se invalidó durante la carga, el valor ya es viejo: no se guarda
+                if self._version(clave) == version:
+                    self._entradas[clave] = (version, time.monotonic() + self.ttl, valor)
+            return valor
+        finally:
+            with self._lock:
+                if self._cargas.get((clave, version), (None, None))[1] is futuro:
+                    del self._cargas[(clave, version)]
+
+
+_config = getattr(settings, 'DISPONIBILIDAD', {})
+cache_disponibilidad = CacheDisponibilidad(ttl=_config.get('TTL', 2))
+
+
+def invalidar(estacion_id=None):
+    """Punto único de invalidación: cambió una estación o sus espacios (None = todas)"""
+    cache_disponibilidad.invalidar(estacion_id)
+    cache_respuestas.invalidar()
+
+
+class _Pendientes:
+    """Estaciones tocadas en una transacción; el primer on_commit las invalida todas"""
+
+    def __init__(self):
+        self.estaciones = set()
+
+    def __call__(self):
+        estaciones, self.estaciones = self.estaciones, set()
+        if not estaciones:
+            return
+        if None in estaciones:
+            cache_disponibilidad.invalidar()
+        else:
+            for estacion_id in estaciones:
+                cache_disponibilidad.invalidar(estacion_id)
+        cache_respuestas.invalidar()
+
+
+def invalidar_al_confirmar(estacion_id=None):
+    """
+    Invalidar una vez, al confirmar la transacción (en autocommit, de inmediato)
+    Cada llamada registra con on_commit el _Pendientes de la transacción,
+    pero el primero que corre invalida todas sus estaciones y los demás no
+    encuentran nada. El _Pendientes se guarda en la conexión junto con su
+    lista run_on_commit: Django la reemplaza al confirmar y al revertir (la
+    transacción o un savepoint), así que las estaciones de lo revertido
+    nunca pasan a la transacción siguiente.
+
+    Dentro de una transacción se sube además la versión de la estación en
+    cache_disponibilidad (un contador en memoria, sin tocar la cache de
+    respuestas): así la misma transacción lee sus propios cambios en las
+    vistas async.
+    """
+    conexion = transaction.get_connection()
+    if not conexion.in_atomic_block:
+        invalidar(estacion_id)
+        return
+    cache_disponibilidad.invalidar(estacion_id)
+    lista, pendientes = getattr(conexion, '_disponibilidad_pendientes', (None, None))
+    if lista is not conexion.run_on_commit:
+        pendientes = _Pendientes()
+        conexion._disponibilidad_pendientes = (conexion.run_on_commit, pendientes)
+    pendientes.estaciones.add(estacion_id)
+    transaction.on_commit(pendientes)
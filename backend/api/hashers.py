@@ -0,0 +1,32 @@
+"""
+Hashers de contraseñas con costo configurable
+Archivo: backend/api/hashers.py
+
+El costo se define en settings.PASSWORD_HASH_COSTO y se lee en cada uso,
+así puede ajustarse por entorno (o en benchmarks) sin tocar el código.
+Los hashes existentes con otro costo siguen verificándose; el login los
+actualiza al nuevo costo (ver api/async_views.py).
+"""
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def _costo(clave, por_defecto):
+    return getattr(settings, 'PASSWORD_HASH_COSTO', {}).get(clave, por_defecto)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 con iteraciones = PASSWORD_HASH_COSTO['PBKDF2_ITERACIONES']"""
+    
+    @property
+    def iterations(self):
+        return _costo('PBKDF2_ITERACIONES', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """bcrypt-SHA256 con rounds = PASSWORD_HASH_COSTO['BCRYPT_ROUNDS']"""
+    
+    @property
+    def rounds(self):
+        return _costo('BCRYPT_ROUNDS', hashers.BCryptSHA256PasswordHasher.rounds)
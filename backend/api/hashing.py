@@ -0,0 +1,73 @@
+"""
+Hash y verificación de contraseñas fuera del hilo del request
+Archivo: backend/api/hashing.py
+
+PBKDF2/bcrypt cuestan cientos de milisegundos de CPU. Las vistas async
+de login y registro los ejecutan en un pool de hilos acotado
+(PASSWORD_HASH_WORKERS) para que el event loop siga atendiendo otros
+requests. Se usan hilos y no procesos porque hashlib.pbkdf2_hmac y
+bcrypt liberan el GIL durante el cálculo.
+
+Con PASSWORD_HASH_WORKERS = 0 el hash se calcula en línea (sin pool).
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+
+
+_pool = None
+_pool_workers = None
+_lock = threading.Lock()
+
+
+def _ejecutor():
+    """Pool compartido por el proceso (se recrea si cambia la configuración)"""
+    global _pool, _pool_workers
+    workers = getattr(settings, 'PASSWORD_HASH_WORKERS', 2)
+    if workers <= 0:
+        return None
+    with _lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hash-password')
+            _pool_workers = workers
+        return _pool
+
+
+async def _ejecutar(funcion, *args):
+    pool = _ejecutor()
+    if pool is None:
+        return funcion(*args)
+    return await asyncio.get_running_loop().run_in_executor(pool, funcion, *args)
+
+
+async def hashear(password):
+    """Equivalente async de make_password"""
+    return await _ejecutar(make_password, password)
+
+
+async def verificar(password, encoded):
+    """
+    Equivalente async de check_password
+    Sin hash (usuario inexistente) se calcula uno igual, para no revelar por
+    tiempo de respuesta si la cuenta existe
+    """
+    if not encoded:
+        await hashear(password)
+        return False
+    return await _ejecutar(check_password, password, encoded)
+
+
+def requiere_actualizacion(encoded):
+    """True si el hash fue generado con otro algoritmo o costo que el preferido"""
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferido = get_hasher('default')
+    return hasher.algorithm != preferido.algorithm or preferido.must_update(encoded)
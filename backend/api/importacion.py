@@ -0,0 +1,250 @@
+"""
+Importación masiva de usuarios desde CSV
+Archivo: backend/api/importacion.py
+
+Flujo por archivo:
+1. Validar cada fila (campos requeridos, RUT con dígito verificador y las
+   validaciones de los campos de Usuario: largo, formato de email, nickname)
+   y detectar duplicados dentro del mismo archivo
+2. Descartar, con consultas `__in` por lotes, las filas cuyo nickname,
+   email o RUT ya existen en la BD (el email sin distinguir mayúsculas)
+3. Hashear las contraseñas en un pool de procesos
+4. Insertar con bulk_create por lotes (si un lote choca con datos creados
+   en paralelo, se reintenta fila a fila para reportar cuál falló)
+"""
+
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from .models import Usuario
+from .rut import formatear_rut, validar_rut
+
+
+# Filas por bulk_create y valores por consulta de duplicados (WHERE ... IN)
+TAMANO_LOTE = 1000
+TAMANO_LOTE_CONSULTA = 900
+
+# Columnas aceptadas: nombre en el CSV -> campo de Usuario
+COLUMNAS = {
+    'nickname': 'username',
+    'username': 'username',
+    'email': 'email',
+    'rut': 'rut',
+    'telefono': 'telefono',
+    'nombre': 'first_name',
+    'first_name': 'first_name',
+    'apellido': 'last_name',
+    'last_name': 'last_name',
+    'numero_tarjeta_bip': 'numero_tarjeta_bip',
+    'password': 'password',
+}
+REQUERIDOS = ('username', 'email', 'rut', 'telefono', 'first_name')
+
+# Campos que no pueden repetirse -> (campo mostrado en el error, etiqueta)
+UNICOS = {
+    'username': ('username', 'nickname'),
+    'email': ('email', 'email'),
+    'rut_numero': ('rut', 'RUT'),
+}
+# Únicos que se comparan sin distinguir mayúsculas (en el archivo y en la BD)
+SIN_MAYUSCULAS = {'email'}
+
+
+@dataclass
+class ResultadoImportacion:
+    leidas: int = 0
+    creadas: int = 0
+    errores: list = field(default_factory=list)  # [(línea, mensaje)]
+    tiempos: dict = field(default_factory=dict)  # fase -> segundos
+
+    @property
+    def duracion(self):
+        return sum(self.tiempos.values())
+
+
+def leer_csv(ruta, delimitador=','):
+    """Generar (línea, fila) con las columnas ya mapeadas a campos de Usuario"""
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        lector = csv.DictReader(archivo, delimiter=delimitador)
+        for fila in lector:
+            datos = {}
+            for columna, valor in fila.items():
+                campo = COLUMNAS.get((columna or '').strip().lower())
+                if campo and valor is not None:
+                    datos[campo] = valor.strip()
+            yield lector.line_num, datos
+
+
+def _validar_fila(datos):
+    """Retorna la fila normalizada o lanza ValidationError"""
+    faltantes = [campo for campo in REQUERIDOS if not datos.get(campo)]
+    if faltantes:
+        raise ValidationError(f"Faltan campos: {', '.join(faltantes)}")
+
+    partes = validar_rut(datos['rut'])
+    if partes is None:
+        raise ValidationError(f"RUT inválido: {datos['rut']}")
+
+    datos = dict(
+        datos,
+        username=Usuario.normalize_username(datos['username']),
+        email=Usuario.objects.normalize_email(datos['email']),
+        rut=formatear_rut(*partes),
+        rut_numero=partes[0],
+    )
+
+    # Largo máximo, formato de email y caracteres del nickname
+    # (SQLite no hace cumplir max_length)
+    try:
+        Usuario(**datos).clean_fields(exclude=['password'])
+    except ValidationError as exc:
+        raise ValidationError([
+            f'{campo}: {mensaje}'
+            for campo, mensajes in exc.message_dict.items()
+            for mensaje in mensajes
+        ])
+
+    return datos
+
+
+def _clave(campo, datos):
+    """Valor de `campo` con el que se detectan duplicados"""
+    valor = datos[campo]
+    return valor.lower() if campo in SIN_MAYUSCULAS else valor
+
+
+def _mensaje_repetido(campo, datos, motivo):
+    mostrado, etiqueta = UNICOS[campo]
+    return f'{etiqueta} {motivo}: {datos[mostrado]}'
+
+
+def _existentes(campo, valores):
+    """
+    Valores de `campo` que ya existen en la BD (consultas por lotes)
+    Los campos de SIN_MAYUSCULAS se comparan en minúsculas
+    """
+    valores = list(valores)
+    usuarios = Usuario.objects.all()
+    columna = campo
+    if campo in SIN_MAYUSCULAS:
+        usuarios = usuarios.annotate(clave=Lower(campo))
+        columna = 'clave'
+
+    encontrados = set()
+    for i in range(0, len(valores), TAMANO_LOTE_CONSULTA):
+        encontrados.update(
+            usuarios.filter(
+                **{f'{columna}__in': valores[i:i + TAMANO_LOTE_CONSULTA]}
+            ).values_list(columna, flat=True)
+        )
+    return encontrados
+
+
+def _hashear(password):
+    # Sin contraseña en el CSV la cuenta queda con una contraseña inutilizable
+    # (el usuario debe recuperarla)
+    return make_password(password or None)
+
+
+def _inicializar_worker():
+    # Con el método 'spawn' (macOS, Windows) el proceso hijo parte sin Django
+    import django
+    django.setup()
+
+
+def hashear_passwords(passwords, workers):
+    """Hashear en paralelo en `workers` procesos (0 = en este proceso)"""
+    if workers <= 0 or len(passwords) < 2:
+        return [_hashear(password) for password in passwords]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker) as pool:
+        tamano = max(1, len(passwords) // (workers * 4))
+        return list(pool.map(_hashear, passwords, chunksize=tamano))
+
+
+def _insertar(filas, resultado, tamano_lote):
+    for i in range(0, len(filas), tamano_lote):
+        lote = filas[i:i + tamano_lote]
+        try:
+            with transaction.atomic():
+                Usuario.objects.bulk_create([usuario for _, usuario in lote])
+            resultado.creadas += len(lote)
+        except IntegrityError:
+            # Otro proceso creó alguno de estos usuarios: insertar uno a uno
+            for linea, usuario in lote:
+                try:
+                    with transaction.atomic():
+                        usuario.save(force_insert=True)
+                    resultado.creadas += 1
+                except IntegrityError as exc:
+                    resultado.errores.append((linea, f'Conflicto al insertar: {exc}'))
+
+
+def importar_usuarios(filas, workers=None, tamano_lote=TAMANO_LOTE):
+    """
+    Importar usuarios desde un iterable de (línea, datos)
+    Retorna un ResultadoImportacion con creadas, errores y tiempos por fase
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    resultado = ResultadoImportacion()
+
+    # 1. Validación y duplicados dentro del archivo
+    inicio = time.perf_counter()
+    validas = []
+    vistos = {campo: set() for campo in UNICOS}
+    for linea, datos in filas:
+        resultado.leidas += 1
+        try:
+            datos = _validar_fila(datos)
+        except ValidationError as exc:
+            resultado.errores.append((linea, '; '.join(exc.messages)))
+            continue
+
+        repetido = next((campo for campo in vistos if _clave(campo, datos) in vistos[campo]), None)
+        if repetido:
+            resultado.errores.append((linea, _mensaje_repetido(repetido, datos, 'repetido en el archivo')))
+            continue
+        for campo in vistos:
+            vistos[campo].add(_clave(campo, datos))
+        validas.append((linea, datos))
+    resultado.tiempos['validacion'] = time.perf_counter() - inicio
+
+    # 2. Duplicados contra la BD
+    inicio = time.perf_counter()
+    existentes = {
+        campo: _existentes(campo, valores) for campo, valores in vistos.items()
+    }
+    nuevas = []
+    for linea, datos in validas:
+        repetido = next((campo for campo in existentes if _clave(campo, datos) in existentes[campo]), None)
+        if repetido:
+            resultado.errores.append((linea, _mensaje_repetido(repetido, datos, 'ya registrado')))
+        else:
+            nuevas.append((linea, datos))
+    resultado.tiempos['duplicados'] = time.perf_counter() - inicio
+
+    # 3. Hash de contraseñas
+    inicio = time.perf_counter()
+    hashes = hashear_passwords([datos.pop('password', '') for _, datos in nuevas], workers)
+    resultado.tiempos['hash'] = time.perf_counter() - inicio
+
+    # 4. Inserción
+    inicio = time.perf_counter()
+    usuarios = [
+        (linea, Usuario(password=password_hash, **datos))
+        for (linea, datos), password_hash in zip(nuevas, hashes)
+    ]
+    _insertar(usuarios, resultado, tamano_lote)
+    resultado.tiempos['insercion'] = time.perf_counter() - inicio
+
+    resultado.errores.sort()
+    return resultado
@@ -0,0 +1,324 @@
+"""
+Instrumentación por request: consultas SQL, tiempo de BD, de serialización
+y total por vista
+Archivo: backend/api/instrumentacion.py
+
+InstrumentacionMiddleware abre una Medicion por request (en un contextvar,
+así que sirve para vistas sync y async). Las consultas se cuentan con un
+execute_wrapper que se instala en cada conexión al crearse, sin guardar el
+SQL (a diferencia de DEBUG=True, que retiene todas las consultas). La
+serialización se mide en .data de los serializers con
+MedicionSerializacionMixin (api/serializers.py).
+
+Por vista ("GET reserva-list") se acumulan histogramas de buckets fijos, así
+que la memoria no crece con el tráfico; las vistas distintas tienen tope
+(INSTRUMENTACION['MAX_VISTAS']). Con DEBUG, o si el usuario es staff, la
+respuesta lleva un header Server-Timing (expone la cantidad de consultas y
+tiempos internos). El resumen se consulta en GET /api/instrumentacion/ (staff).
+Las mismas mediciones alimentan las métricas de /metrics (api/metricas.py).
+"""
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.utils.functional import empty
+from rest_framework import serializers
+
+from . import metricas
+
+
+# Límites de los buckets: milisegundos (x1.5 desde 0.25 ms hasta ~70 s) y consultas
+LIMITES_MS = tuple(round(0.25 * 1.5 ** i, 3) for i in range(32))
+LIMITES_CONSULTAS = (0, 1, 2, 3, 4, 5, 7, 10, 15, 20, 30, 50, 75, 100, 200, 500, 1000)
+
+OTRAS_VISTAS = '(otras)'
+SIN_RUTA = '(sin ruta)'
+
+
+# ============ HISTOGRAMAS ============
+class Histograma:
+    """Histograma de buckets fijos con percentiles aproximados (no thread-safe)"""
+
+    __slots__ = ('limites', 'conteos', 'total', 'suma', 'minimo', 'maximo')
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.conteos = [0] * (len(limites) + 1)  # El último bucket es +Inf
+        self.total = 0
+        self.suma = 0.0
+        self.minimo = None
+        self.maximo = 0.0
+
+    def agregar(self, valor):
+        self.conteos[bisect.bisect_left(self.limites, valor)] += 1
+        self.total += 1
+        self.suma += valor
+        if valor > self.maximo:
+            self.maximo = valor
+        if self.minimo is None or valor < self.minimo:
+            self.minimo = valor
+
+    def percentil(self, p):
+        """
+        Interpolación lineal dentro del bucket que contiene el percentil,
+        acotada por el mínimo y el máximo observados
+        """
+        if not self.total:
+            return 0.0
+        objetivo = p / 100 * self.total
+        acumulado = 0
+        for indice, conteo in enumerate(self.conteos):
+            if conteo and acumulado + conteo >= objetivo:
+                inferior = max(self.limites[indice - 1] if indice else 0.0, self.minimo)
+                superior = self.limites[indice] if indice < len(self.limites) else self.maximo
+                superior = min(superior, self.maximo)
+                return inferior + (superior - inferior) * (objetivo - acumulado) / conteo
+            acumulado += conteo
+        return self.maximo
+
+    def resumen(self):
+        return {
+            'media': round(self.suma / self.total, 3) if self.total else 0.0,
+            'p50': round(self.percentil(50), 3),
+            'p95': round(self.percentil(95), 3),
+            'p99': round(self.percentil(99), 3),
+            'max': round(self.maximo, 3),
+        }
+
+
+class EstadisticasVista:
+    """Histogramas de una vista: total, BD y serialización (ms) y consultas"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = Histograma(LIMITES_MS)
+        self.bd = Histograma(LIMITES_MS)
+        self.serializacion = Histograma(LIMITES_MS)
+        self.consultas = Histograma(LIMITES_CONSULTAS)
+        self.errores = 0
+
+    def registrar(self, medicion, total_ms, estado):
+        with self.lock:
+            self.total.agregar(total_ms)
+            self.bd.agregar(medicion.tiempo_bd * 1000)
+            self.serializacion.agregar(medicion.tiempo_serializacion * 1000)
+            self.consultas.agregar(medicion.consultas)
+            if estado >= 500:
+                self.errores += 1
+
+    def resumen(self):
+        with self.lock:
+            return {
+                'requests': self.total.total,
+                'errores': self.errores,
+                'total_ms': self.total.resumen(),
+                'bd_ms': self.bd.resumen(),
+                'serializacion_ms': self.serializacion.resumen(),
+                'consultas': self.consultas.resumen(),
+            }
+
+
+class Registro:
+    """Estadísticas por vista, con tope de vistas distintas"""
+
+    def __init__(self, max_vistas):
+        self.max_vistas = max_vistas
+        self.lock = threading.Lock()
+        self.vistas = {}
+
+    def estadisticas(self, vista):
+        estadisticas = self.vistas.get(vista)
+        if estadisticas is None:
+            with self.lock:
+                estadisticas = self.vistas.get(vista)
+                if estadisticas is None:
+                    if len(self.vistas) >= self.max_vistas:
+                        vista = OTRAS_VISTAS
+                        estadisticas = self.vistas.get(vista)
+                    if estadisticas is None:
+                        estadisticas = self.vistas[vista] = EstadisticasVista()
+        return estadisticas
+
+    def resumen(self):
+        with self.lock:
+            vistas = list(self.vistas.items())
+        return {vista: estadisticas.resumen() for vista, estadisticas in sorted(vistas)}
+
+    def limpiar(self):
+        with self.lock:
+            self.vistas = {}
+
+
+_config = getattr(settings, 'INSTRUMENTACION', {})
+registro = Registro(_config.get('MAX_VISTAS', 200))
+
+
+# ============ MEDICIÓN DEL REQUEST ============
+class Medicion:
+    __slots__ = ('consultas', 'tiempo_bd', 'tiempo_serializacion', 'profundidad')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_bd = 0.0
+        self.tiempo_serializacion = 0.0
+        self.profundidad = 0  # Serializadores anidados: solo se mide el externo
+
+
+_medicion = ContextVar('medicion', default=None)
+
+
+def _envoltura_consultas(ejecutar, sql, params, many, contexto):
+    medicion = _medicion.get()
+    if medicion is None:
+        return ejecutar(sql, params, many, contexto)
+    inicio = time.perf_counter()
+    try:
+        return ejecutar(sql, params, many, contexto)
+    finally:
+        medicion.tiempo_bd += time.perf_counter() - inicio
+        medicion.consultas += 1
+
+
+def _conexion_creada(sender, connection, **kwargs):
+    if _envoltura_consultas not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_envoltura_consultas)
+
+
+def instalar():
+    """Conectar la medición de consultas (desde ApiConfig.ready)"""
+    from django.db import connections
+
+    connection_created.connect(_conexion_creada, dispatch_uid='instrumentacion_consultas')
+    for conexion in connections.all(initialized_only=True):
+        _conexion_creada(None, conexion)
+
+
+# ============ SERIALIZACIÓN ============
+def _medir_serializacion(obtener):
+    # Los serializers anidados corren dentro del externo: solo se mide ese
+    medicion = _medicion.get()
+    if medicion is None or medicion.profundidad:
+        return obtener()
+    medicion.profundidad += 1
+    inicio = time.perf_counter()
+    try:
+        return obtener()
+    finally:
+        medicion.tiempo_serializacion += time.perf_counter() - inicio
+        medicion.profundidad -= 1
+
+
+class ListaMedida(serializers.ListSerializer):
+    @property
+    def data(self):
+        return _medir_serializacion(lambda: super(ListaMedida, self).data)
+
+
+class MedicionSerializacionMixin:
+    """
+    Acumular el tiempo de .data en la Medicion del request
+    Con many=True se usa ListaMedida (salvo Meta.list_serializer_class propio)
+    """
+
+    @property
+    def data(self):
+        return _medir_serializacion(lambda: super(MedicionSerializacionMixin, self).data)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        lista = super().many_init(*args, **kwargs)
+        if type(lista) is serializers.ListSerializer:
+            lista.__class__ = ListaMedida
+        return lista
+
+
+# ============ MIDDLEWARE ============
+def nombre_vista(request):
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return SIN_RUTA
+    return f'{request.method} {coincidencia.view_name}'
+
+
+def muestra_server_timing(request, cargar_sesion=True):
+    """
+    Server-Timing solo con DEBUG o para staff (DRF deja el usuario en el request)
+    Con cargar_sesion=False (ASGI) no se resuelve el usuario perezoso de la
+    sesión: consulta la BD, lo que no se puede desde el loop de eventos
+    """
+    if settings.DEBUG:
+        return True
+    usuario = getattr(request, 'user', None)
+    if usuario is None or (not cargar_sesion and getattr(usuario, '_wrapped', None) is empty):
+        return False
+    return usuario.is_staff
+
+
+def server_timing(medicion, total_ms):
+    return (
+        f'db;dur={medicion.tiempo_bd * 1000:.2f};desc="{medicion.consultas} consultas", '
+        f'ser;dur={medicion.tiempo_serializacion * 1000:.2f}, '
+        f'total;dur={total_ms:.2f}'
+    )
+
+
+class InstrumentacionMiddleware:
+    """
+    Medir cada request y registrarlo por vista
+    Desactivable en caliente con `InstrumentacionMiddleware.activa = False`
+    """
+
+    activa = _config.get('ACTIVA', True)
+    server_timing = _config.get('SERVER_TIMING', True)
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+        metricas.iniciar()
+
+    def __call__(self, request):
+        if self.es_async:
+            return self._llamar_async(request)
+        if not self.activa:
+            return self.get_response(request)
+
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            respuesta = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self._registrar(request, respuesta, medicion, inicio)
+
+    async def _llamar_async(self, request):
+        if not self.activa:
+            return await self.get_response(request)
+
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            respuesta = await self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self._registrar(request, respuesta, medicion, inicio, cargar_sesion=False)
+
+    def _registrar(self, request, respuesta, medicion, inicio, cargar_sesion=True):
+        # Respuestas en streaming: solo se mide hasta el primer byte
+        total_ms = (time.perf_counter() - inicio) * 1000
+        registro.estadisticas(nombre_vista(request)).registrar(medicion, total_ms, respuesta.status_code)
+        metricas.registrar_request(request, respuesta.status_code, total_ms / 1000, medicion)
+        if self.server_timing and muestra_server_timing(request, cargar_sesion):
+            respuesta['Server-Timing'] = server_timing(medicion, total_ms)
+        return respuesta
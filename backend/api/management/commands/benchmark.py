@@ -0,0 +1,47 @@
+"""
+Comando Django para ejecutar benchmarks
+Archivo: backend/api/management/commands/benchmark.py
+
+Uso: python manage.py benchmark <nombre> [opciones] [--json resultados.json]
+Los benchmarks corren sobre una base de datos temporal (no tocan db.sqlite3)
+Si los resultados incluyen 'fallos', el comando termina con error
+"""
+
+import importlib
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import BENCHMARKS
+from api.benchmarks.utils import base_temporal
+
+
+class Command(BaseCommand):
+    help = 'Ejecutar un benchmark sobre una base de datos temporal'
+    
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='nombre', required=True)
+        for nombre, modulo in BENCHMARKS.items():
+            subparser = subparsers.add_parser(nombre)
+            subparser.add_argument(
+                '--json',
+                dest='salida_json',
+                help='Guardar los resultados en un archivo JSON',
+            )
+            importlib.import_module(modulo).agregar_argumentos(subparser)
+    
+    def handle(self, *args, **options):
+        modulo = importlib.import_module(BENCHMARKS[options['nombre']])
+        
+        self.stdout.write(self.style.WARNING(f'Benchmark: {options["nombre"]}'))
+        with base_temporal():
+            resultados = modulo.ejecutar(options, self.stdout)
+        
+        if options.get('salida_json'):
+            with open(options['salida_json'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f'✓ Resultados guardados en {options["salida_json"]}'))
+        
+        # Benchmarks con presupuestos (ver endpoints.py) reportan sus fallos aquí
+        if isinstance(resultados, dict) and resultados.get('fallos'):
+            raise CommandError(f"{len(resultados['fallos'])} presupuestos excedidos")
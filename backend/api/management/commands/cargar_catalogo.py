@@ -0,0 +1,113 @@
+"""
+Comando Django para sincronizar las estaciones con catálogos externos
+Archivo: backend/api/management/commands/cargar_catalogo.py
+
+Acepta uno o más archivos .csv, .json o .jsonl (ver api/catalogo.py) y
+aplica altas, cambios y desactivaciones en una sola transacción. Las
+estaciones activas de una línea incluida en los archivos que no aparecen
+en ellos se desactivan (salvo --no-desactivar).
+
+Uso:
+    python manage.py cargar_catalogo api/data/catalogo/linea1.csv --dry-run
+    python manage.py cargar_catalogo catalogo_red.jsonl
+"""
+
+import itertools
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.catalogo import aplicar_cambios, calcular_cambios, leer_catalogo
+
+
+# Filas de detalle por sección (el resto solo se cuenta, salvo --detalle)
+MAX_DETALLE = 20
+
+
+class Command(BaseCommand):
+    help = 'Sincronizar estaciones desde archivos de catálogo (CSV/JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivos', nargs='+', help='Archivos .csv, .json o .jsonl')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar los cambios sin escribir en la base de datos',
+        )
+        parser.add_argument(
+            '--no-desactivar',
+            action='store_true',
+            help='No desactivar estaciones que falten en el catálogo',
+        )
+        parser.add_argument(
+            '--detalle',
+            action='store_true',
+            help='Listar todos los cambios (por defecto hasta 20 por sección)',
+        )
+
+    def handle(self, *args, **options):
+        for ruta in options['archivos']:
+            if not os.path.isfile(ruta):
+                raise CommandError(f'No existe el archivo {ruta}')
+
+        inicio = time.perf_counter()
+        registros = itertools.chain.from_iterable(
+            leer_catalogo(ruta) for ruta in options['archivos']
+        )
+        try:
+            cambios = calcular_cambios(registros, desactivar_faltantes=not options['no_desactivar'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.reportar(cambios, None if options['detalle'] else MAX_DETALLE)
+
+        if cambios.errores:
+            raise CommandError(
+                f'{len(cambios.errores)} registros con errores: no se aplicó ningún cambio'
+            )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('\nDry-run: no se escribió en la base de datos'))
+            return
+
+        espacios_creados, espacios_sobrantes = aplicar_cambios(cambios)
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✓ Catálogo aplicado en {duracion:.2f}s: {len(cambios.nuevas)} nuevas, '
+            f'{len(cambios.actualizadas)} actualizadas, {len(cambios.desactivadas)} desactivadas, '
+            f'{espacios_creados} espacios creados'
+        ))
+        if espacios_sobrantes:
+            self.stdout.write(self.style.WARNING(
+                f'⚠ {espacios_sobrantes} espacios exceden la capacidad de su estación '
+                '(no se eliminan: pueden tener reservas)'
+            ))
+
+    def reportar(self, cambios, limite):
+        """Resumen de cambios por sección"""
+        def seccion(titulo, lineas, estilo):
+            lineas = list(lineas)
+            if not lineas:
+                return
+            self.stdout.write(estilo(f'\n{titulo} ({len(lineas)}):'))
+            for linea in lineas[:limite]:
+                self.stdout.write(f'  {linea}')
+            if limite is not None and len(lineas) > limite:
+                self.stdout.write(f'  ... y {len(lineas) - limite} más')
+
+        seccion('Errores', (f'{origen}: {mensaje}' for origen, mensaje in cambios.errores), self.style.ERROR)
+        seccion('Avisos', (f'{origen}: {mensaje}' for origen, mensaje in cambios.avisos), self.style.WARNING)
+        seccion('Nuevas', (
+            f'+ {e.nombre} ({e.linea}, {e.espacios_totales} espacios)' for e in cambios.nuevas
+        ), self.style.SUCCESS)
+        seccion('Actualizadas', (
+            f'~ {estacion.nombre}: ' + ', '.join(
+                f'{campo} {antes} → {despues}' for campo, (antes, despues) in diferencias.items()
+            )
+            for estacion, diferencias in cambios.actualizadas
+        ), self.style.WARNING)
+        seccion('Desactivadas', (
+            f'- {e.nombre} ({e.linea})' for e in cambios.desactivadas
+        ), self.style.WARNING)
+        self.stdout.write(f'\nSin cambios: {cambios.sin_cambios}')
@@ -0,0 +1,53 @@
+"""
+Comando Django para enviar avisos masivos
+Archivo: backend/api/management/commands/difundir_aviso.py
+
+Uso:
+    python manage.py difundir_aviso --titulo "Mantención" --mensaje "..."
+    python manage.py difundir_aviso --titulo "Estación cerrada" --mensaje "..." --estacion 3
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Estacion
+from api.notificaciones import difundir_aviso, TAMANO_LOTE
+
+
+class Command(BaseCommand):
+    help = 'Enviar una notificación SISTEMA a todos los usuarios o a los de una estación'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--titulo', required=True, help='Título de la notificación')
+        parser.add_argument('--mensaje', required=True, help='Mensaje de la notificación')
+        parser.add_argument(
+            '--estacion',
+            type=int,
+            help='ID de estación: avisar solo a usuarios con reservas activas en ella',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANO_LOTE,
+            help=f'Tamaño de lote para bulk_create (default: {TAMANO_LOTE})',
+        )
+    
+    def handle(self, *args, **options):
+        estacion_id = options['estacion']
+        if estacion_id is not None and not Estacion.objects.filter(id=estacion_id).exists():
+            raise CommandError(f'La estación {estacion_id} no existe')
+        
+        inicio = time.perf_counter()
+        creadas = difundir_aviso(
+            titulo=options['titulo'],
+            mensaje=options['mensaje'],
+            estacion_id=estacion_id,
+            tamano_lote=options['lote'],
+        )
+        duracion = time.perf_counter() - inicio
+        
+        tasa = creadas / duracion if duracion > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {creadas} notificaciones creadas en {duracion:.2f}s ({tasa:,.0f}/s)'
+        ))
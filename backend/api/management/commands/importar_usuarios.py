@@ -0,0 +1,79 @@
+"""
+Comando Django para importar usuarios desde un CSV (convenios con empresas
+o universidades)
+Archivo: backend/api/management/commands/importar_usuarios.py
+
+Columnas: nickname, email, rut, telefono, nombre, [apellido],
+[numero_tarjeta_bip], [password]. Sin password la cuenta queda con una
+contraseña inutilizable y el usuario debe recuperarla.
+
+Uso:
+    python manage.py importar_usuarios usuarios.csv
+    python manage.py importar_usuarios usuarios.csv --workers 4 --errores errores.csv
+"""
+
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importacion import importar_usuarios, leer_csv, TAMANO_LOTE
+
+
+# Errores mostrados en consola (el resto va a --errores)
+MAX_ERRORES_MOSTRADOS = 20
+
+
+class Command(BaseCommand):
+    help = 'Importar usuarios desde un archivo CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del CSV (UTF-8, con encabezados)')
+        parser.add_argument('--delimitador', default=',', help='Separador de columnas (default: ,)')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos para hashear contraseñas (default: núcleos disponibles; 0 = sin pool)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANO_LOTE,
+            help=f'Tamaño de lote para bulk_create (default: {TAMANO_LOTE})',
+        )
+        parser.add_argument('--errores', help='Escribir todos los errores a este CSV (línea, error)')
+
+    def handle(self, *args, **options):
+        if not os.path.isfile(options['archivo']):
+            raise CommandError(f"No existe el archivo {options['archivo']}")
+
+        resultado = importar_usuarios(
+            leer_csv(options['archivo'], options['delimitador']),
+            workers=options['workers'],
+            tamano_lote=options['lote'],
+        )
+
+        for linea, mensaje in resultado.errores[:MAX_ERRORES_MOSTRADOS]:
+            self.stdout.write(self.style.WARNING(f'⚠ Línea {linea}: {mensaje}'))
+        if len(resultado.errores) > MAX_ERRORES_MOSTRADOS:
+            self.stdout.write(self.style.WARNING(
+                f'  ... y {len(resultado.errores) - MAX_ERRORES_MOSTRADOS} errores más'
+            ))
+
+        if options['errores']:
+            with open(options['errores'], 'w', newline='', encoding='utf-8') as archivo:
+                escritor = csv.writer(archivo)
+                escritor.writerow(['linea', 'error'])
+                escritor.writerows(resultado.errores)
+
+        self.stdout.write('\nTiempos por fase:')
+        for fase, segundos in resultado.tiempos.items():
+            self.stdout.write(f'  {fase:<12} {segundos:8.2f}s')
+
+        duracion = resultado.duracion
+        tasa = resultado.creadas / duracion if duracion > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✓ {resultado.creadas} de {resultado.leidas} usuarios importados '
+            f'en {duracion:.2f}s ({tasa:,.0f}/s), {len(resultado.errores)} con errores'
+        ))
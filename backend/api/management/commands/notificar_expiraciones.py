@@ -0,0 +1,43 @@
+"""
+Comando Django para avisar reservas próximas a expirar
+Archivo: backend/api/management/commands/notificar_expiraciones.py
+
+Uso: python manage.py notificar_expiraciones [--minutos 3]
+Pensado para ejecutarse periódicamente (cron)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.notificaciones import notificar_reservas_por_expirar, TAMANO_LOTE
+
+
+class Command(BaseCommand):
+    help = 'Crear notificaciones para reservas PENDIENTES próximas a expirar'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutos',
+            type=int,
+            default=3,
+            help='Ventana de aviso antes de la expiración (default: 3)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANO_LOTE,
+            help=f'Tamaño de lote para bulk_create (default: {TAMANO_LOTE})',
+        )
+    
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        creadas = notificar_reservas_por_expirar(
+            minutos=options['minutos'],
+            tamano_lote=options['lote'],
+        )
+        duracion = time.perf_counter() - inicio
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {creadas} notificaciones creadas en {duracion:.2f}s'
+        ))
@@ -0,0 +1,151 @@
+"""
+Comando Django para revisar los perfiles guardados por PerfiladorMiddleware
+Archivo: backend/api/management/commands/perfiles.py
+
+Uso:
+    python manage.py perfiles listar [--vista "GET reserva-list"]
+    python manage.py perfiles agregar                       # resumen por vista
+    python manage.py perfiles agregar --vista "GET reserva-list" --top 30
+    python manage.py perfiles agregar --vista "GET reserva-list" --salida reservas.collapsed
+    python manage.py perfiles limpiar
+"""
+
+import io
+import os
+import pstats
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks.utils import imprimir_tabla
+from api.perfilador import EXTENSIONES, almacen
+
+
+ORDENES = ('cumulative', 'tottime', 'ncalls')
+
+
+class Command(BaseCommand):
+    help = 'Listar, agregar por vista o limpiar los perfiles de requests'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='accion', required=True)
+
+        listar = subparsers.add_parser('listar')
+        listar.add_argument('--vista', help='Filtrar por vista (ej: "GET reserva-list")')
+        listar.add_argument('--limite', type=int, default=50, help='Perfiles más recientes (default: 50)')
+
+        agregar = subparsers.add_parser('agregar')
+        agregar.add_argument('--vista', help='Combinar los perfiles de esta vista')
+        agregar.add_argument('--top', type=int, default=25, help='Funciones o pilas a mostrar (default: 25)')
+        agregar.add_argument('--orden', choices=ORDENES, default='cumulative', help='Orden de pstats')
+        agregar.add_argument(
+            '--salida',
+            help='Escribir el resultado combinado; la extensión se ajusta al modo (.pstats o .collapsed)',
+        )
+
+        subparsers.add_parser('limpiar')
+
+    def handle(self, *args, **options):
+        getattr(self, options['accion'])(options)
+
+    def listar(self, options):
+        perfiles = [
+            meta for meta in almacen.listar()
+            if not options['vista'] or meta['vista'] == options['vista']
+        ][-options['limite']:]
+        if not perfiles:
+            self.stdout.write('No hay perfiles guardados')
+            return
+        imprimir_tabla(self.stdout, [
+            dict(meta, fecha=datetime.fromtimestamp(meta['fecha']).strftime('%Y-%m-%d %H:%M:%S'))
+            for meta in perfiles
+        ], ['id', 'fecha', 'vista', 'estado', 'modo', 'duracion_ms'])
+
+    def agregar(self, options):
+        perfiles = almacen.listar()
+        if not options['vista']:
+            self._resumen_por_vista(perfiles)
+            return
+
+        perfiles = [meta for meta in perfiles if meta['vista'] == options['vista']]
+        if not perfiles:
+            raise CommandError(f"No hay perfiles de {options['vista']}")
+
+        por_modo = defaultdict(list)
+        for meta in perfiles:
+            por_modo[meta['modo']].append(meta['archivo'])
+
+        if por_modo['cprofile']:
+            self._combinar_pstats(por_modo['cprofile'], options)
+        if por_modo['muestreo']:
+            self._combinar_pilas(por_modo['muestreo'], options)
+
+    def limpiar(self, options):
+        cantidad = len(almacen.listar())
+        almacen.limpiar()
+        self.stdout.write(self.style.SUCCESS(f'✓ {cantidad} perfiles eliminados'))
+
+    def _resumen_por_vista(self, perfiles):
+        vistas = defaultdict(list)
+        for meta in perfiles:
+            vistas[meta['vista']].append(meta)
+        if not vistas:
+            self.stdout.write('No hay perfiles guardados')
+            return
+        imprimir_tabla(self.stdout, [
+            {
+                'vista': vista,
+                'perfiles': len(metas),
+                'cprofile': sum(meta['modo'] == 'cprofile' for meta in metas),
+                'muestreo': sum(meta['modo'] == 'muestreo' for meta in metas),
+                'media_ms': sum(meta['duracion_ms'] for meta in metas) / len(metas),
+                'max_ms': max(meta['duracion_ms'] for meta in metas),
+            }
+            for vista, metas in sorted(vistas.items(), key=lambda item: -len(item[1]))
+        ], ['vista', 'perfiles', 'cprofile', 'muestreo', 'media_ms', 'max_ms'])
+
+    def _combinar_pstats(self, archivos, options):
+        texto = io.StringIO()
+        estadisticas = pstats.Stats(*archivos, stream=texto)
+        estadisticas.strip_dirs().sort_stats(options['orden']).print_stats(options['top'])
+        self.stdout.write(self.style.WARNING(f'cProfile: {len(archivos)} perfiles combinados'))
+        self.stdout.write(texto.getvalue())
+        if options['salida']:
+            # Sin strip_dirs para no mezclar funciones homónimas
+            ruta = _ruta_salida(options['salida'], 'cprofile')
+            pstats.Stats(*archivos).dump_stats(ruta)
+            self.stdout.write(self.style.SUCCESS(f'✓ pstats combinado en {ruta}'))
+
+    def _combinar_pilas(self, archivos, options):
+        pilas = Counter()
+        for ruta in archivos:
+            with open(ruta, encoding='utf-8') as archivo:
+                for linea in archivo:
+                    pila, _, muestras = linea.rstrip('\n').rpartition(' ')
+                    if pila:
+                        pilas[pila] += int(muestras)
+
+        total = sum(pilas.values()) or 1
+        self.stdout.write(self.style.WARNING(
+            f'Muestreo: {len(archivos)} perfiles, {total} muestras'
+        ))
+
+        # Funciones "hoja" (donde estaba el hilo al tomar la muestra)
+        hojas = Counter()
+        for pila, muestras in pilas.items():
+            hojas[pila.rsplit(';', 1)[-1]] += muestras
+        for funcion, muestras in hojas.most_common(options['top']):
+            self.stdout.write(f'  {muestras / total:6.1%}  {funcion}')
+
+        if options['salida']:
+            ruta = _ruta_salida(options['salida'], 'muestreo')
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                for pila, muestras in pilas.most_common():
+                    archivo.write(f'{pila} {muestras}\n')
+            self.stdout.write(self.style.SUCCESS(f'✓ Stacks colapsados en {ruta}'))
+
+
+def _ruta_salida(salida, modo):
+    """Una vista puede tener perfiles de ambos modos: un archivo por modo"""
+    return os.path.splitext(salida)[0] + EXTENSIONES[modo]
@@ -0,0 +1,23 @@
+"""
+Comando Django para eliminar tokens revocados ya expirados
+Archivo: backend/api/management/commands/purgar_tokens_revocados.py
+
+La purga también ocurre sola al revocar (ver api/revocacion.py); este
+comando sirve para ejecutarla desde cron en despliegues con poco tráfico.
+
+Uso: python manage.py purgar_tokens_revocados
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.revocacion import lista_revocacion
+
+
+class Command(BaseCommand):
+    help = 'Eliminar de tokens_revocados los refresh tokens ya expirados'
+    
+    def handle(self, *args, **options):
+        eliminados = lista_revocacion.purgar()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {eliminados} tokens revocados expirados eliminados'
+        ))
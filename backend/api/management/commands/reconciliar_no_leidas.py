@@ -0,0 +1,28 @@
+"""
+Comando Django para recalcular el contador de notificaciones no leídas
+Archivo: backend/api/management/commands/reconciliar_no_leidas.py
+
+Uso: python manage.py reconciliar_no_leidas [--usuario ID ...]
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.notificaciones import reconciliar_no_leidas
+
+
+class Command(BaseCommand):
+    help = 'Recalcular Usuario.notificaciones_no_leidas desde la tabla de notificaciones'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--usuario',
+            type=int,
+            nargs='+',
+            help='IDs de usuario a reconciliar (por defecto todos)',
+        )
+    
+    def handle(self, *args, **options):
+        actualizados = reconciliar_no_leidas(options['usuario'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Contador reconciliado para {actualizados} usuarios'
+        ))
@@ -0,0 +1,64 @@
+"""
+Comando Django para mantener réplicas SQLite locales copiando `default`
+Archivo: backend/api/management/commands/replicar_sqlite.py
+
+Uso:
+    python manage.py replicar_sqlite                 # copiar cada --intervalo segundos
+    python manage.py replicar_sqlite --una-vez
+
+Pensado para probar las réplicas de lectura en desarrollo (DB_REPLICAS=2,
+ver api/replicas.py). Usa la API de backup de SQLite en un solo paso: la
+copia lee una instantánea de `default` dentro de una transacción de
+lectura, que con WAL no bloquea a los escritores. Por pasos (pages > 0) el
+backup vuelve a empezar cada vez que otra conexión escribe en `default`, y
+con escrituras continuas puede no terminar nunca.
+
+Mientras se copia, la réplica queda bloqueada: sus lectores esperan en
+busy_timeout (OPTIONS de las réplicas en settings.py) y después leen la
+copia nueva.
+"""
+
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Copiar la base default a las réplicas SQLite con la API de backup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=float, default=1.0, help='Segundos entre copias (default: 1)')
+        parser.add_argument('--una-vez', action='store_true', help='Copiar una vez y terminar')
+
+    def handle(self, *args, **options):
+        origen = settings.DATABASES['default']
+        replicas = {alias: settings.DATABASES[alias] for alias in settings.REPLICAS.get('ALIAS', [])}
+        if not replicas:
+            raise CommandError('No hay réplicas configuradas (DB_REPLICAS)')
+        for alias, configuracion in [('default', origen), *replicas.items()]:
+            if 'sqlite' not in configuracion['ENGINE']:
+                raise CommandError(f'{alias} no es SQLite')
+
+        while True:
+            inicio = time.perf_counter()
+            for alias, configuracion in replicas.items():
+                self._copiar(str(origen['NAME']), str(configuracion['NAME']))
+            self.stdout.write(
+                f'✓ {len(replicas)} réplicas copiadas en {(time.perf_counter() - inicio) * 1000:.0f} ms'
+            )
+            if options['una_vez']:
+                return
+            time.sleep(options['intervalo'])
+
+    def _copiar(self, origen, destino):
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        fuente = sqlite3.connect(origen, timeout=30)
+        copia = sqlite3.connect(destino, timeout=30)
+        try:
+            fuente.backup(copia)  # Un solo paso (pages=-1)
+        finally:
+            copia.close()
+            fuente.close()
@@ -2,17 +2,43 @@
 Comando Django para poblar la base de datos con datos iniciales
 Archivo: backend/api/management/commands/seed_data.py
 
-Uso: python manage.py seed_data
+Estaciones y espacios se crean en bloque con el mismo mecanismo que el
+catálogo (api/catalogo.py): una consulta para conocer lo existente,
+bulk_create/bulk_update para las estaciones y un INSERT con executemany por
+lotes para los espacios. Los espacios de cada estación salen de
+EspacioEstacionamiento.distribucion(espacios_totales), así que el conteo
+siempre coincide con la capacidad.
+
+--escala 10000 (10k estaciones, ~322k espacios) toma ~5 s en SQLite con
+una BD nueva.
+
+Uso:
+    python manage.py seed_data
+    python manage.py seed_data --all
+    python manage.py seed_data --escala 10000   # + estaciones sintéticas
 """
 
-from django.core.management.base import BaseCommand
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
+
+from api.catalogo import aplicar_cambios, calcular_cambios
 from api.models import Usuario, Estacion, EspacioEstacionamiento
 from api.data.estaciones_linea1 import get_estaciones_prototipo
+from api.rut import numero_rut
+
+
+# Área aproximada de Santiago para coordenadas sintéticas
+LATITUD_RANGO = (-33.60, -33.35)
+LONGITUD_RANGO = (-70.80, -70.50)
+CAPACIDADES_SINTETICAS = (21, 30, 36, 42)
+
 
 class Command(BaseCommand):
     help = 'Poblar base de datos con datos iniciales del prototipo BikeMetro'
-    
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--all',
@@ -24,10 +50,23 @@ class Command(BaseCommand):
             action='store_true',
             help='Limpiar datos existentes antes de poblar',
         )
-    
+        parser.add_argument(
+            '--escala',
+            type=int,
+            default=0,
+            help='Agregar N estaciones sintéticas (pruebas de carga)',
+        )
+        parser.add_argument(
+            '--semilla',
+            type=int,
+            default=42,
+            help='Semilla para las estaciones sintéticas (default: 42)',
+        )
+
     @transaction.atomic
     def handle(self, *args, **options):
-        
+        inicio = time.perf_counter()
+
         # Limpiar datos si se especifica
         if options['clear']:
             self.stdout.write(self.style.WARNING('Limpiando datos existentes...'))
@@ -35,71 +74,62 @@ class Command(BaseCommand):
             Estacion.objects.all().delete()
             # No eliminamos usuarios para preservar cuentas de prueba
             self.stdout.write(self.style.SUCCESS('✓ Datos limpiados'))
-        
+
         # Obtener estaciones a crear
         estaciones_data = get_estaciones_prototipo()
-        
+
         if options['all']:
             from api.data.estaciones_linea1 import get_todas_estaciones_con_bicicletero
             estaciones_data = get_todas_estaciones_con_bicicletero()
             self.stdout.write(
                 self.style.WARNING('Modo ALL: Creando todas las estaciones con bicicletero')
             )
-        
-        # Crear estaciones y sus espacios
-        estaciones_creadas = 0
-        espacios_creados = 0
-        
-        for data in estaciones_data:
-            # Crear o actualizar estación
-            estacion, created = Estacion.objects.update_or_create(
-                nombre=data['nombre'],
-                defaults={
-                    'linea': data['linea'],
-                    'estado': data['estado'],
-                    'espacios_totales': data['espacios_totales'],
-                }
+
+        if options['escala'] > 0:
+            estaciones_data = estaciones_data + estaciones_sinteticas(
+                options['escala'], random.Random(options['semilla'])
             )
-            
-            if created:
-                estaciones_creadas += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'✓ Estación creada: {estacion.nombre}')
-                )
-                
-                # Crear espacios para esta estación (matriz 7x3)
-                for fila in range(1, 8):  # Filas 1-7
-                    for columna in ['A', 'B', 'C']:  # Columnas A, B, C
-                        espacio, _ = EspacioEstacionamiento.objects.get_or_create(
-                            estacion=estacion,
-                            fila=fila,
-                            columna=columna,
-                            defaults={'estado': 'DISPONIBLE'}
-                        )
-                        espacios_creados += 1
-                
-                self.stdout.write(f'  → 21 espacios creados para {estacion.nombre}')
-            else:
-                self.stdout.write(
-                    self.style.WARNING(f'⚠ Estación ya existe: {estacion.nombre}')
-                )
+            self.stdout.write(
+                self.style.WARNING(f"Modo ESCALA: {options['escala']} estaciones sintéticas")
+            )
+
+        # Estaciones y espacios en bloque (ver api/catalogo.py)
+        try:
+            cambios = calcular_cambios(
+                ((f'seed[{i}]', data) for i, data in enumerate(estaciones_data)),
+                desactivar_faltantes=False,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if cambios.errores:
+            origen, mensaje = cambios.errores[0]
+            raise CommandError(f'{origen}: {mensaje}')
+        espacios_creados, espacios_sobrantes = aplicar_cambios(cambios)
         
         # Resumen
         self.stdout.write('\n' + '='*60)
         self.stdout.write(self.style.SUCCESS('RESUMEN:'))
-        self.stdout.write(f'  • Estaciones creadas: {estaciones_creadas}')
+        self.stdout.write(f'  • Estaciones creadas: {len(cambios.nuevas)}')
+        self.stdout.write(f'  • Estaciones actualizadas: {len(cambios.actualizadas)}')
         self.stdout.write(f'  • Espacios creados: {espacios_creados}')
         self.stdout.write(f'  • Total estaciones en BD: {Estacion.objects.count()}')
         self.stdout.write(f'  • Total espacios en BD: {EspacioEstacionamiento.objects.count()}')
+        self.stdout.write(f'  • Tiempo: {time.perf_counter() - inicio:.2f}s')
         self.stdout.write('='*60 + '\n')
-        
+
+        if espacios_sobrantes:
+            self.stdout.write(self.style.WARNING(
+                f'⚠ {espacios_sobrantes} espacios exceden la capacidad de su estación '
+                '(no se eliminan: pueden tener reservas)'
+            ))
+
         # Crear usuarios de prueba si no existen
         self.crear_usuarios_prueba()
-    
+
     def crear_usuarios_prueba(self):
         """Crear usuarios de prueba para testing"""
         self.stdout.write(self.style.WARNING('\nCreando usuarios de prueba...'))
-        
+
         usuarios_prueba = [
             {
                 'username': 'catalina',
@@ -117,33 +147,40 @@ class Command(BaseCommand):
                 'password': 'test123',
                 'first_name': 'Usuario',
                 'last_name': 'Prueba',
-                'rut': '12345678-9',
+                'rut': '12345678-5',
                 'telefono': '+56912345678',
                 'numero_tarjeta_bip': '5678',
             },
         ]
-        
+
+        # Una consulta para ambos criterios (username o RUT)
+        usernames_existentes = set(Usuario.objects.filter(
+            username__in=[u['username'] for u in usuarios_prueba]
+        ).values_list('username', flat=True))
+        ruts_existentes = set(Usuario.objects.filter(
+            rut_numero__in=[numero_rut(u['rut']) for u in usuarios_prueba]
+        ).values_list('rut_numero', flat=True))
+
         for user_data in usuarios_prueba:
             username = user_data['username']
             password = user_data.pop('password')
             rut = user_data['rut']
-            
-            # Verificar si el usuario ya existe por username o RUT
-            if Usuario.objects.filter(username=username).exists():
+
+            if username in usernames_existentes:
                 self.stdout.write(
                     self.style.WARNING(f'⚠ Usuario ya existe: {username}')
                 )
                 continue
-            
-            if Usuario.objects.filter(rut=rut).exists():
+
+            if numero_rut(rut) in ruts_existentes:
                 self.stdout.write(
                     self.style.WARNING(f'⚠ Usuario con RUT {rut} ya existe')
                 )
                 continue
-            
+
             # Crear usuario
             try:
-                user = Usuario.objects.create_user(
+                Usuario.objects.create_user(
                     password=password,
                     **user_data
                 )
@@ -154,5 +191,22 @@ class Command(BaseCommand):
                 self.stdout.write(
                     self.style.ERROR(f'✗ Error al crear {username}: {str(e)}')
                 )
-        
-        self.stdout.write('\n' + self.style.SUCCESS('¡Base de datos poblada exitosamente!'))
\ No newline at end of file
+
+        self.stdout.write('\n' + self.style.SUCCESS('¡Base de datos poblada exitosamente!'))
+
+
+def estaciones_sinteticas(cantidad, rng):
+    """Estaciones ficticias repartidas entre las líneas, para pruebas de carga"""
+    lineas = [codigo for codigo, _ in Estacion.LINEAS_CHOICES]
+    return [
+        {
+            'nombre': f'Sintética {lineas[i % len(lineas)]} {i + 1:05d}',
+            'linea': lineas[i % len(lineas)],
+            'orden': i // len(lineas) + 1,
+            'estado': 'ACTIVO',
+            'espacios_totales': rng.choice(CAPACIDADES_SINTETICAS),
+            'latitud': round(rng.uniform(*LATITUD_RANGO), 6),
+            'longitud': round(rng.uniform(*LONGITUD_RANGO), 6),
+        }
+        for i in range(cantidad)
+    ]
@@ -0,0 +1,513 @@
+"""
+Métricas en formato de exposición de Prometheus (GET /metrics)
+Archivo: backend/api/metricas.py
+
+Series expuestas:
+- bikemetro_http_requests_total{vista,accion,metodo,codigo} y el histograma
+  bikemetro_http_request_duration_seconds{vista,accion,metodo}; `accion` es
+  la acción del viewset (list, retrieve, confirmar...). Las alimenta
+  InstrumentacionMiddleware, así que requieren la instrumentación activa.
+- bikemetro_db_consultas_total{vista}, bikemetro_db_tiempo_seconds_total{vista}
+  y bikemetro_db_conexiones_total{alias}.
+- bikemetro_logs_descartados_total{logger}: ver api/bitacora.py.
+- bikemetro_reservas_transiciones_total{estado}: reservas que entran a cada
+  estado al guardarse (los update() y bulk_create no pasan por save).
+- bikemetro_estacion_espacios{estacion,linea,estado},
+  bikemetro_estacion_ocupacion_ratio{estacion,linea} y
+  bikemetro_linea_ocupacion_ratio{linea}: ocupados + reservados / total.
+- bikemetro_expiracion_pendientes_vencidas y bikemetro_expiracion_retraso_seconds:
+  reservas PENDIENTES con la expiración ya cumplida y la antigüedad de la
+  más atrasada (las reservas expiran al intentar confirmarlas, así que es
+  el retraso acumulado del barrido).
+
+El scrape no consulta la BD: ocupación y expiración las calcula un hilo
+cada METRICAS['INTERVALO_REFRESCO'] segundos (se inicia con el primer
+scrape del proceso) y el scrape solo lee memoria.
+
+Multiproceso (workers pre-fork): con METRICAS['DIRECTORIO'] cada proceso
+vuelca su registro a <pid>-<inicio>.json cada INTERVALO_VOLCADO segundos y
+al salir. El scrape suma contadores e histogramas de todos los archivos y,
+de cada medidor, usa el del proceso que lo actualizó más recientemente.
+Los archivos de procesos terminados se acumulan en acumulado.json para que
+los contadores no retrocedan. Compactación y lectura del scrape ocurren
+con el mismo candado (.lock), así que un scrape nunca ve un archivo ya
+sumado a acumulado.json.
+
+Acceso: con METRICAS['TOKEN'] el scrape envía "Authorization: Bearer
+<token>"; sin token, /metrics solo responde a conexiones desde loopback.
+"""
+
+import atexit
+import bisect
+import fcntl
+import ipaddress
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+logger = logging.getLogger('api')
+
+_config = getattr(settings, 'METRICAS', {})
+
+LIMITES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TIPO_CONTENIDO = 'text/plain; version=0.0.4; charset=utf-8'
+ACUMULADO = 'acumulado.json'
+
+
+# ============ MÉTRICAS ============
+class Metrica:
+    """Serie por combinación de etiquetas, protegida por un lock propio"""
+
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.lock = threading.Lock()
+        self.series = {}
+        self.actualizado = 0.0
+
+    def estado(self):
+        with self.lock:
+            return {
+                'series': [[list(etiquetas), _copiar(valor)] for etiquetas, valor in self.series.items()],
+                'actualizado': self.actualizado,
+            }
+
+    def limpiar(self):
+        with self.lock:
+            self.series = {}
+            self.actualizado = 0.0
+
+
+class Contador(Metrica):
+    tipo = 'counter'
+
+    def incrementar(self, *etiquetas, valor=1):
+        with self.lock:
+            self.series[etiquetas] = self.series.get(etiquetas, 0) + valor
+
+
+class Medidor(Metrica):
+    """Valores calculados por el refresco: se reemplazan completos"""
+
+    tipo = 'gauge'
+
+    def reemplazar(self, series):
+        with self.lock:
+            self.series = dict(series)
+            self.actualizado = time.time()
+
+
+class HistogramaMetrica(Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=LIMITES_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = limites
+
+    def observar(self, *etiquetas, valor):
+        with self.lock:
+            serie = self.series.get(etiquetas)
+            if serie is None:
+                serie = self.series[etiquetas] = [[0] * (len(self.limites) + 1), 0.0]
+            serie[0][bisect.bisect_left(self.limites, valor)] += 1
+            serie[1] += valor
+
+
+def _copiar(valor):
+    return [list(valor[0]), valor[1]] if isinstance(valor, list) else valor
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self.metricas = {}
+
+    def agregar(self, metrica):
+        self.metricas[metrica.nombre] = metrica
+        return metrica
+
+    def estado(self):
+        return {nombre: metrica.estado() for nombre, metrica in self.metricas.items()}
+
+    def limpiar(self):
+        for metrica in self.metricas.values():
+            metrica.limpiar()
+
+
+registro = RegistroMetricas()
+
+REQUESTS = registro.agregar(Contador(
+    'bikemetro_http_requests_total', 'Requests atendidos por vista, acción y código',
+    ('vista', 'accion', 'metodo', 'codigo'),
+))
+DURACION = registro.agregar(HistogramaMetrica(
+    'bikemetro_http_request_duration_seconds', 'Duración de los requests por vista y acción',
+    ('vista', 'accion', 'metodo'),
+))
+CONSULTAS = registro.agregar(Contador(
+    'bikemetro_db_consultas_total', 'Consultas SQL ejecutadas por vista', ('vista',),
+))
+TIEMPO_BD = registro.agregar(Contador(
+    'bikemetro_db_tiempo_seconds_total', 'Tiempo en la BD por vista', ('vista',),
+))
+CONEXIONES = registro.agregar(Contador(
+    'bikemetro_db_conexiones_total', 'Conexiones a la BD abiertas', ('alias',),
+))
+TRANSICIONES = registro.agregar(Contador(
+    'bikemetro_reservas_transiciones_total', 'Reservas que entran a cada estado', ('estado',),
+))
+ESPACIOS = registro.agregar(Medidor(
+    'bikemetro_estacion_espacios', 'Espacios por estación y estado', ('estacion', 'linea', 'estado'),
+))
+OCUPACION_ESTACION = registro.agregar(Medidor(
+    'bikemetro_estacion_ocupacion_ratio', 'Fracción de espacios ocupados o reservados', ('estacion', 'linea'),
+))
+OCUPACION_LINEA = registro.agregar(Medidor(
+    'bikemetro_linea_ocupacion_ratio', 'Fracción de espacios ocupados o reservados por línea', ('linea',),
+))
+VENCIDAS = registro.agregar(Medidor(
+    'bikemetro_expiracion_pendientes_vencidas', 'Reservas PENDIENTES con la expiración cumplida',
+))
+RETRASO = registro.agregar(Medidor(
+    'bikemetro_expiracion_retraso_seconds', 'Antigüedad de la reserva PENDIENTE más atrasada',
+))
+LOGS_DESCARTADOS = registro.agregar(Contador(
+    'bikemetro_logs_descartados_total', 'Registros de log descartados con la cola llena', ('logger',),
+))
+CACHE_RESPUESTAS = registro.agregar(Contador(
+    'bikemetro_cache_respuestas_total', 'Lecturas de la cache de respuestas (acierto, espera, fallo)', ('resultado',),
+))
+REFRESCO = registro.agregar(Medidor(
+    'bikemetro_metricas_refresco_seconds', 'Duración del último refresco de métricas de negocio',
+))
+
+
+# ============ REGISTRO DESDE LA APP ============
+def registrar_request(request, codigo, duracion, medicion):
+    """Llamado por InstrumentacionMiddleware al terminar cada request"""
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        vista, accion = '(sin ruta)', ''
+    else:
+        vista = coincidencia.view_name
+        acciones = getattr(coincidencia.func, 'actions', None)
+        accion = acciones.get(request.method.lower(), '') if acciones else ''
+    REQUESTS.incrementar(vista, accion, request.method, str(codigo))
+    DURACION.observar(vista, accion, request.method, valor=duracion)
+    if medicion.consultas:
+        CONSULTAS.incrementar(vista, valor=medicion.consultas)
+        TIEMPO_BD.incrementar(vista, valor=medicion.tiempo_bd)
+
+
+def _conexion_creada(sender, connection, **kwargs):
+    CONEXIONES.incrementar(connection.alias)
+
+
+def instalar():
+    """Conectar el conteo de conexiones (desde ApiConfig.ready)"""
+    from django.db.backends.signals import connection_created
+    connection_created.connect(_conexion_creada, dispatch_uid='metricas_conexiones')
+
+
+# ============ REFRESCO EN SEGUNDO PLANO ============
+OCUPADOS = ('OCUPADO', 'RESERVADO')
+
+
+def refrescar():
+    """Recalcular las métricas que requieren consultar la BD"""
+    from django.db import connections
+
+    try:
+        _calcular_negocio()
+    finally:
+        connections.close_all()  # Conexiones propias del hilo de refresco
+
+
+def _calcular_negocio():
+    from django.db.models import Count, Min
+    from django.utils import timezone
+    from .models import EspacioEstacionamiento, Reserva
+
+    inicio = time.perf_counter()
+    espacios = {}
+    estaciones = {}
+    lineas = {}
+    filas = EspacioEstacionamiento.objects.values_list(
+        'estacion__nombre', 'estacion__linea', 'estado'
+    ).annotate(cantidad=Count('id')).order_by()
+    for estacion, linea, estado, cantidad in filas:
+        espacios[(estacion, linea, estado)] = cantidad
+        for clave, totales in (((estacion, linea), estaciones), ((linea,), lineas)):
+            ocupados, total = totales.get(clave, (0, 0))
+            totales[clave] = (ocupados + (cantidad if estado in OCUPADOS else 0), total + cantidad)
+
+    ahora = timezone.now()
+    vencidas = Reserva.objects.filter(
+        estado='PENDIENTE', fecha_expiracion_reserva__lt=ahora
+    ).aggregate(cantidad=Count('id'), mas_antigua=Min('fecha_expiracion_reserva'))
+    retraso = (ahora - vencidas['mas_antigua']).total_seconds() if vencidas['mas_antigua'] else 0.0
+
+    ESPACIOS.reemplazar(espacios)
+    OCUPACION_ESTACION.reemplazar({clave: ocupados / total for clave, (ocupados, total) in estaciones.items()})
+    OCUPACION_LINEA.reemplazar({clave: ocupados / total for clave, (ocupados, total) in lineas.items()})
+    VENCIDAS.reemplazar({(): vencidas['cantidad']})
+    RETRASO.reemplazar({(): retraso})
+    REFRESCO.reemplazar({(): time.perf_counter() - inicio})
+
+
+class HiloPeriodico:
+    """Ejecutar `funcion` cada `intervalo` segundos en un hilo daemon"""
+
+    def __init__(self, nombre, funcion, intervalo):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.intervalo = intervalo
+        self.lock = threading.Lock()
+        self.hilo = None
+        self.pid = None
+
+    def asegurar(self):
+        # Tras un fork el hilo del padre no existe en el hijo
+        if self.hilo is not None and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.hilo is None or self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.hilo = threading.Thread(target=self._ciclo, name=self.nombre, daemon=True)
+                self.hilo.start()
+
+    def _ciclo(self):
+        while True:
+            try:
+                self.funcion()
+            except Exception:
+                logger.exception('Error en %s', self.nombre)
+            time.sleep(self.intervalo)
+
+
+refresco = HiloPeriodico('metricas-refresco', refrescar, _config.get('INTERVALO_REFRESCO', 15))
+
+
+# ============ MULTIPROCESO ============
+class DirectorioMetricas:
+    """Un archivo JSON por proceso con el estado de su registro"""
+
+    def __init__(self, directorio):
+        self.directorio = str(directorio)
+        self.inicio = time.time_ns()
+
+    def _archivo_propio(self):
+        return os.path.join(self.directorio, f'{os.getpid()}-{self.inicio}.json')
+
+    def _escribir(self, ruta, estado):
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(estado, archivo)
+        os.replace(temporal, ruta)
+
+    def _leer(self, ruta):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError):
+            return None  # Borrado por otro proceso
+
+    def volcar(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        self._escribir(self._archivo_propio(), registro.estado())
+
+    def reiniciar(self):
+        """En un hijo recién creado: archivo y contadores propios"""
+        self.inicio = time.time_ns()
+        registro.limpiar()
+
+    @contextmanager
+    def _candado(self):
+        with open(os.path.join(self.directorio, '.lock'), 'w') as candado:
+            fcntl.flock(candado, fcntl.LOCK_EX)
+            yield
+
+    def otros_procesos(self):
+        """
+        Estados de los demás procesos; compacta antes los de procesos terminados
+        Todo con el candado tomado: otro scrape que compacte a la vez no puede
+        dejar un archivo contado en acumulado.json y también por separado
+        """
+        if not os.path.isdir(self.directorio):
+            return []
+        with self._candado():
+            self._compactar()
+            propio = os.path.basename(self._archivo_propio())
+            estados = []
+            for nombre in os.listdir(self.directorio):
+                if nombre.endswith('.json') and nombre != propio:
+                    estado = self._leer(os.path.join(self.directorio, nombre))
+                    if estado is not None:
+                        estados.append(estado)
+            return estados
+
+    def _compactar(self):
+        """Sumar a acumulado.json los archivos de procesos terminados (con el candado tomado)"""
+        terminados = [
+            nombre for nombre in os.listdir(self.directorio)
+            if nombre.endswith('.json') and nombre != ACUMULADO and not _proceso_vivo(nombre)
+        ]
+        if not terminados:
+            return
+        ruta_acumulado = os.path.join(self.directorio, ACUMULADO)
+        estados = [self._leer(ruta_acumulado) or {}]
+        rutas = []
+        for nombre in terminados:
+            ruta = os.path.join(self.directorio, nombre)
+            estado = self._leer(ruta)
+            if estado is not None:
+                estados.append(estado)
+                rutas.append(ruta)
+        # Los medidores de un proceso terminado ya no aplican
+        self._escribir(ruta_acumulado, combinar(estados, con_medidores=False))
+        for ruta in rutas:
+            os.remove(ruta)
+
+
+def _proceso_vivo(nombre):
+    try:
+        os.kill(int(nombre.split('-')[0]), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+multiproceso = DirectorioMetricas(_config['DIRECTORIO']) if _config.get('DIRECTORIO') else None
+volcado = HiloPeriodico(
+    'metricas-volcado', lambda: multiproceso.volcar(), _config.get('INTERVALO_VOLCADO', 5)
+) if multiproceso else None
+
+
+
+def _volcado_final():
+    if volcado.pid == os.getpid():
+        multiproceso.volcar()
+
+
+if multiproceso:
+    os.register_at_fork(after_in_child=multiproceso.reiniciar)
+    atexit.register(_volcado_final)
+
+
+def iniciar():
+    """Iniciar el volcado a disco del proceso (desde InstrumentacionMiddleware)"""
+    if volcado is not None:
+        volcado.asegurar()
+
+
+# ============ EXPOSICIÓN ============
+def combinar(estados, con_medidores=True):
+    """
+    Sumar contadores e histogramas de varios estados; de cada medidor se
+    toma el estado actualizado más recientemente
+    """
+    combinado = {}
+    for estado in estados:
+        for nombre, datos in estado.items():
+            metrica = registro.metricas.get(nombre)
+            if metrica is None:
+                continue  # Métrica de otra versión del código
+            if metrica.tipo == 'gauge':
+                previo = combinado.get(nombre)
+                if con_medidores and datos['actualizado'] and (
+                    previo is None or datos['actualizado'] > previo['actualizado']
+                ):
+                    combinado[nombre] = datos
+                continue
+
+            series = {
+                tuple(etiquetas): valor
+                for etiquetas, valor in combinado.get(nombre, {'series': []})['series']
+            }
+            for etiquetas, valor in datos['series']:
+                etiquetas = tuple(etiquetas)
+                previo = series.get(etiquetas)
+                if previo is None:
+                    series[etiquetas] = _copiar(valor)
+                elif metrica.tipo == 'histogram':
+                    series[etiquetas] = [[a + b for a, b in zip(previo[0], valor[0])], previo[1] + valor[1]]
+                else:
+                    series[etiquetas] = previo + valor
+            combinado[nombre] = {
+                'series': [[list(etiquetas), valor] for etiquetas, valor in series.items()],
+                'actualizado': 0.0,
+            }
+    return combinado
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(nombres, valores, extra=''):
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    if isinstance(valor, float):
+        if math.isnan(valor):
+            return 'NaN'
+        if math.isinf(valor):
+            return '+Inf' if valor > 0 else '-Inf'  # Formato de Prometheus, no el de repr
+        if not valor.is_integer():
+            return repr(valor)
+    return str(int(valor))
+
+
+def texto_prometheus(estado):
+    lineas = []
+    for nombre, metrica in registro.metricas.items():
+        datos = estado.get(nombre)
+        if not datos or not datos['series']:
+            continue
+        lineas.append(f'# HELP {nombre} {metrica.ayuda}')
+        lineas.append(f'# TYPE {nombre} {metrica.tipo}')
+        for etiquetas, valor in sorted(datos['series']):
+            if metrica.tipo != 'histogram':
+                lineas.append(f'{nombre}{_etiquetas(metrica.etiquetas, etiquetas)} {_numero(valor)}')
+                continue
+            conteos, suma = valor
+            acumulado = 0
+            for limite, conteo in zip(metrica.limites + (None,), conteos):
+                acumulado += conteo
+                le = 'le="+Inf"' if limite is None else f'le="{limite}"'
+                lineas.append(f'{nombre}_bucket{_etiquetas(metrica.etiquetas, etiquetas, le)} {acumulado}')
+            lineas.append(f'{nombre}_sum{_etiquetas(metrica.etiquetas, etiquetas)} {_numero(suma)}')
+            lineas.append(f'{nombre}_count{_etiquetas(metrica.etiquetas, etiquetas)} {acumulado}')
+    return '\n'.join(lineas) + '\n'
+
+
+def direccion_local(direccion):
+    """Si REMOTE_ADDR es loopback (acceso a /metrics sin token)"""
+    try:
+        return ipaddress.ip_address(direccion or '').is_loopback
+    except ValueError:
+        return False
+
+
+def exponer():
+    """Texto del scrape: solo memoria y archivos, nunca la BD"""
+    refresco.asegurar()
+    estados = [registro.estado()]
+    if multiproceso is not None:
+        estados.extend(multiproceso.otros_procesos())
+    return texto_prometheus(combinar(estados))
@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-19 02:45
+
+from django.db import migrations, models
+
+
+def calcular_no_leidas(apps, schema_editor):
+    """Inicializar el contador con las notificaciones no leídas existentes"""
+    from django.db.models import Count, OuterRef, Subquery
+    from django.db.models.functions import Coalesce
+    
+    Usuario = apps.get_model('api', 'Usuario')
+    Notificacion = apps.get_model('api', 'Notificacion')
+    
+    no_leidas = Notificacion.objects.filter(
+        usuario=OuterRef('pk'), leida=False
+    ).order_by().values('usuario').annotate(total=Count('id')).values('total')
+    
+    Usuario.objects.update(
+        notificaciones_no_leidas=Coalesce(Subquery(no_leidas), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_estacion_latitud_estacion_longitud'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='notificaciones_no_leidas',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(condition=models.Q(('leida', False)), fields=['usuario'], name='notif_usuario_no_leidas_idx'),
+        ),
+        migrations.RunPython(calcular_no_leidas, migrations.RunPython.noop),
+    ]
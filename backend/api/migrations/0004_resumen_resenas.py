@@ -0,0 +1,63 @@
+# Generated by Django 4.2 on 2026-10-19 02:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def calcular_resumenes(apps, schema_editor):
+    """Construir los resúmenes a partir de las reseñas existentes"""
+    Resena = apps.get_model('api', 'Resena')
+    ResumenResenas = apps.get_model('api', 'ResumenResenas')
+    
+    aspectos = [
+        'calificacion',
+        'calificacion_seguridad',
+        'calificacion_limpieza',
+        'calificacion_accesibilidad',
+    ]
+    resumenes = {}
+    for resena in Resena.objects.values('estacion_id', *aspectos).iterator():
+        agregados = resumenes.setdefault(resena['estacion_id'], {
+            aspecto: {'cantidad': 0, 'suma': 0, 'histograma': [0, 0, 0, 0, 0]}
+            for aspecto in aspectos
+        })
+        for aspecto in aspectos:
+            valor = resena[aspecto]
+            if valor is not None:
+                agregados[aspecto]['cantidad'] += 1
+                agregados[aspecto]['suma'] += valor
+                agregados[aspecto]['histograma'][valor - 1] += 1
+    
+    ResumenResenas.objects.bulk_create([
+        ResumenResenas(
+            estacion_id=estacion_id,
+            total_resenas=agregados['calificacion']['cantidad'],
+            agregados=agregados,
+        )
+        for estacion_id, agregados in resumenes.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_usuario_notificaciones_no_leidas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenResenas',
+            fields=[
+                ('estacion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen_resenas', serialize=False, to='api.estacion')),
+                ('total_resenas', models.IntegerField(default=0)),
+                ('agregados', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Reseñas',
+                'verbose_name_plural': 'Resúmenes de Reseñas',
+                'db_table': 'resumen_resenas',
+            },
+        ),
+        migrations.RunPython(calcular_resumenes, migrations.RunPython.noop),
+    ]
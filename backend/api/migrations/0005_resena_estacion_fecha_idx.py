@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_resumen_resenas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='resena',
+            index=models.Index(fields=['estacion', 'created_at'], name='resena_estacion_fecha_idx'),
+        ),
+    ]
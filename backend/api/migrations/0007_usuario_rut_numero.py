@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-19 03:03
+
+from django.db import migrations, models
+
+from api.rut import numero_rut
+
+
+def calcular_rut_numero(apps, schema_editor):
+    """
+    Llenar rut_numero desde rut; si dos registros antiguos comparten cuerpo
+    (ej: 12345678-9 y 12345678-K) solo el más antiguo lo recibe
+    """
+    Usuario = apps.get_model('api', 'Usuario')
+    
+    vistos = set()
+    pendientes = []
+    for usuario in Usuario.objects.order_by('id').only('id', 'rut').iterator():
+        numero = numero_rut(usuario.rut)
+        if numero is None or numero in vistos:
+            continue
+        vistos.add(numero)
+        usuario.rut_numero = numero
+        pendientes.append(usuario)
+    
+    Usuario.objects.bulk_update(pendientes, ['rut_numero'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_token_revocado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='rut_numero',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.RunPython(calcular_rut_numero, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_usuario_rut_numero'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='espacioestacionamiento',
+            name='columna',
+            field=models.CharField(choices=[('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D'), ('E', 'E'), ('F', 'F')], help_text='Columna A-C (lado 1) o D-F (lado 2)', max_length=1),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_espacio_columnas_dos_lados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estacion',
+            name='orden',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Posición de la estación en su línea (1 = cabecera)', null=True),
+        ),
+    ]
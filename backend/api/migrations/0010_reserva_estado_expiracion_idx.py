@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 03:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_estacion_orden'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado', 'fecha_expiracion_reserva'], name='reserva_estado_expira_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 05:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_reserva_estado_expiracion_idx'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='notificacion',
+            constraint=models.UniqueConstraint(condition=models.Q(('reserva__isnull', False)), fields=('usuario', 'tipo', 'reserva'), name='notif_usuario_tipo_reserva_uniq'),
+        ),
+    ]
@@ -8,6 +8,8 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 import uuid
 
+from .rut import formatear_rut, numero_rut, validar_rut
+
 # ==================== USUARIO ====================
 class Usuario(AbstractUser):
     """Usuario del sistema BikeMetro"""
@@ -22,6 +24,15 @@ class Usuario(AbstractUser):
         unique=True,
         help_text='RUT sin puntos, con guión (ej: 12345678-9)'
     )
+    # Cuerpo del RUT como entero (api/rut.py): búsquedas por igualdad de
+    # entero en vez de comparar texto con distintos formatos. Se deriva de
+    # 'rut' al guardar; NULL solo en registros antiguos con cuerpo repetido
+    rut_numero = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+    )
     telefono = models.CharField(max_length=15)
     
     # Información de tarjeta Bip!
@@ -35,6 +46,10 @@ class Usuario(AbstractUser):
     email_verificado = models.BooleanField(default=False)
     telefono_verificado = models.BooleanField(default=False)
     
+    # Contador desnormalizado de notificaciones no leídas (badge de la app)
+    # Solo se modifica con UPDATE atómicos desde api/notificaciones.py
+    notificaciones_no_leidas = models.PositiveIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -60,16 +75,47 @@ class Usuario(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.rut})"
     
+    def save(self, *args, **kwargs):
+        """
+        Derivar rut_numero desde rut
+        Un save() completo no debe pisar el contador de notificaciones
+        """
+        numero = numero_rut(self.rut)
+        if numero != self.rut_numero:
+            # Registros antiguos con cuerpo repetido (ver migración 0007)
+            # conservan NULL en vez de chocar con el índice único. Un usuario
+            # nuevo con cuerpo repetido falla igual que con un RUT repetido
+            if not self._state.adding and numero is not None and Usuario.objects.filter(
+                rut_numero=numero
+            ).exclude(pk=self.pk).exists():
+                numero = None
+            self.rut_numero = numero
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'rut' in update_fields and 'rut_numero' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'rut_numero']
+        
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'notificaciones_no_leidas'
+            ]
+        super().save(*args, **kwargs)
+    
     def clean(self):
-        """Validar formato de RUT"""
+        """Validar RUT (formato y dígito verificador) y guardarlo normalizado"""
         from django.core.exceptions import ValidationError
+        super().clean()
         if self.rut:
-            # Validación básica de formato RUT
-            import re
-            if not re.match(r'^\d{7,8}-[\dkK]$', self.rut):
+            partes = validar_rut(self.rut)
+            if partes is None:
                 raise ValidationError({
-                    'rut': 'Formato de RUT inválido. Use formato: 12345678-9'
+                    'rut': 'RUT inválido. Revisa el dígito verificador (ej: 12345678-5)'
                 })
+            self.rut = formatear_rut(*partes)
 
 
 # ==================== ESTACIÓN DE METRO ====================
@@ -94,6 +140,11 @@ class Estacion(models.Model):
     
     nombre = models.CharField(max_length=100, unique=True)
     linea = models.CharField(max_length=3, choices=LINEAS_CHOICES, default='L1')
+    orden = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text='Posición de la estación en su línea (1 = cabecera)'
+    )
     
     # Coordenadas GPS
     latitud = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True)
@@ -108,7 +159,7 @@ class Estacion(models.Model):
     )
     
     # Capacidad
-    espacios_totales = models.IntegerField(default=42)  # 7 filas x 3 columnas x 2 lados
+    espacios_totales = models.IntegerField(default=42)  # 7 filas x 3 columnas x 2 lados (ver EspacioEstacionamiento.distribucion)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -128,9 +179,13 @@ class Estacion(models.Model):
     @property
     def espacios_disponibles(self):
         """Calcula espacios disponibles en tiempo real"""
-        espacios_ocupados = self.espacios.filter(
-            estado__in=['OCUPADO', 'RESERVADO']
-        ).count()
+        # Los listados anotan el conteo (ver EstacionViewSet) para no hacer
+        # una consulta por estación
+        espacios_ocupados = getattr(self, 'espacios_ocupados', None)
+        if espacios_ocupados is None:
+            espacios_ocupados = self.espacios.filter(
+                estado__in=['OCUPADO', 'RESERVADO']
+            ).count()
         
         return self.espacios_totales - espacios_ocupados
     
@@ -157,15 +212,19 @@ class EspacioEstacionamiento(models.Model):
         related_name='espacios'
     )
     
-    # Identificación del espacio según mockup (A1-C7)
+    # Bicicletero de dos lados: columnas A-C (lado 1) y D-F (lado 2), 7 filas
+    FILAS = 7
+    COLUMNAS_POR_LADO = [['A', 'B', 'C'], ['D', 'E', 'F']]
+    
+    # Identificación del espacio según mockup (A1-F7)
     fila = models.IntegerField(
-        validators=[MinValueValidator(1), MaxValueValidator(7)],
+        validators=[MinValueValidator(1), MaxValueValidator(FILAS)],
         help_text='Número de fila (1-7)'
     )
     columna = models.CharField(
         max_length=1, 
-        choices=[('A', 'A'), ('B', 'B'), ('C', 'C')],
-        help_text='Columna A, B o C'
+        choices=[(c, c) for lado in COLUMNAS_POR_LADO for c in lado],
+        help_text='Columna A-C (lado 1) o D-F (lado 2)'
     )
     
     # Estado del espacio
@@ -195,6 +254,23 @@ class EspacioEstacionamiento(models.Model):
     def codigo(self):
         """Código único del espacio (Ej: A1, B3, C7)"""
         return f"{self.columna}{self.fila}"
+    
+    @classmethod
+    def distribucion(cls, capacidad):
+        """
+        Posiciones (fila, columna) para una estación de `capacidad` espacios
+        Llena el lado 1 (A-C, filas 1-7) y luego el lado 2 (D-F)
+        """
+        maximo = cls.FILAS * sum(len(lado) for lado in cls.COLUMNAS_POR_LADO)
+        if not 0 <= capacidad <= maximo:
+            raise ValueError(f'La capacidad debe estar entre 0 y {maximo}')
+        posiciones = [
+            (fila, columna)
+            for lado in cls.COLUMNAS_POR_LADO
+            for fila in range(1, cls.FILAS + 1)
+            for columna in lado
+        ]
+        return posiciones[:capacidad]
 
 
 # ==================== RESERVA ====================
@@ -270,11 +346,25 @@ class Reserva(models.Model):
             models.Index(fields=['estacion', 'estado']),
             models.Index(fields=['qr_entrada']),
             models.Index(fields=['qr_salida']),
+            # Reservas PENDIENTES por expiración (avisos y retraso en /metrics)
+            models.Index(fields=['estado', 'fecha_expiracion_reserva'], name='reserva_estado_expira_idx'),
         ]
     
     def __str__(self):
         return f"Reserva {self.id} - {self.usuario.username} - {self.estado}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Recordar el estado cargado para contar transiciones al guardar
+        Si 'estado' quedó diferido no hay valor que recordar: sin
+        _estado_original, reserva_guardada no cuenta transición
+        """
+        instancia = super().from_db(db, field_names, values)
+        if 'estado' in field_names:
+            instancia._estado_original = instancia.estado
+        return instancia
+    
     def calcular_costo(self):
         """Calcula el costo total basado en tiempo de uso"""
         if not self.fecha_entrada or not self.fecha_salida:
@@ -427,15 +517,70 @@ class Resena(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Aspectos agregados por estación en ResumenResenas
+    ASPECTOS = (
+        'calificacion',
+        'calificacion_seguridad',
+        'calificacion_limpieza',
+        'calificacion_accesibilidad',
+    )
+    
     class Meta:
         db_table = 'resenas'
         verbose_name = 'Reseña'
         verbose_name_plural = 'Reseñas'
         ordering = ['-created_at']
         unique_together = ['usuario', 'reserva']
+        indexes = [
+            # Listado por estación, más recientes primero
+            models.Index(fields=['estacion', 'created_at'], name='resena_estacion_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"{self.usuario.username} - {self.estacion.nombre} ({self.calificacion}⭐)"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Recordar estación y calificaciones cargadas para ajustar el resumen al guardar
+        Con alguna diferida (.only() de ?fields=) no hay snapshot: resena_guardada
+        no aplica delta en vez de restar valores que no se leyeron
+        """
+        instancia = super().from_db(db, field_names, values)
+        campos = ('estacion_id',) + cls.ASPECTOS
+        if all(campo in field_names for campo in campos):
+            instancia._valores_originales = {campo: getattr(instancia, campo) for campo in campos}
+        return instancia
+
+
+# ==================== RESUMEN DE RESEÑAS ====================
+class ResumenResenas(models.Model):
+    """
+    Agregados de reseñas por estación, mantenidos incrementalmente
+    (ver api/calificaciones.py) para no recalcular promedios en cada request
+    """
+    
+    estacion = models.OneToOneField(
+        Estacion,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='resumen_resenas'
+    )
+    
+    total_resenas = models.IntegerField(default=0)
+    
+    # {aspecto: {'cantidad': n, 'suma': s, 'histograma': [n1, n2, n3, n4, n5]}}
+    agregados = models.JSONField(default=dict)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'resumen_resenas'
+        verbose_name = 'Resumen de Reseñas'
+        verbose_name_plural = 'Resúmenes de Reseñas'
+    
+    def __str__(self):
+        return f"{self.estacion.nombre} ({self.total_resenas} reseñas)"
 
 
 # ==================== NOTIFICACIÓN ====================
@@ -482,9 +627,36 @@ class Notificacion(models.Model):
         verbose_name = 'Notificación'
         verbose_name_plural = 'Notificaciones'
         ordering = ['-created_at']
+        indexes = [
+            # Índice parcial para reconciliar el contador de no leídas
+            models.Index(
+                fields=['usuario'],
+                condition=models.Q(leida=False),
+                name='notif_usuario_no_leidas_idx',
+            ),
+        ]
+        constraints = [
+            # A lo más un aviso de cada tipo por reserva (envío masivo idempotente)
+            models.UniqueConstraint(
+                fields=['usuario', 'tipo', 'reserva'],
+                condition=models.Q(reserva__isnull=False),
+                name='notif_usuario_tipo_reserva_uniq',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.usuario.username} - {self.tipo}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Recordar el valor cargado de 'leida' para ajustar el contador al guardar
+        Si quedó diferida no hay valor que recordar (sin ajuste, ver notificacion_guardada)
+        """
+        instancia = super().from_db(db, field_names, values)
+        if 'leida' in field_names:
+            instancia._leida_original = instancia.leida
+        return instancia
 
 
 # ==================== TICKET DE SOPORTE ====================
@@ -564,4 +736,24 @@ class TicketSoporte(models.Model):
                 created_at__date=datetime.datetime.now().date()
             ).count() + 1
             self.numero_ticket = f"TKT-{fecha}-{count:04d}"
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+# ==================== TOKEN REVOCADO ====================
+class TokenRevocado(models.Model):
+    """
+    Refresh tokens revocados (rotación), indexados por jti
+    Se purgan al pasar su expiración (ver api/revocacion.py)
+    """
+    
+    jti = models.CharField(max_length=255, unique=True)
+    expira = models.DateTimeField(db_index=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'tokens_revocados'
+        verbose_name = 'Token Revocado'
+        verbose_name_plural = 'Tokens Revocados'
+    
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,17 @@
+"""
+Clases de paginación de la API de BikeMetro
+Archivo: backend/api/pagination.py
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class ResenaCursorPagination(CursorPagination):
+    """
+    Paginación por cursor para reseñas: cada página es un rango sobre el
+    índice (estacion, created_at), sin COUNT(*) ni OFFSET creciente
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
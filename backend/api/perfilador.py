@@ -0,0 +1,264 @@
+"""
+Perfilado de requests bajo demanda
+Archivo: backend/api/perfilador.py
+
+Un request se perfila si:
+- trae el header `X-Perfilar` y lo envía un usuario staff (sesión o JWT),
+  con valor `cprofile` o `muestreo` (cualquier otro valor usa MODO), o
+- cae en la fracción PERFILADOR['MUESTREO'] de requests (0 = nunca).
+
+Modos:
+- cprofile: cProfile del hilo del request, guardado como .pstats
+- muestreo: un hilo toma la pila del hilo del request cada INTERVALO_MS y
+  la guarda como stacks colapsados (`a;b;c 12`), listos para flamegraph.pl
+  o speedscope. Con código que no suelta el GIL la resolución real es el
+  switch interval de Python (~5 ms).
+
+Ambos modos observan el hilo que atiende el request, así que solo se
+perfilan vistas sync servidas por WSGI. Las vistas async se omiten: su
+código corre en un event loop aparte y ese hilo solo espera. Bajo ASGI
+el middleware corre en el hilo del event loop, donde cProfile y el
+muestreo mezclarían los requests concurrentes, así que no se perfila.
+
+Cada perfil se guarda en PERFILADOR['DIRECTORIO'] junto a un .json con la
+vista, duración y estado; el directorio funciona como anillo de
+MAX_PERFILES (se borran los más antiguos). La respuesta lleva el id en
+`X-Perfil-Id`. Ver `manage.py perfiles`.
+
+Desactivado por defecto (PERFILADOR_ACTIVO=1 lo activa). Con
+PERFILADOR['ACTIVO'] = False el middleware se quita de la cadena
+(MiddlewareNotUsed): costo cero. Activo pero sin perfilar, el costo es una
+búsqueda en request.META.
+"""
+
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+
+from .instrumentacion import nombre_vista
+
+
+MODOS = ('cprofile', 'muestreo')
+EXTENSIONES = {'cprofile': '.pstats', 'muestreo': '.collapsed'}
+HEADER = 'HTTP_X_PERFILAR'
+
+_config = getattr(settings, 'PERFILADOR', {})
+
+
+# ============ MUESTREO DE PILAS ============
+def _nombre_marco(marco):
+    codigo = marco.f_code
+    return f"{codigo.co_name} ({marco.f_globals.get('__name__', '?')}:{codigo.co_firstlineno})"
+
+
+class MuestreadorPilas:
+    """Tomar la pila de un hilo cada `intervalo` segundos desde otro hilo"""
+
+    def __init__(self, hilo_id, intervalo):
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name='perfilador', daemon=True)
+
+    def _muestrear(self):
+        propio = threading.get_ident()
+        while not self._detener.wait(self.intervalo):
+            marco = sys._current_frames().get(self.hilo_id)
+            if marco is None or self.hilo_id == propio:
+                continue
+            pila = []
+            while marco is not None:
+                pila.append(_nombre_marco(marco))
+                marco = marco.f_back
+            self.pilas[';'.join(reversed(pila))] += 1
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+        return self.pilas
+
+
+# ============ ALMACÉN EN DISCO ============
+class AlmacenPerfiles:
+    """Directorio con a lo más `maximo` perfiles (<id>.json + <id>.pstats|.collapsed)"""
+
+    def __init__(self, directorio, maximo):
+        self.directorio = str(directorio)
+        self.maximo = maximo
+
+    def _ruta(self, perfil_id, extension):
+        return os.path.join(self.directorio, perfil_id + extension)
+
+    def guardar(self, meta, perfil):
+        os.makedirs(self.directorio, exist_ok=True)
+        perfil_id = f'{time.time_ns()}-{os.getpid()}'
+        meta = dict(meta, id=perfil_id)
+
+        if meta['modo'] == 'cprofile':
+            perfil.dump_stats(self._ruta(perfil_id, '.pstats'))
+        else:
+            with open(self._ruta(perfil_id, '.collapsed'), 'w', encoding='utf-8') as archivo:
+                for pila, muestras in perfil.most_common():
+                    archivo.write(f'{pila} {muestras}\n')
+
+        # El .json va al final: un perfil sin .json no se lista
+        with open(self._ruta(perfil_id, '.json'), 'w', encoding='utf-8') as archivo:
+            json.dump(meta, archivo, ensure_ascii=False)
+
+        self.podar()
+        return perfil_id
+
+    def listar(self):
+        """Metadatos de los perfiles, del más antiguo al más reciente"""
+        if not os.path.isdir(self.directorio):
+            return []
+        perfiles = []
+        for nombre in sorted(os.listdir(self.directorio)):
+            if not nombre.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directorio, nombre), encoding='utf-8') as archivo:
+                    meta = json.load(archivo)
+            except (OSError, ValueError):
+                continue  # Borrado por otro proceso o a medio escribir
+            meta['archivo'] = self._ruta(meta['id'], EXTENSIONES[meta['modo']])
+            perfiles.append(meta)
+        perfiles.sort(key=lambda meta: int(meta['id'].split('-')[0]))
+        return perfiles
+
+    def eliminar(self, perfil_id):
+        for extension in ('.json',) + tuple(EXTENSIONES.values()):
+            try:
+                os.remove(self._ruta(perfil_id, extension))
+            except FileNotFoundError:
+                pass
+
+    def podar(self):
+        perfiles = self.listar()
+        for meta in perfiles[:max(0, len(perfiles) - self.maximo)]:
+            self.eliminar(meta['id'])
+
+    def limpiar(self):
+        for meta in self.listar():
+            self.eliminar(meta['id'])
+
+
+almacen = AlmacenPerfiles(
+    _config.get('DIRECTORIO', os.path.join(settings.BASE_DIR, 'logs', 'perfiles')),
+    _config.get('MAX_PERFILES', 200),
+)
+
+
+# ============ MIDDLEWARE ============
+def _es_staff(request):
+    """Staff por sesión o por JWT (DRF autentica recién en la vista)"""
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return usuario.is_staff
+
+    from .authentication import CachedJWTAuthentication
+    try:
+        resultado = CachedJWTAuthentication().authenticate(request)
+    except Exception:
+        return False
+    return resultado is not None and resultado[0].is_staff
+
+
+def _vista_async(request):
+    try:
+        return iscoroutinefunction(resolve(request.path_info).func)
+    except Resolver404:
+        return False
+
+
+class PerfiladorMiddleware:
+    """Perfilar requests pedidos por staff (X-Perfilar) o muestreados"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not _config.get('ACTIVO', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.muestreo = _config.get('MUESTREO', 0.0)
+        self.modo = _config.get('MODO', 'cprofile')
+        self.intervalo = _config.get('INTERVALO_MS', 1) / 1000
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def _modo_pedido(self, request):
+        """Modo del header, o None si el request no pide perfil"""
+        valor = request.META.get(HEADER)
+        if not valor:
+            return None
+        return valor if valor in MODOS else self.modo
+
+    def _muestreado(self):
+        return self.muestreo > 0 and random.random() < self.muestreo
+
+    def __call__(self, request):
+        if self.es_async:
+            return self._llamar_async(request)
+
+        modo = self._modo_pedido(request)
+        if modo is not None and not _es_staff(request):
+            modo = None
+        if modo is None and self._muestreado():
+            modo = self.modo
+        if modo is None or _vista_async(request):
+            return self.get_response(request)
+
+        perfilador = self._iniciar(modo)
+        inicio = time.perf_counter()
+        try:
+            respuesta = self.get_response(request)
+        finally:
+            perfil = self._detener(modo, perfilador)
+        return self._guardar(request, respuesta, modo, perfil, inicio)
+
+    async def _llamar_async(self, request):
+        # Bajo ASGI no se perfila (ver docstring del módulo)
+        return await self.get_response(request)
+
+    def _iniciar(self, modo):
+        if modo == 'cprofile':
+            perfilador = cProfile.Profile()
+            perfilador.enable()
+        else:
+            perfilador = MuestreadorPilas(threading.get_ident(), self.intervalo)
+            perfilador.iniciar()
+        return perfilador
+
+    def _detener(self, modo, perfilador):
+        if modo == 'cprofile':
+            perfilador.disable()
+            return perfilador
+        return perfilador.detener()
+
+    def _guardar(self, request, respuesta, modo, perfil, inicio):
+        meta = {
+            'vista': nombre_vista(request),
+            'ruta': request.path,
+            'estado': respuesta.status_code,
+            'modo': modo,
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 3),
+            'fecha': time.time(),
+        }
+        respuesta['X-Perfil-Id'] = almacen.guardar(meta, perfil)
+        return respuesta
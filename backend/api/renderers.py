@@ -0,0 +1,55 @@
+"""
+Renderer JSON de la API
+Archivo: backend/api/renderers.py
+
+JSONRapidoRenderer produce el mismo JSON que el JSONRenderer de DRF
+(compacto, UTF-8 sin escapar, U+2028/U+2029 escapados) usando orjson si
+está instalado. Los tipos que orjson no conoce, y las fechas para mantener
+el formato de DRF, pasan por el encoder de DRF. Sin orjson, si el cliente
+pide indentación o si COMPACT_JSON/UNICODE_JSON cambian, se usa el
+JSONRenderer de siempre.
+
+Con orjson los bytes pueden diferir en:
+- floats muy chicos o grandes: 0.00001 y 1e20 en vez de 1e-05 y 1e+20
+  (mismo valor al leerlos).
+- NaN e infinitos: salen como null; JSONRenderer (STRICT_JSON) falla.
+Los enteros fuera de 64 bits, que orjson no acepta, pasan por JSONRenderer.
+"""
+
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_encoder = encoders.JSONEncoder()
+
+if orjson is not None:
+    OPCIONES = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def _por_defecto(obj):
+    return _encoder.default(obj)
+
+
+class JSONRapidoRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            contenido = orjson.dumps(data, default=_por_defecto, option=OPCIONES)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)  # Ej: enteros de más de 64 bits
+        if b'\xe2\x80\xa8' in contenido or b'\xe2\x80\xa9' in contenido:
+            contenido = contenido.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return contenido
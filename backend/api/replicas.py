@@ -0,0 +1,174 @@
+"""
+Lecturas en réplicas con lectura de las escrituras propias
+Archivo: backend/api/replicas.py
+
+EnrutadorReplicas manda las lecturas a la réplica elegida para el request
+y todas las escrituras a `default`. Solo ReplicasMiddleware elige réplica,
+y solo para métodos seguros (GET, HEAD, OPTIONS): comandos, hilos de fondo y
+requests que escriben leen siempre de `default`.
+
+Lectura de las escrituras propias: después de una mutación exitosa de un
+usuario, sus requests leen de `default` durante
+REPLICAS['VENTANA_LECTURA_PROPIA'] segundos (marca en la cache de Django;
+con varios procesos, CACHES debe ser compartida). Un JWT emitido dentro de
+la ventana también lee de `default`, así el login o registro recién hecho no
+choca con una réplica atrasada. El usuario sale del claim del token sin
+verificar la firma: un token falso solo puede forzar lecturas en `default`;
+la autenticación real la hace DRF en la vista.
+
+Sin réplicas configuradas el middleware se quita de la cadena
+(MiddlewareNotUsed) y el enrutador no interviene.
+"""
+
+import base64
+import binascii
+import itertools
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import empty
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+_config = getattr(settings, 'REPLICAS', {})
+ALIAS = list(_config.get('ALIAS', []))
+VENTANA = _config.get('VENTANA_LECTURA_PROPIA', 5)
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica = ContextVar('replica', default=None)
+
+
+# ============ ENRUTADOR ============
+class EnrutadorReplicas:
+    def db_for_read(self, model, **hints):
+        replica = _replica.get()
+        if replica is None:
+            return None
+        instancia = hints.get('instance')
+        if instancia is not None and instancia._state.db:
+            return instancia._state.db  # Relaciones de un objeto: misma base que el objeto
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return 'default' if ALIAS else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las réplicas son copias de default: los objetos se pueden relacionar
+        if obj1._state.db in ALIAS or obj2._state.db in ALIAS:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in ALIAS else None
+
+
+@contextmanager
+def lecturas_en_primaria():
+    """Leer de `default` dentro del bloque aunque el request tenga réplica"""
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+# ============ LECTURA DE LAS ESCRITURAS PROPIAS ============
+def _clave(usuario_id):
+    return f'replicas:escritura:{usuario_id}'
+
+
+def marcar_escritura(usuario_id):
+    cache.set(_clave(usuario_id), True, VENTANA)
+
+
+def _claims_jwt(request):
+    """Claims del Bearer token sin verificar la firma (None si no hay o no se entiende)"""
+    autorizacion = request.META.get('HTTP_AUTHORIZATION', '')
+    if not autorizacion.startswith('Bearer '):
+        return None
+    try:
+        carga = autorizacion[7:].split('.')[1]
+        return json.loads(base64.urlsafe_b64decode(carga + '=' * (-len(carga) % 4)))
+    except (IndexError, ValueError, binascii.Error):
+        return None
+
+
+def _usuario(request, cargar):
+    """
+    request.user si está autenticado; con cargar=False no se resuelve el
+    usuario perezoso de la sesión (consulta la BD, no se puede en async)
+    """
+    usuario = getattr(request, 'user', None)
+    if usuario is None or (not cargar and getattr(usuario, '_wrapped', None) is empty):
+        return None
+    return usuario if usuario.is_authenticated else None
+
+
+def leer_de_primaria(request, cargar_sesion=True):
+    """True si el request debe leer de `default`"""
+    if request.method not in METODOS_SEGUROS:
+        return True
+    claims = _claims_jwt(request)
+    if claims is not None:
+        if time.time() - claims.get('iat', 0) < VENTANA:
+            return True
+        usuario_id = claims.get(jwt_settings.USER_ID_CLAIM)
+    else:
+        usuario = _usuario(request, cargar_sesion)
+        usuario_id = usuario.pk if usuario is not None else None
+    return usuario_id is not None and cache.get(_clave(usuario_id)) is not None
+
+
+# ============ MIDDLEWARE ============
+_ronda = itertools.cycle(ALIAS) if ALIAS else None
+
+
+class ReplicasMiddleware:
+    """Elegir réplica para los requests de lectura y marcar las mutaciones"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not ALIAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def _elegir(self, request, cargar_sesion):
+        return None if leer_de_primaria(request, cargar_sesion) else next(_ronda)
+
+    def _despues(self, request, respuesta, cargar_sesion):
+        if request.method not in METODOS_SEGUROS and respuesta.status_code < 400:
+            # DRF deja en request.user el usuario autenticado por JWT
+            usuario = _usuario(request, cargar_sesion)
+            if usuario is not None:
+                marcar_escritura(usuario.pk)
+        return respuesta
+
+    def __call__(self, request):
+        if self.es_async:
+            return self._llamar_async(request)
+        token = _replica.set(self._elegir(request, True))
+        try:
+            respuesta = self.get_response(request)
+        finally:
+            _replica.reset(token)
+        return self._despues(request, respuesta, True)
+
+    async def _llamar_async(self, request):
+        # Sin sesión en async: las vistas async de la API usan JWT
+        token = _replica.set(self._elegir(request, False))
+        try:
+            respuesta = await self.get_response(request)
+        finally:
+            _replica.reset(token)
+        return self._despues(request, respuesta, False)
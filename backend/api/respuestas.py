@@ -0,0 +1,305 @@
+"""
+Cache de respuestas de las vistas de estaciones
+Archivo: backend/api/respuestas.py
+
+Las respuestas de EstacionViewSet son iguales para todos los usuarios
+mientras no cambien estaciones ni espacios. RespuestaCacheadaMixin guarda
+el cuerpo ya renderizado con clave vista + acción + argumentos + query
+string + header Accept (trae el formato y `indent`) + versión. La versión
+la sube disponibilidad.invalidar() (señales de Estacion y
+EspacioEstacionamiento, cargas masivas), lo que deja inalcanzables todas
+las entradas anteriores al confirmarse el cambio. Además cada entrada vence
+a los CACHE_RESPUESTAS['TTL'] segundos, pero solo como tope de seguridad:
+acota cuánto sirve un proceso lo que cambió otro si la invalidación no le
+llega. Los cambios no esperan al TTL.
+
+Backends (CACHE_RESPUESTAS['BACKEND']):
+- memoria: LRU por proceso. La versión vive en la cache de Django, así
+  que con CACHES compartida (como pide api/replicas.py) una invalidación
+  en un worker o un comando vale para todos; con la cache local por
+  proceso solo el TTL acota lo que tardan los demás.
+- archivo: un archivo por entrada en DIRECTORIO, compartido entre workers.
+  La versión vive en el mismo directorio, así una invalidación en un
+  proceso vale para todos. LRU por fecha de modificación (se toca en cada
+  acierto).
+
+Con réplicas de lectura, durante REPLICAS['VENTANA_LECTURA_PROPIA']
+segundos después de una invalidación las respuestas se reconstruyen
+leyendo de `default`: una réplica atrasada guardaría datos viejos con la
+versión nueva.
+
+Una sola reconstrucción por clave y proceso: los hilos que piden una clave
+que otro ya está construyendo esperan su resultado (single-flight).
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from . import replicas
+from .metricas import CACHE_RESPUESTAS
+
+
+# Segundos que un hilo espera la construcción de otro antes de construir él mismo
+ESPERA_CONSTRUCCION = 10
+TTL = 60
+
+# Claves en la cache de Django
+CLAVE_VERSION = 'respuestas:version'
+CLAVE_INVALIDADA = 'respuestas:invalidada'
+
+
+# ============ BACKENDS ============
+class MemoriaLRU:
+    """
+    Entradas en memoria del proceso; la versión, en la cache de Django
+    La versión es un timestamp en ns y no un contador: si la cache la
+    descarta, la nueva nunca coincide con la de entradas anteriores
+    """
+
+    def __init__(self, maximo=256, ttl=TTL):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # clave -> (expira, valor)
+
+    def version(self):
+        version = cache.get(CLAVE_VERSION)
+        if version is None:
+            cache.add(CLAVE_VERSION, time.time_ns(), None)
+            version = cache.get(CLAVE_VERSION)
+        return version
+
+    def invalidar(self):
+        cache.set(CLAVE_VERSION, time.time_ns(), None)
+        with self._lock:
+            self._entradas.clear()
+
+    def leer(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            if entrada[0] <= time.monotonic():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada[1]
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + self.ttl, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+class ArchivoLRU:
+    """Entradas `<sha1>.resp`: una línea JSON con estado, headers y vencimiento, y el cuerpo"""
+
+    VERSION = 'version'
+
+    def __init__(self, directorio, maximo=256, ttl=TTL):
+        self.directorio = str(directorio)
+        self.maximo = maximo
+        self.ttl = ttl
+        os.makedirs(self.directorio, exist_ok=True)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, hashlib.sha1(clave.encode()).hexdigest() + '.resp')
+
+    def _entradas(self):
+        return [
+            entrada for entrada in os.scandir(self.directorio)
+            if entrada.name.endswith('.resp')
+        ]
+
+    def _escribir(self, ruta, contenido):
+        temporal = f'{ruta}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporal, 'wb') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+
+    def version(self):
+        try:
+            with open(os.path.join(self.directorio, self.VERSION), 'rb') as archivo:
+                return int(archivo.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def invalidar(self):
+        with open(os.path.join(self.directorio, '.lock'), 'w') as candado:
+            fcntl.flock(candado, fcntl.LOCK_EX)
+            version = self.version() + 1
+            self._escribir(os.path.join(self.directorio, self.VERSION), str(version).encode())
+        for entrada in self._entradas():
+            try:
+                os.remove(entrada.path)
+            except FileNotFoundError:
+                pass
+
+    def leer(self, clave):
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'rb') as archivo:
+                cabecera, cuerpo = archivo.read().split(b'\n', 1)
+            valor = json.loads(cabecera)
+            if valor.pop('expira', 0) <= time.time():
+                return None
+            os.utime(ruta)
+        except (OSError, ValueError):
+            return None
+        valor['contenido'] = cuerpo
+        return valor
+
+    def guardar(self, clave, valor):
+        cabecera = {'estado': valor['estado'], 'headers': valor['headers'], 'expira': time.time() + self.ttl}
+        self._escribir(self._ruta(clave), json.dumps(cabecera).encode() + b'\n' + valor['contenido'])
+        entradas = self._entradas()
+        if len(entradas) > self.maximo:
+            entradas.sort(key=lambda entrada: entrada.stat().st_mtime_ns)
+            for entrada in entradas[:len(entradas) - self.maximo]:
+                try:
+                    os.remove(entrada.path)
+                except FileNotFoundError:
+                    pass
+
+    def __len__(self):
+        return len(self._entradas())
+
+
+# ============ CACHE ============
+class CacheRespuestas:
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._en_curso = {}  # clave -> threading.Event
+
+    @property
+    def activa(self):
+        return self.backend is not None
+
+    def invalidar(self):
+        if self.backend is not None:
+            self.backend.invalidar()
+            if replicas.ALIAS:
+                cache.set(CLAVE_INVALIDADA, True, replicas.VENTANA)
+
+    def reconstruir_en_primaria(self):
+        """Si se invalidó hace poco: las réplicas pueden no tener el cambio"""
+        return bool(replicas.ALIAS) and cache.get(CLAVE_INVALIDADA) is not None
+
+    def obtener(self, clave, construir):
+        """
+        Valor guardado para `clave`, o el de construir() (que retorna None
+        si el resultado no se debe guardar, ej: un error)
+        """
+        clave = f'{self.backend.version()}:{clave}'
+        valor = self.backend.leer(clave)
+        if valor is not None:
+            CACHE_RESPUESTAS.incrementar('acierto')
+            return valor
+
+        with self._lock:
+            evento = self._en_curso.get(clave)
+            propia = evento is None
+            if propia:
+                evento = self._en_curso[clave] = threading.Event()
+
+        if not propia:
+            evento.wait(ESPERA_CONSTRUCCION)
+            valor = self.backend.leer(clave)
+            if valor is not None:
+                CACHE_RESPUESTAS.incrementar('espera')
+                return valor
+            # Quien construía falló o no guardó: construir sin coordinar
+            CACHE_RESPUESTAS.incrementar('fallo')
+            return construir()
+
+        CACHE_RESPUESTAS.incrementar('fallo')
+        try:
+            valor = construir()
+            if valor is not None:
+                self.backend.guardar(clave, valor)
+            return valor
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+            evento.set()
+
+
+def _crear_cache():
+    config = getattr(settings, 'CACHE_RESPUESTAS', {})
+    tipo = config.get('BACKEND', 'memoria')
+    ttl = config.get('TTL', TTL)
+    if tipo == 'memoria':
+        return CacheRespuestas(MemoriaLRU(config.get('MAXIMO', 256), ttl))
+    if tipo == 'archivo':
+        return CacheRespuestas(ArchivoLRU(config['DIRECTORIO'], config.get('MAXIMO', 256), ttl))
+    return CacheRespuestas(None)
+
+
+cache_respuestas = _crear_cache()
+
+
+# ============ VISTAS ============
+class RespuestaCacheadaMixin:
+    """
+    Cachear las respuestas GET 200 de un ViewSet que no dependen del usuario
+    No aplica a la API navegable (su HTML incluye al usuario y el formulario)
+    """
+
+    def _clave_respuesta(self, request, accion, kwargs):
+        argumentos = ','.join(f'{nombre}={valor}' for nombre, valor in sorted(kwargs.items()))
+        # Accept elige renderer e indentación (application/json; indent=4)
+        return (
+            f'{self.basename}:{accion}:{argumentos}?{request.META.get("QUERY_STRING", "")}'
+            f'|{request.META.get("HTTP_ACCEPT", "")}'
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        accion = self.action_map.get('get') if request.method == 'GET' else None
+        if (
+            accion is None
+            or not cache_respuestas.activa
+            or 'text/html' in request.META.get('HTTP_ACCEPT', '')
+        ):
+            return super().dispatch(request, *args, **kwargs)
+
+        construida = None
+
+        def construir():
+            nonlocal construida
+            primaria = cache_respuestas.reconstruir_en_primaria()
+            with replicas.lecturas_en_primaria() if primaria else nullcontext():
+                construida = super(RespuestaCacheadaMixin, self).dispatch(request, *args, **kwargs)
+            if construida.status_code != 200:
+                return None
+            if hasattr(construida, 'render'):
+                construida.render()
+            return {
+                'estado': construida.status_code,
+                'headers': dict(construida.items()),
+                'contenido': construida.content,
+            }
+
+        valor = cache_respuestas.obtener(self._clave_respuesta(request, accion, kwargs), construir)
+        if construida is not None:
+            return construida
+
+        respuesta = HttpResponse(valor['contenido'], status=valor['estado'])
+        for nombre, contenido in valor['headers'].items():
+            respuesta[nombre] = contenido
+        return respuesta
@@ -0,0 +1,161 @@
+"""
+Revocación de refresh tokens
+Archivo: backend/api/revocacion.py
+
+Los jti revocados se guardan en la tabla tokens_revocados (única por jti)
+y, por proceso, en un filtro de Bloom en memoria:
+
+- Si el filtro dice "no está", el token no fue revocado en este proceso
+  y no se consulta la BD (caso normal de un refresh).
+- Si dice "puede estar", se confirma con la BD por jti (falsos positivos).
+
+La revocación al rotar es un INSERT: si el jti ya existe (revocado por otro
+proceso cuyo filtro no vemos) la restricción UNIQUE lo detecta en la misma
+escritura, de modo que un token nunca se rota dos veces.
+
+Las filas con expiración vencida se purgan solas, a lo más una vez por
+REVOCACION_TOKENS['PURGA_INTERVALO'] segundos (o con purgar_tokens_revocados).
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import TokenRevocado
+
+
+class FiltroBloom:
+    """Filtro de Bloom sobre un bytearray (doble hashing con blake2b)"""
+
+    def __init__(self, capacidad, error=0.01):
+        self.capacidad = max(1, capacidad)
+        self.bits = max(8, math.ceil(-self.capacidad * math.log(error) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacidad * math.log(2)))
+        self.cantidad = 0
+        self._datos = bytearray((self.bits + 7) // 8)
+
+    def _posiciones(self, valor):
+        digest = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def agregar(self, valor):
+        for posicion in self._posiciones(valor):
+            self._datos[posicion >> 3] |= 1 << (posicion & 7)
+        self.cantidad += 1
+
+    def __contains__(self, valor):
+        return all(
+            self._datos[posicion >> 3] & (1 << (posicion & 7))
+            for posicion in self._posiciones(valor)
+        )
+
+
+class ListaRevocacion:
+    """Filtro de Bloom por proceso + tabla TokenRevocado como fuente de verdad"""
+
+    def __init__(self, capacidad=100_000, error=0.01, intervalo_purga=3600):
+        self.capacidad = capacidad
+        self.error = error
+        self.intervalo_purga = intervalo_purga
+        self._lock = threading.Lock()
+        self._filtro = None
+        self._proxima_purga = 0.0
+
+    def _cargar_filtro(self):
+        """Construir el filtro con los jti vigentes (una consulta, al primer uso)"""
+        jtis = list(
+            TokenRevocado.objects.filter(expira__gt=timezone.now()).values_list('jti', flat=True)
+        )
+        filtro = FiltroBloom(max(self.capacidad, 2 * len(jtis)), self.error)
+        for jti in jtis:
+            filtro.agregar(jti)
+        return filtro
+
+    def _obtener_filtro(self):
+        with self._lock:
+            if self._filtro is None:
+                self._filtro = self._cargar_filtro()
+            return self._filtro
+
+    def esta_revocado(self, jti):
+        if jti not in self._obtener_filtro():
+            return False
+        return TokenRevocado.objects.filter(jti=jti).exists()
+
+    def revocar(self, jti, expira):
+        """Retorna False si el jti ya estaba revocado"""
+        filtro = self._obtener_filtro()
+        try:
+            with transaction.atomic():
+                TokenRevocado.objects.create(jti=jti, expira=expira)
+            revocado = True
+        except IntegrityError:
+            revocado = False
+
+        with self._lock:
+            filtro.agregar(jti)
+            if filtro.cantidad > filtro.capacidad:
+                # Sobre la capacidad crece la tasa de falsos positivos: reconstruir
+                self._filtro = None
+
+        self._purgar_si_corresponde()
+        return revocado
+
+    def _purgar_si_corresponde(self):
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora < self._proxima_purga:
+                return
+            self._proxima_purga = ahora + self.intervalo_purga
+        self.purgar()
+
+    def purgar(self):
+        """Eliminar los tokens ya expirados; retorna la cantidad eliminada"""
+        eliminados, _ = TokenRevocado.objects.filter(expira__lte=timezone.now()).delete()
+        if eliminados:
+            with self._lock:
+                self._filtro = None
+        return eliminados
+
+    def limpiar(self):
+        """Descartar el filtro en memoria (se recarga desde la BD al usarse)"""
+        with self._lock:
+            self._filtro = None
+            self._proxima_purga = 0.0
+
+
+_config = getattr(settings, 'REVOCACION_TOKENS', {})
+lista_revocacion = ListaRevocacion(
+    capacidad=_config.get('CAPACIDAD', 100_000),
+    error=_config.get('ERROR', 0.01),
+    intervalo_purga=_config.get('PURGA_INTERVALO', 3600),
+)
+
+
+class RefreshTokenRevocable(RefreshToken):
+    """RefreshToken que se verifica contra lista_revocacion"""
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if lista_revocacion.esta_revocado(self.payload[jwt_settings.JTI_CLAIM]):
+            raise TokenError('Token revocado')
+
+    def blacklist(self):
+        """Revocar este token; falla si ya estaba revocado (token reutilizado)"""
+        revocado = lista_revocacion.revocar(
+            self.payload[jwt_settings.JTI_CLAIM],
+            datetime_from_epoch(self.payload['exp']),
+        )
+        if not revocado:
+            raise TokenError('Token revocado')
@@ -0,0 +1,77 @@
+"""
+Utilidades para RUT chileno
+Archivo: backend/api/rut.py
+
+Formato canónico (el almacenado en Usuario.rut): cuerpo sin puntos ni ceros
+a la izquierda, guión y dígito verificador con 'K' mayúscula (12345678-5).
+Usuario.rut_numero guarda el cuerpo como entero para búsquedas por índice.
+"""
+
+import re
+
+
+# Acepta 12.345.678-9, 12345678-9, 12345678-k y sin guión (123456789)
+_RUT_RE = re.compile(r'^(\d{1,3}(?:\.?\d{3}){1,2})-?([\dkK])$')
+
+
+def parsear_rut(valor):
+    """
+    Separar un RUT en (cuerpo entero, dígito verificador en mayúscula)
+    Solo revisa el formato; retorna None si el valor no tiene forma de RUT
+    """
+    if not valor:
+        return None
+    coincidencia = _RUT_RE.match(valor.strip())
+    if coincidencia is None:
+        return None
+    return int(coincidencia.group(1).replace('.', '')), coincidencia.group(2).upper()
+
+
+def calcular_dv(cuerpo):
+    """Dígito verificador (módulo 11) del cuerpo numérico de un RUT"""
+    cuerpo = int(cuerpo)
+    suma, factor = 0, 2
+    while cuerpo:
+        cuerpo, digito = divmod(cuerpo, 10)
+        suma += digito * factor
+        factor = 2 if factor == 7 else factor + 1
+    resto = 11 - suma % 11
+    return '0' if resto == 11 else 'K' if resto == 10 else str(resto)
+
+
+def formatear_rut(cuerpo, dv=None):
+    """Formato canónico a partir del cuerpo (calcula el DV si no se entrega)"""
+    return f"{int(cuerpo)}-{dv or calcular_dv(cuerpo)}"
+
+
+def normalizar_rut(valor):
+    """
+    Llevar un RUT al formato almacenado: sin puntos, con guión y 'K' mayúscula
+    Retorna None si el valor no tiene forma de RUT
+    """
+    partes = parsear_rut(valor)
+    if partes is None:
+        return None
+    return formatear_rut(*partes)
+
+
+def validar_rut(valor):
+    """
+    Retorna (cuerpo, dv) si el RUT tiene forma válida y su dígito
+    verificador es correcto; None en otro caso
+    """
+    partes = parsear_rut(valor)
+    if partes is None or calcular_dv(partes[0]) != partes[1]:
+        return None
+    return partes
+
+
+def rut_valido(valor):
+    """True si el valor tiene forma de RUT y su dígito verificador es correcto"""
+    return validar_rut(valor) is not None
+
+
+def numero_rut(valor):
+    """Cuerpo entero del RUT (sin revisar el DV); None si no tiene forma de RUT"""
+    partes = parsear_rut(valor)
+    return partes[0] if partes else None
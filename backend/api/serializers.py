@@ -4,23 +4,58 @@ Archivo: backend/api/serializers.py
 """
 
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
 from .models import (
     Estacion, EspacioEstacionamiento, Reserva, 
     Pago, Resena, Notificacion, TicketSoporte
 )
-import re
+from .authentication import buscar_usuario_por_login, obtener_usuario
+from .revocacion import RefreshTokenRevocable
+from .rut import normalizar_rut, numero_rut, rut_valido
+from .calificaciones import formatear_resumen
+from .campos import CamposDinamicosMixin
+from .instrumentacion import MedicionSerializacionMixin
 
 Usuario = get_user_model()
 
 
+# ============ CAMPOS ============
+class EtiquetaOpcionField(serializers.ReadOnlyField):
+    """
+    Etiqueta de un campo con choices, como get_<campo>_display()
+    El mapa valor -> etiqueta se arma al enlazar el campo al serializer (una
+    vez por serializer, también con many=True), no en cada fila
+    (get_FOO_display reconstruye el dict de choices por llamada)
+    """
+
+    def __init__(self, campo, **kwargs):
+        super().__init__(source=campo, **kwargs)
+        self.campo = campo
+        self.etiquetas = None
+
+    def bind(self, field_name, parent):
+        super().bind(field_name, parent)
+        try:
+            opciones = parent.Meta.model._meta.get_field(self.campo).flatchoices
+        except FieldDoesNotExist:
+            opciones = []
+        self.etiquetas = {valor: str(etiqueta) for valor, etiqueta in opciones}
+
+    def to_representation(self, value):
+        return self.etiquetas.get(value, value)
+
+
 # ============ VALIDADORES PERSONALIZADOS ============
-def validar_rut(value):
-    """Validar formato de RUT chileno"""
-    if not re.match(r'^\d{7,8}-[\dkK]$', value):
+def validador_rut(value):
+    """Validar RUT chileno: formato y dígito verificador (módulo 11)"""
+    if not rut_valido(value):
         raise serializers.ValidationError(
-            'Formato de RUT inválido. Debe ser: 12345678-9'
+            'RUT inválido. Revisa el dígito verificador (ej: 12345678-5)'
         )
     return value
 
@@ -58,10 +93,14 @@ class UsuarioRegistroSerializer(serializers.ModelSerializer):
         ]
         extra_kwargs = {
             'email': {'required': True},
-            'rut': {'required': True, 'validators': [validar_rut]},
+            'rut': {'required': True, 'validators': [validador_rut]},
             'telefono': {'required': True},
         }
     
+    def validate_rut(self, value):
+        """Guardar el RUT en formato canónico"""
+        return normalizar_rut(value)
+    
     def validate(self, data):
         """Validaciones personalizadas"""
         # Validar que las contraseñas coincidan
@@ -70,8 +109,8 @@ class UsuarioRegistroSerializer(serializers.ModelSerializer):
                 'password_confirm': 'Las contraseñas no coinciden'
             })
         
-        # Validar unicidad de RUT
-        if Usuario.objects.filter(rut=data['rut']).exists():
+        # Validar unicidad de RUT (por cuerpo, sin importar el formato)
+        if Usuario.objects.filter(rut_numero=numero_rut(data['rut'])).exists():
             raise serializers.ValidationError({
                 'rut': 'Este RUT ya está registrado'
             })
@@ -79,23 +118,41 @@ class UsuarioRegistroSerializer(serializers.ModelSerializer):
         return data
     
     def create(self, validated_data):
-        """Crear usuario con contraseña hasheada"""
+        """
+        Crear usuario con contraseña hasheada
+        Acepta password_hash (calculado fuera del request, ver api/hashing.py)
+        """
         # Remover password_confirm
         validated_data.pop('password_confirm', None)
+        password_hash = validated_data.pop('password_hash', None)
         
-        # Crear usuario
-        user = Usuario.objects.create_user(**validated_data)
+        if password_hash is None:
+            return Usuario.objects.create_user(**validated_data)
+        
+        # Mismo resultado que create_user, sin volver a hashear
+        validated_data.pop('password')
+        validated_data['email'] = Usuario.objects.normalize_email(validated_data.get('email'))
+        validated_data['username'] = Usuario.normalize_username(validated_data['username'])
+        user = Usuario(**validated_data)
+        user.password = password_hash
+        user.save()
         return user
 
 
-class UsuarioLoginSerializer(serializers.Serializer):
-    """Serializer para login (múltiples opciones)"""
+class BusquedaLoginSerializer(serializers.Serializer):
+    """
+    Resolver el usuario de un login (email, RUT o nickname) SIN verificar
+    la contraseña: quien lo use debe verificarla (ver async_views.login,
+    que la verifica en el pool de api/hashing.py)
+    """
     
     # El usuario puede ingresar con email, rut o nickname
     login = serializers.CharField(
-        required=True,
+        required=False,
         help_text='Email, RUT o Nickname'
     )
+    # Alias de 'login' usado por la app móvil
+    username = serializers.CharField(required=False, write_only=True)
     password = serializers.CharField(
         required=True,
         write_only=True,
@@ -103,50 +160,77 @@ class UsuarioLoginSerializer(serializers.Serializer):
     )
     
     def validate(self, data):
-        """Validar credenciales y encontrar usuario"""
-        login = data.get('login')
-        password = data.get('password')
+        """Encontrar al usuario (una sola consulta por email, RUT normalizado o username)"""
+        login = data.get('login') or data.get('username')
         
-        # Intentar encontrar usuario por email, rut o username
-        user = None
-        
-        # Verificar si es email
-        if '@' in login:
-            try:
-                user = Usuario.objects.get(email=login)
-            except Usuario.DoesNotExist:
-                pass
+        if not login:
+            raise serializers.ValidationError({
+                'login': 'Ingresa tu email, RUT o nickname'
+            })
         
-        # Verificar si es RUT
-        elif '-' in login:
-            try:
-                user = Usuario.objects.get(rut=login)
-            except Usuario.DoesNotExist:
-                pass
+        user = buscar_usuario_por_login(login)
+        if user is None:
+            raise serializers.ValidationError('Credenciales inválidas', code='credenciales')
         
-        # Asumir que es username (nickname)
-        else:
-            try:
-                user = Usuario.objects.get(username=login)
-            except Usuario.DoesNotExist:
-                pass
+        data['login'] = login
+        data['user'] = user
+        return data
+
+
+class UsuarioLoginSerializer(BusquedaLoginSerializer):
+    """Serializer para login (múltiples opciones): usuario y contraseña"""
+    
+    def validate(self, data):
+        """Validar credenciales y encontrar usuario"""
+        data = super().validate(data)
+        user = data['user']
         
-        # Validar usuario y contraseña
-        if user is None or not user.check_password(password):
-            raise serializers.ValidationError(
-                'Credenciales inválidas'
-            )
+        if not user.check_password(data['password']):
+            raise serializers.ValidationError('Credenciales inválidas', code='credenciales')
         
         if not user.is_active:
-            raise serializers.ValidationError(
-                'Cuenta desactivada'
-            )
+            raise serializers.ValidationError('Cuenta desactivada')
         
-        data['user'] = user
         return data
 
 
-class UsuarioPerfilSerializer(serializers.ModelSerializer):
+class TokenRefreshRevocableSerializer(TokenRefreshSerializer):
+    """
+    Refresh con rotación y revocación del token anterior (api/revocacion.py)
+    Sin lecturas extra de BD para tokens vigentes: la revocación se verifica
+    en el filtro de Bloom y el usuario sale de cache_usuarios
+    """
+    
+    token_class = RefreshTokenRevocable
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        
+        user_id = refresh.payload.get(jwt_settings.USER_ID_CLAIM)
+        if user_id:
+            user = obtener_usuario(user_id)
+            if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(
+                    self.error_messages['no_active_account'],
+                    'no_active_account',
+                )
+        
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                # Falla si el token ya fue rotado (reutilización)
+                refresh.blacklist()
+            
+            data = {'access': str(refresh.access_token)}
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+            return data
+        
+        return {'access': str(refresh.access_token)}
+
+
+class UsuarioPerfilSerializer(MedicionSerializacionMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para perfil de usuario (datos personales)"""
     
     nickname = serializers.CharField(source='username', read_only=True)
@@ -186,11 +270,11 @@ class UsuarioSerializer(serializers.ModelSerializer):
 
 
 # ============ ESPACIO SERIALIZERS ============
-class EspacioEstacionamientoSerializer(serializers.ModelSerializer):
+class EspacioEstacionamientoSerializer(MedicionSerializacionMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para espacios de estacionamiento"""
     
     codigo = serializers.ReadOnlyField()
-    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    estado_display = EtiquetaOpcionField('estado')
     
     class Meta:
         model = EspacioEstacionamiento
@@ -202,16 +286,29 @@ class EspacioEstacionamientoSerializer(serializers.ModelSerializer):
             'estado',
             'estado_display',
         ]
+        dependencias = {'codigo': ['fila', 'columna']}
         read_only_fields = ['id', 'codigo']
 
 
 # ============ ESTACIÓN SERIALIZERS ============
-class EstacionListSerializer(serializers.ModelSerializer):
+def _resumen_resenas(estacion):
+    """Resumen precalculado (cargar con select_related('resumen_resenas'))"""
+    try:
+        return estacion.resumen_resenas
+    except ObjectDoesNotExist:
+        return None
+
+
+class EstacionListSerializer(MedicionSerializacionMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para lista de estaciones"""
     
+    # Coordenadas como número (el DecimalField del modelo saldría como texto)
+    latitud = serializers.FloatField(read_only=True)
+    longitud = serializers.FloatField(read_only=True)
     espacios_disponibles = serializers.ReadOnlyField()
-    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
-    linea_display = serializers.CharField(source='get_linea_display', read_only=True)
+    estado_display = EtiquetaOpcionField('estado')
+    linea_display = EtiquetaOpcionField('linea')
+    calificaciones = serializers.SerializerMethodField()
     
     class Meta:
         model = Estacion
@@ -226,18 +323,32 @@ class EstacionListSerializer(serializers.ModelSerializer):
             'estado_display',
             'espacios_totales',
             'espacios_disponibles',
+            'calificaciones',
         ]
+        # Columnas de los campos calculados (api/campos.py)
+        dependencias = {
+            'espacios_disponibles': ['espacios_totales'],
+            'calificaciones': ['resumen_resenas__total_resenas', 'resumen_resenas__agregados'],
+        }
+    
+    def get_calificaciones(self, obj):
+        """Total de reseñas y promedio general"""
+        return formatear_resumen(_resumen_resenas(obj))
 
-class EstacionDetailSerializer(serializers.ModelSerializer):
+class EstacionDetailSerializer(MedicionSerializacionMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer detallado de estación con sus espacios"""
     
+    # Coordenadas como número, igual que en el listado
+    latitud = serializers.FloatField(read_only=True)
+    longitud = serializers.FloatField(read_only=True)
     espacios_disponibles = serializers.ReadOnlyField()
     espacios = EspacioEstacionamientoSerializer(many=True, read_only=True)
-    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
-    linea_display = serializers.CharField(source='get_linea_display', read_only=True)
+    estado_display = EtiquetaOpcionField('estado')
+    linea_display = EtiquetaOpcionField('linea')
     
     # Agrupar espacios por estado para facilitar visualización
     espacios_por_estado = serializers.SerializerMethodField()
+    calificaciones = serializers.SerializerMethodField()
     
     class Meta:
         model = Estacion
@@ -246,15 +357,23 @@ class EstacionDetailSerializer(serializers.ModelSerializer):
             'nombre',
             'linea',
             'linea_display',
+            'latitud',
+            'longitud',
             'estado',
             'estado_display',
             'espacios_totales',
             'espacios_disponibles',
             'espacios',
             'espacios_por_estado',
+            'calificaciones',
             'created_at',
             'updated_at',
         ]
+        dependencias = {
+            'espacios_disponibles': ['espacios_totales'],
+            'espacios_por_estado': ['espacios'],
+            'calificaciones': ['resumen_resenas__total_resenas', 'resumen_resenas__agregados'],
+        }
     
     def get_espacios_por_estado(self, obj):
         """Contar espacios agrupados por estado"""
@@ -262,6 +381,10 @@ class EstacionDetailSerializer(serializers.ModelSerializer):
         return obj.espacios.values('estado').annotate(
             cantidad=Count('id')
         )
+    
+    def get_calificaciones(self, obj):
+        """Promedios, cantidades e histograma por aspecto"""
+        return formatear_resumen(_resumen_resenas(obj), detallado=True)
 
 
 # ============ RESERVA SERIALIZERS ============
@@ -318,12 +441,12 @@ class ReservaCreateSerializer(serializers.ModelSerializer):
         
         return reserva
 
-class ReservaSerializer(serializers.ModelSerializer):
+class ReservaSerializer(MedicionSerializacionMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer completo de reserva"""
     
     estacion_nombre = serializers.CharField(source='estacion.nombre', read_only=True)
     espacio_codigo = serializers.CharField(source='espacio.codigo', read_only=True)
-    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    estado_display = EtiquetaOpcionField('estado')
     
     class Meta:
         model = Reserva
@@ -341,14 +464,15 @@ class ReservaSerializer(serializers.ModelSerializer):
             'costo_total', 'created_at', 'updated_at',
             'estacion_nombre', 'espacio_codigo', 'estado_display'
         ]
+        dependencias = {'espacio_codigo': ['espacio__fila', 'espacio__columna']}
 
 
-class ReservaListSerializer(serializers.ModelSerializer):
+class ReservaListSerializer(MedicionSerializacionMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer resumido para lista de reservas"""
     
     estacion_nombre = serializers.CharField(source='estacion.nombre', read_only=True)
     espacio_codigo = serializers.CharField(source='espacio.codigo', read_only=True)
-    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    estado_display = EtiquetaOpcionField('estado')
     
     class Meta:
         model = Reserva
@@ -359,20 +483,15 @@ class ReservaListSerializer(serializers.ModelSerializer):
             'fecha_reserva', 'fecha_expiracion_reserva',
             'costo_total', 'pagado'
         ]
+        dependencias = {'espacio_codigo': ['espacio__fila', 'espacio__columna']}
 
 
 # ============ PAGO SERIALIZERS ============
-class PagoSerializer(serializers.ModelSerializer):
+class PagoSerializer(MedicionSerializacionMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para pagos"""
     
-    metodo_pago_display = serializers.CharField(
-        source='get_metodo_pago_display',
-        read_only=True
-    )
-    estado_display = serializers.CharField(
-        source='get_estado_display',
-        read_only=True
-    )
+    metodo_pago_display = EtiquetaOpcionField('metodo_pago')
+    estado_display = EtiquetaOpcionField('estado')
     
     class Meta:
         model = Pago
@@ -395,7 +514,7 @@ class PagoSerializer(serializers.ModelSerializer):
 
 
 # ============ RESEÑA SERIALIZERS ============
-class ResenaSerializer(serializers.ModelSerializer):
+class ResenaSerializer(MedicionSerializacionMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para reseñas"""
     
     usuario = UsuarioSerializer(read_only=True)
@@ -428,13 +547,10 @@ class ResenaSerializer(serializers.ModelSerializer):
 
 
 # ============ NOTIFICACIÓN SERIALIZERS ============
-class NotificacionSerializer(serializers.ModelSerializer):
+class NotificacionSerializer(MedicionSerializacionMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para notificaciones"""
     
-    tipo_display = serializers.CharField(
-        source='get_tipo_display',
-        read_only=True
-    )
+    tipo_display = EtiquetaOpcionField('tipo')
     
     class Meta:
         model = Notificacion
@@ -458,13 +574,13 @@ class NotificacionSerializer(serializers.ModelSerializer):
 
 
 # ============ TICKET SOPORTE SERIALIZERS ============
-class TicketSoporteSerializer(serializers.ModelSerializer):
+class TicketSoporteSerializer(MedicionSerializacionMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para tickets de soporte"""
     
     usuario = UsuarioSerializer(read_only=True)
-    tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
-    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
-    prioridad_display = serializers.CharField(source='get_prioridad_display', read_only=True)
+    tipo_display = EtiquetaOpcionField('tipo')
+    estado_display = EtiquetaOpcionField('estado')
+    prioridad_display = EtiquetaOpcionField('prioridad')
     
     class Meta:
         model = TicketSoporte
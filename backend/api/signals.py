@@ -0,0 +1,117 @@
+"""
+Señales de la API de BikeMetro
+Archivo: backend/api/signals.py
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import disponibilidad
+from .authentication import cache_usuarios
+from .calificaciones import aplicar_delta
+from .metricas import TRANSICIONES
+from .models import (
+    Usuario, Notificacion, Resena, Reserva, Estacion, EspacioEstacionamiento, ResumenResenas
+)
+from .notificaciones import sumar_no_leidas
+from .tiempo_real import canal_notificaciones
+
+
+# ============ USUARIO ============
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def usuario_modificado(sender, instance, **kwargs):
+    """
+    Invalidar el usuario en la cache de autenticación JWT
+    Se repite al confirmar la transacción para descartar lecturas intermedias
+    """
+    usuario_id = instance.pk
+    cache_usuarios.invalidar(usuario_id)
+    transaction.on_commit(lambda: cache_usuarios.invalidar(usuario_id))
+
+
+# ============ NOTIFICACIÓN ============
+@receiver(post_save, sender=Notificacion)
+def notificacion_guardada(sender, instance, created, raw=False, **kwargs):
+    """Mantener el contador de no leídas al crear o editar (ej: desde el admin)"""
+    if raw:
+        return
+    
+    if created:
+        delta = 0 if instance.leida else 1
+        usuario_id = instance.usuario_id
+        transaction.on_commit(lambda: canal_notificaciones.publicar([usuario_id]))
+    else:
+        original = getattr(instance, '_leida_original', None)
+        if original is None or original == instance.leida:
+            delta = 0
+        else:
+            delta = -1 if instance.leida else 1
+    
+    instance._leida_original = instance.leida
+    if delta:
+        sumar_no_leidas({instance.usuario_id: delta})
+
+
+@receiver(post_delete, sender=Notificacion)
+def notificacion_eliminada(sender, instance, **kwargs):
+    """Descontar notificaciones no leídas eliminadas (también en cascada)"""
+    if not instance.leida:
+        sumar_no_leidas({instance.usuario_id: -1})
+
+
+# ============ RESEÑA ============
+def _valores_resena(instance):
+    return {aspecto: getattr(instance, aspecto) for aspecto in Resena.ASPECTOS}
+
+
+@receiver(post_save, sender=Resena)
+def resena_guardada(sender, instance, created, raw=False, **kwargs):
+    """Actualizar el resumen de calificaciones de la estación"""
+    if raw:
+        return
+    
+    originales = getattr(instance, '_valores_originales', None)
+    if not created and originales is not None:
+        aplicar_delta(originales['estacion_id'], originales, -1)
+    if created or originales is not None:
+        aplicar_delta(instance.estacion_id, _valores_resena(instance), 1)
+    
+    instance._valores_originales = dict(_valores_resena(instance), estacion_id=instance.estacion_id)
+
+
+@receiver(post_delete, sender=Resena)
+def resena_eliminada(sender, instance, **kwargs):
+    """Descontar la reseña del resumen de su estación"""
+    aplicar_delta(instance.estacion_id, _valores_resena(instance), -1)
+
+
+# ============ RESERVA ============
+@receiver(post_save, sender=Reserva)
+def reserva_guardada(sender, instance, created, raw=False, **kwargs):
+    """Contar la transición de estado en /metrics al confirmar la transacción"""
+    if raw:
+        return
+    
+    estado = instance.estado
+    if created or getattr(instance, '_estado_original', estado) != estado:
+        transaction.on_commit(lambda: TRANSICIONES.incrementar(estado))
+    instance._estado_original = estado
+
+
+# ============ DISPONIBILIDAD ============
+@receiver(post_save, sender=Estacion)
+@receiver(post_delete, sender=Estacion)
+@receiver(post_save, sender=EspacioEstacionamiento)
+@receiver(post_delete, sender=EspacioEstacionamiento)
+@receiver(post_save, sender=ResumenResenas)
+def disponibilidad_modificada(sender, instance, **kwargs):
+    """
+    Invalidar el listado de estaciones y los espacios de la estación, una
+    vez por transacción al confirmarla (sin post_delete de ResumenResenas:
+    quitaría el borrado rápido de recalcular_resumenes, que invalida por su
+    cuenta)
+    """
+    estacion_id = instance.pk if sender is Estacion else instance.estacion_id
+    disponibilidad.invalidar_al_confirmar(estacion_id)
@@ -1,3 +1,1411 @@
-from django.test import TestCase
+"""
+Tests de la API de BikeMetro
+Archivo: backend/api/tests.py
+"""
 
-# Create your tests here.
+import asyncio
+import base64
+import io
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Value
+from django.contrib.auth.hashers import make_password
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bikemetro_backend.sqlite.base import DatabaseWrapper as SqliteDatabaseWrapper
+
+from . import hashing, metricas, perfilador, renderers, replicas
+from .instrumentacion import registro as registro_instrumentacion
+from .disponibilidad import ESTACIONES, CacheDisponibilidad, cache_disponibilidad, clave_espacios
+from .tiempo_real import canal_notificaciones
+from .renderers import JSONRapidoRenderer
+from .respuestas import ArchivoLRU, CacheRespuestas, MemoriaLRU, cache_respuestas
+from .benchmarks.endpoints import rutas_sin_caso
+from .bitacora import FiltroMuestreo, ManejadorCola
+from .authentication import CacheUsuarios, cache_usuarios
+from .calificaciones import formatear_resumen, recalcular_resumenes
+from .importacion import importar_usuarios, leer_csv
+from .management.commands.replicar_sqlite import Command as ReplicarSqlite
+from .models import (
+    Usuario, Estacion, EspacioEstacionamiento, Reserva, Pago, Notificacion, TicketSoporte,
+    Resena, ResumenResenas, TokenRevocado,
+)
+from .revocacion import ListaRevocacion, RefreshTokenRevocable, lista_revocacion
+from .serializers import BusquedaLoginSerializer, EstacionListSerializer, UsuarioLoginSerializer
+from .notificaciones import (
+    difundir_aviso, notificar_reservas_por_expirar, reconciliar_no_leidas, sumar_no_leidas
+)
+from .rut import formatear_rut
+
+
+def crear_usuario(nombre, cuerpo_rut, **campos):
+    return Usuario.objects.create_user(
+        username=nombre, email=f'{nombre}@bikemetro.cl', rut=formatear_rut(cuerpo_rut),
+        telefono='+56900000000', password='Prueba-2024!', **campos,
+    )
+
+
+# ============ PRESUPUESTO DE CONSULTAS ============
+class PresupuestoConsultasTests(TestCase):
+    """
+    Los listados deben hacer las mismas consultas con 1 o con 10 filas
+    (un N+1 nuevo hace fallar el test). El benchmark `endpoints` mide lo
+    mismo a escala y con latencias.
+    """
+
+    LISTADOS = [
+        '/api/estaciones/',
+        '/api/reservas/',
+        '/api/reservas/activas/',
+        '/api/reservas/historial/',
+        '/api/pagos/',
+        '/api/resenas/',
+        '/api/notificaciones/',
+        '/api/tickets/',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='presupuesto', email='presupuesto@bikemetro.cl',
+            rut='11111111-1', telefono='+56900000000', password='Presupuesto-2024!',
+        )
+
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.usuario)
+        self.indice = 0
+
+    def _agregar_filas(self, cantidad):
+        for _ in range(cantidad):
+            self.indice += 1
+            estacion = Estacion.objects.create(nombre=f'Presupuesto {self.indice}', espacios_totales=2)
+            espacio = EspacioEstacionamiento.objects.create(
+                estacion=estacion, fila=1, columna='A', estado='OCUPADO'
+            )
+            for estado in ('EN_CURSO', 'FINALIZADA'):
+                reserva = Reserva.objects.create(
+                    usuario=self.usuario, estacion=estacion, espacio=espacio, estado=estado,
+                    fecha_expiracion_reserva=timezone.now() + timedelta(minutes=10),
+                )
+            Notificacion.objects.create(
+                usuario=self.usuario, reserva=reserva, tipo='SISTEMA', titulo='t', mensaje='m'
+            )
+            TicketSoporte.objects.create(
+                usuario=self.usuario, tipo='CONSULTA', asunto='a', descripcion='d', reserva=reserva
+            )
+
+    def _consultas(self, url):
+        consultas = []
+
+        def contar(ejecutar, sql, params, many, contexto):
+            consultas.append(sql)
+            return ejecutar(sql, params, many, contexto)
+
+        with connection.execute_wrapper(contar):
+            respuesta = self.cliente.get(url)
+        self.assertEqual(respuesta.status_code, 200, url)
+        return len(consultas)
+
+    def test_listados_sin_n_mas_1(self):
+        self._agregar_filas(1)
+        antes = {url: self._consultas(url) for url in self.LISTADOS}
+        self._agregar_filas(9)
+        for url in self.LISTADOS:
+            with self.subTest(url=url):
+                self.assertEqual(self._consultas(url), antes[url])
+
+    def test_todas_las_rutas_tienen_caso(self):
+        self.assertEqual(rutas_sin_caso(), [])
+
+
+# ============ NOTIFICACIONES ============
+class NotificacionesMasivasTests(TestCase):
+    """Envío masivo: destinatarios, deduplicación y contador de no leídas"""
+
+    def setUp(self):
+        self.usuarios = [crear_usuario(f'masivo{i}', 10000000 + i) for i in range(3)]
+        crear_usuario('inactivo', 10000009, is_active=False)
+        self.estacion = Estacion.objects.create(nombre='Masivo', espacios_totales=3)
+
+    def _no_leidas(self):
+        return sorted(Usuario.objects.filter(is_active=True).values_list('notificaciones_no_leidas', flat=True))
+
+    def test_difundir_aviso_sin_duplicados(self):
+        self.assertEqual(difundir_aviso('Mantención', 'Hoy'), 3)
+        self.assertEqual(difundir_aviso('Mantención', 'Hoy'), 0)
+        self.assertEqual(difundir_aviso('Mantención', 'Mañana'), 3)
+        self.assertEqual(self._no_leidas(), [2, 2, 2])
+
+    def test_expiraciones_por_reserva(self):
+        for indice, usuario in enumerate(self.usuarios[:2]):
+            espacio = EspacioEstacionamiento.objects.create(estacion=self.estacion, fila=1, columna='ABC'[indice])
+            Reserva.objects.create(
+                usuario=usuario, estacion=self.estacion, espacio=espacio,
+                fecha_expiracion_reserva=timezone.now() + timedelta(minutes=2),
+            )
+        self.assertEqual(notificar_reservas_por_expirar(minutos=3, tamano_lote=1), 2)
+        self.assertEqual(notificar_reservas_por_expirar(minutos=3), 0)
+        self.assertEqual(self._no_leidas(), [0, 1, 1])
+
+    def test_reintento_omite_reservas_avisadas(self):
+        reservas = []
+        for indice, usuario in enumerate(self.usuarios):
+            espacio = EspacioEstacionamiento.objects.create(estacion=self.estacion, fila=1, columna='ABC'[indice])
+            reservas.append(Reserva.objects.create(
+                usuario=usuario, estacion=self.estacion, espacio=espacio, estado='CONFIRMADA',
+                fecha_expiracion_reserva=timezone.now() + timedelta(minutes=10),
+            ))
+        # Un envío anterior alcanzó a avisar la primera reserva
+        Notificacion.objects.create(usuario=self.usuarios[0], reserva=reservas[0], tipo='SISTEMA', titulo='t', mensaje='m')
+        self.assertEqual(difundir_aviso('Cierre', 'Hoy', estacion_id=self.estacion.id, tamano_lote=1), 2)
+        self.assertEqual(difundir_aviso('Cierre', 'Hoy', estacion_id=self.estacion.id), 0)
+        self.assertEqual(self._no_leidas(), [1, 1, 1])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notificacion.objects.create(usuario=self.usuarios[1], reserva=reservas[1], tipo='SISTEMA', titulo='x', mensaje='y')
+
+    def test_contador_no_baja_de_cero(self):
+        usuario = self.usuarios[0]
+        sumar_no_leidas({usuario.id: 2})
+        sumar_no_leidas({usuario.id: -5})
+        usuario.refresh_from_db()
+        self.assertEqual(usuario.notificaciones_no_leidas, 0)
+
+
+class NoLeidasTests(TestCase):
+    """Contador de no leídas: creación, lectura, edición, borrado y reconciliación"""
+
+    def setUp(self):
+        self.usuario = crear_usuario('badge', 10000011)
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.usuario)
+        self.notificaciones = [
+            Notificacion.objects.create(usuario=self.usuario, tipo='SISTEMA', titulo=f't{i}', mensaje='m')
+            for i in range(3)
+        ]
+
+    def _badge(self):
+        return self.cliente.get('/api/notificaciones/no_leidas/').json()['no_leidas']
+
+    def test_acciones_mantienen_el_contador(self):
+        self.assertEqual(self._badge(), 3)
+        url = f'/api/notificaciones/{self.notificaciones[0].id}/marcar_leida/'
+        self.cliente.post(url)
+        self.cliente.post(url)  # Idempotente
+        self.assertEqual(self._badge(), 2)
+
+        self.notificaciones[1].delete()
+        self.assertEqual(self._badge(), 1)
+
+        self.cliente.post('/api/notificaciones/marcar_todas_leidas/')
+        self.assertEqual(self._badge(), 0)
+
+        notificacion = Notificacion.objects.get(pk=self.notificaciones[2].pk)
+        notificacion.leida = False  # Edición desde el admin
+        notificacion.save()
+        self.assertEqual(self._badge(), 1)
+
+    def test_save_del_usuario_no_pisa_el_contador(self):
+        usuario = Usuario.objects.get(pk=self.usuario.pk)
+        Notificacion.objects.create(usuario=self.usuario, tipo='SISTEMA', titulo='t', mensaje='m')
+        usuario.first_name = 'Otro'
+        usuario.save()
+        self.assertEqual(self._badge(), 4)
+
+    def test_reconciliar(self):
+        Usuario.objects.filter(pk=self.usuario.pk).update(notificaciones_no_leidas=40)
+        self.assertEqual(reconciliar_no_leidas([self.usuario.pk]), 1)
+        self.assertEqual(self._badge(), 3)
+
+
+# ============ TIEMPO REAL ============
+class TiempoRealTests(TestCase):
+    """Canal de long-poll: despertar entre hilos, loops cerrados y errores de autenticación"""
+
+    async def test_publicar_desde_otro_hilo_despierta(self):
+        espera = canal_notificaciones.suscribir(5)
+        try:
+            threading.Thread(target=canal_notificaciones.publicar, args=([5],)).start()
+            self.assertTrue(await espera.esperar(1))
+        finally:
+            canal_notificaciones.desuscribir(5, espera)
+
+    def test_loop_cerrado_se_descarta(self):
+        async def suscribir():
+            return canal_notificaciones.suscribir(6)
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(suscribir())
+        loop.close()
+        canal_notificaciones.publicar([6])  # Sin RuntimeError en quien escribe
+        self.assertEqual(canal_notificaciones.total_esperas(), 0)
+
+    def test_errores_con_la_forma_de_drf(self):
+        respuesta = self.client.get('/api/notificaciones/esperar/?timeout=0')
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertIn('WWW-Authenticate', respuesta)
+        self.assertEqual(list(respuesta.json()), ['detail'])
+
+        respuesta = self.client.get(
+            '/api/notificaciones/esperar/?timeout=0', HTTP_AUTHORIZATION='Bearer invalido'
+        )
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertEqual(respuesta.json()['code'], 'token_not_valid')
+
+
+# ============ CALIFICACIONES ============
+class CalificacionesTests(TestCase):
+    """Resumen por estación mantenido con deltas: igual al recálculo completo"""
+
+    def setUp(self):
+        self.usuario = crear_usuario('resenas', 10000021)
+        self.estaciones = [Estacion.objects.create(nombre=f'Calificada {i}') for i in range(2)]
+
+    def _resumenes(self):
+        return {
+            resumen.estacion_id: (resumen.total_resenas, resumen.agregados)
+            for resumen in ResumenResenas.objects.filter(total_resenas__gt=0)
+        }
+
+    def test_deltas_igual_a_recalculo(self):
+        primera = Resena.objects.create(
+            usuario=self.usuario, estacion=self.estaciones[0], calificacion=5, calificacion_seguridad=3
+        )
+        Resena.objects.create(usuario=self.usuario, estacion=self.estaciones[0], calificacion=2)
+        tercera = Resena.objects.create(usuario=self.usuario, estacion=self.estaciones[1], calificacion=4)
+
+        resena = Resena.objects.get(pk=primera.pk)
+        resena.calificacion = 1
+        resena.calificacion_seguridad = None
+        resena.save()
+        resena = Resena.objects.get(pk=tercera.pk)
+        resena.estacion = self.estaciones[0]  # Cambio de estación
+        resena.save()
+        Resena.objects.get(pk=tercera.pk).delete()
+
+        incrementales = self._resumenes()
+        recalcular_resumenes()
+        self.assertEqual(self._resumenes(), incrementales)
+
+        datos = formatear_resumen(ResumenResenas.objects.get(estacion=self.estaciones[0]), detallado=True)
+        self.assertEqual(datos['total_resenas'], 2)
+        self.assertEqual(datos['promedio'], 1.5)
+        self.assertEqual(datos['aspectos']['seguridad']['cantidad'], 0)
+        self.assertEqual(datos['aspectos']['general']['histograma'], [1, 1, 0, 0, 0])
+
+    def test_listado_sin_consultas_por_estacion(self):
+        for estacion in self.estaciones:
+            Resena.objects.create(usuario=self.usuario, estacion=estacion, calificacion=4)
+        with self.assertNumQueries(1):
+            datos = self.client.get('/api/estaciones/?ordering=nombre').json()
+        self.assertEqual([estacion['calificaciones'] for estacion in datos], [{'total_resenas': 1, 'promedio': 4.0}] * 2)
+
+
+class ResenasListadoTests(TestCase):
+    """Listado de reseñas: filtro por estación, cursor y modo resumen"""
+
+    def setUp(self):
+        self.usuario = crear_usuario('listado', 10000022)
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.usuario)
+        self.estaciones = [Estacion.objects.create(nombre=f'Listado {i}') for i in range(2)]
+        for indice in range(5):
+            resena = Resena.objects.create(
+                usuario=self.usuario, estacion=self.estaciones[indice % 2], calificacion=indice + 1
+            )
+            Resena.objects.filter(pk=resena.pk).update(created_at=timezone.now() - timedelta(minutes=indice))
+
+    def test_filtro_y_cursor(self):
+        estacion = self.estaciones[0]
+        pagina = self.cliente.get(f'/api/resenas/?estacion={estacion.id}&page_size=2').json()
+        ids = [resena['id'] for resena in pagina['results']]
+        with self.assertNumQueries(1):
+            pagina = self.cliente.get(pagina['next']).json()
+        ids += [resena['id'] for resena in pagina['results']]
+
+        esperados = list(Resena.objects.filter(estacion=estacion).order_by('-created_at').values_list('id', flat=True))
+        self.assertEqual(ids, esperados)
+        self.assertEqual(pagina['results'][0]['usuario']['nickname'], 'listado')
+        self.assertEqual(self.cliente.get('/api/resenas/?estacion=x').status_code, 400)
+
+    def test_resumen(self):
+        datos = self.cliente.get(f'/api/resenas/?resumen=1&estacion={self.estaciones[1].id}').json()
+        self.assertEqual(datos['estacion'], self.estaciones[1].id)
+        self.assertEqual(datos['total_resenas'], 2)
+        self.assertEqual(datos['promedio'], 3.0)
+        self.assertEqual(self.cliente.get('/api/resenas/?resumen=1').json()['total_resenas'], 5)
+
+
+# ============ LOGIN ============
+class LoginTests(TestCase):
+    """auth/login/ con email, RUT (con puntos y k minúscula) o nickname"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_usuario('ingreso', 10000013)  # DV K
+
+    def _login(self, login, password='Prueba-2024!'):
+        return self.client.post(
+            '/api/auth/login/', {'login': login, 'password': password}, content_type='application/json'
+        )
+
+    def test_identificadores(self):
+        self.assertEqual(self.usuario.rut, '10000013-K')
+        for login in ('ingreso@bikemetro.cl', '10.000.013-k', '10000013K', 'ingreso'):
+            with self.subTest(login=login):
+                respuesta = self._login(login)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(AccessToken(respuesta.json()['access'])['user_id'], str(self.usuario.id))
+
+    def test_credenciales_invalidas(self):
+        self.assertEqual(self._login('ingreso', 'otra').status_code, 401)
+        self.assertEqual(self._login('10000013-1').status_code, 401)  # DV incorrecto
+        self.assertEqual(self._login('nadie').status_code, 401)
+        self.assertEqual(self._login('').status_code, 400)
+
+    def test_serializer_verifica_la_contrasena(self):
+        datos = {'login': 'ingreso', 'password': 'otra'}
+        self.assertFalse(UsuarioLoginSerializer(data=datos).is_valid())
+        self.assertTrue(BusquedaLoginSerializer(data=datos).is_valid())  # Solo busca
+        self.assertFalse(BusquedaLoginSerializer(data={'login': 'nadie', 'password': 'x'}).is_valid())
+        self.assertTrue(UsuarioLoginSerializer(data={'login': 'ingreso', 'password': 'Prueba-2024!'}).is_valid())
+
+    def test_rehash_al_cambiar_algoritmo(self):
+        Usuario.objects.filter(pk=self.usuario.pk).update(
+            password=make_password('Prueba-2024!', hasher='pbkdf2_sha1')
+        )
+        self.assertTrue(hashing.requiere_actualizacion(Usuario.objects.get(pk=self.usuario.pk).password))
+        self.assertEqual(self._login('ingreso').status_code, 200)
+        password = Usuario.objects.get(pk=self.usuario.pk).password
+        self.assertTrue(password.startswith('pbkdf2_sha256$'))
+        self.assertFalse(hashing.requiere_actualizacion(password))
+
+
+class CacheUsuariosTests(TestCase):
+    """Usuario del JWT desde cache_usuarios, invalidado al modificarlo"""
+
+    def setUp(self):
+        cache_usuarios.limpiar()
+        self.usuario = crear_usuario('cacheado', 10000014)
+        self.cliente = APIClient()
+        self.cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.usuario)}')
+
+    def test_sin_select_de_usuario_y_con_invalidacion(self):
+        self.cliente.get('/api/usuarios/me/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cliente.get('/api/usuarios/me/').json()['nombre'], '')
+
+        self.cliente.patch('/api/usuarios/me/', {'nombre': 'Nuevo'}, format='json')
+        self.assertEqual(self.cliente.get('/api/usuarios/me/').json()['nombre'], 'Nuevo')
+
+        usuario = Usuario.objects.get(pk=self.usuario.pk)
+        usuario.is_active = False
+        usuario.save()
+        self.assertEqual(self.cliente.get('/api/usuarios/me/').status_code, 401)
+
+    def test_version_y_tamano(self):
+        cache = CacheUsuarios(maximo=2, ttl=60)
+        version = cache.version(1)
+        cache.invalidar(1)  # Cambio durante una carga
+        cache.guardar(1, 'antiguo', version)
+        self.assertIsNone(cache.obtener(1))
+        for usuario_id in (1, 2, 3):
+            cache.guardar(usuario_id, f'u{usuario_id}', cache.version(usuario_id))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.obtener(1))
+        self.assertEqual(cache.obtener('3'), 'u3')
+
+
+# ============ REVOCACIÓN ============
+class RevocacionTests(TestCase):
+    """Rotación de refresh tokens con filtro de Bloom y tabla por jti"""
+
+    def setUp(self):
+        lista_revocacion.limpiar()
+        self.usuario = crear_usuario('rotacion', 10000015)
+
+    def _refrescar(self, refresh):
+        return self.client.post('/api/auth/refresh/', {'refresh': refresh}, content_type='application/json')
+
+    def test_token_rotado_no_se_reutiliza(self):
+        refresh = str(RefreshTokenRevocable.for_user(self.usuario))
+        respuesta = self._refrescar(refresh)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self._refrescar(refresh).status_code, 401)
+        self.assertEqual(self._refrescar(respuesta.json()['refresh']).status_code, 200)
+
+        lista_revocacion.limpiar()  # Otro proceso: el filtro se reconstruye desde la BD
+        self.assertEqual(self._refrescar(refresh).status_code, 401)
+
+    def test_sin_consultas_para_tokens_vigentes(self):
+        lista_revocacion.revocar('revocado', timezone.now() + timedelta(days=1))
+        with self.assertNumQueries(0):
+            self.assertFalse(lista_revocacion.esta_revocado('vigente'))
+
+    def test_falso_positivo_se_confirma_en_bd(self):
+        lista = ListaRevocacion(capacidad=10)
+        lista.revocar('revocado', timezone.now() + timedelta(days=1))
+        lista._filtro._datos[:] = b'\xff' * len(lista._filtro._datos)  # Todo "puede estar"
+        with self.assertNumQueries(1):
+            self.assertFalse(lista.esta_revocado('vigente'))
+        self.assertTrue(lista.esta_revocado('revocado'))
+
+    def test_purga_y_reconstruccion(self):
+        lista = ListaRevocacion(capacidad=10)
+        lista.revocar('vencido', timezone.now() - timedelta(seconds=1))  # Purga al revocar
+        self.assertFalse(TokenRevocado.objects.filter(jti='vencido').exists())
+
+        lista.revocar('vigente', timezone.now() + timedelta(days=1))
+        TokenRevocado.objects.create(jti='vencido', expira=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(lista.purgar(), 1)
+        self.assertFalse(TokenRevocado.objects.filter(jti='vencido').exists())
+        self.assertFalse(lista.esta_revocado('vencido'))
+        self.assertTrue(lista.esta_revocado('vigente'))
+
+
+# ============ IMPORTACIÓN ============
+class ImportacionUsuariosTests(TestCase):
+    """importar_usuarios: validación por fila, duplicados y contraseñas"""
+
+    CSV = (
+        'nickname,email,rut,telefono,nombre,password\n'
+        'ana,ana@uni.cl,10.000.016-4,+56911111111,Ana,Clave-Ana-2024\n'
+        'beto,beto@uni.cl,10000017-1,+56911111112,Beto,\n'
+        'carla,carla@uni.cl,10000018-0,,Carla,\n'
+        'ana2,ana@uni.cl,10000019-9,+56911111113,Ana Dos,\n'
+        'dani,existente@bikemetro.cl,10000023-7,+56911111114,Dani,\n'
+        'eva,eva@uni.cl,10000024-5,+56911111115,Eva,\n'
+    )
+
+    def setUp(self):
+        crear_usuario('existente', 10000099)
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as archivo:
+            archivo.write(self.CSV)
+        self.ruta = archivo.name
+        self.addCleanup(os.remove, self.ruta)
+
+    def test_importar(self):
+        resultado = importar_usuarios(leer_csv(self.ruta), workers=0)
+
+        self.assertEqual((resultado.leidas, resultado.creadas), (6, 2))
+        self.assertEqual(resultado.errores, [
+            (3, 'RUT inválido: 10000017-1'),
+            (4, 'Faltan campos: telefono'),
+            (5, 'email repetido en el archivo: ana@uni.cl'),
+            (6, 'email ya registrado: existente@bikemetro.cl'),
+        ])
+        ana = Usuario.objects.get(username='ana')
+        self.assertEqual((ana.rut, ana.rut_numero), ('10000016-4', 10000016))
+        self.assertTrue(ana.check_password('Clave-Ana-2024'))
+        # Sin contraseña en el CSV la cuenta queda sin contraseña utilizable
+        self.assertFalse(Usuario.objects.get(username='eva').has_usable_password())
+
+    def test_comando(self):
+        salida = io.StringIO()
+        call_command('importar_usuarios', self.ruta, '--workers', '0', stdout=salida)
+        self.assertIn('2 de 6 usuarios importados', salida.getvalue())
+        self.assertIn('Línea 6: email ya registrado', salida.getvalue())
+
+        # Reimportar el mismo archivo no crea nada nuevo
+        resultado = importar_usuarios(leer_csv(self.ruta), workers=0)
+        self.assertEqual(resultado.creadas, 0)
+        self.assertIn((2, 'nickname ya registrado: ana'), resultado.errores)
+
+    def test_campos_del_modelo_y_email_sin_mayusculas(self):
+        filas = [
+            (2, {'username': 'fede', 'email': 'Fede@Uni.cl', 'rut': '10000031-8', 'telefono': '+56911111116', 'first_name': 'Fede'}),
+            (3, {'username': 'fede2', 'email': 'fede@uni.CL', 'rut': '10000032-6', 'telefono': '+56911111117', 'first_name': 'Fede'}),
+            (4, {'username': 'gabi', 'email': 'EXISTENTE@bikemetro.cl', 'rut': '10000033-4', 'telefono': '+56911111118', 'first_name': 'Gabi'}),
+            (5, {'username': 'hugo', 'email': 'hugo@uni.cl', 'rut': '10000034-2', 'telefono': '+5691111111' + '9' * 10, 'first_name': 'Hugo'}),
+            (6, {'username': 'ines ' * 40, 'email': 'ines@uni.cl', 'rut': '10000035-0', 'telefono': '+56911111120', 'first_name': 'Ines'}),
+        ]
+        resultado = importar_usuarios(filas, workers=0)
+
+        self.assertEqual(resultado.creadas, 1)
+        self.assertEqual([linea for linea, _ in resultado.errores], [3, 4, 5, 6])
+        self.assertEqual(resultado.errores[0], (3, 'email repetido en el archivo: fede@uni.cl'))
+        self.assertEqual(resultado.errores[1], (4, 'email ya registrado: EXISTENTE@bikemetro.cl'))
+        self.assertTrue(resultado.errores[2][1].startswith('telefono: '))
+        self.assertIn('username: ', resultado.errores[3][1])
+        self.assertEqual(Usuario.objects.get(username='fede').email, 'Fede@uni.cl')
+
+
+# ============ RUT ============
+class RutNumeroTests(TestCase):
+    """rut_numero de registros antiguos con cuerpo repetido (migración 0007)"""
+
+    def setUp(self):
+        self.original = crear_usuario('original', 10000025)
+        # Registro antiguo: mismo cuerpo con DV inválido, sin rut_numero
+        self.antiguo = crear_usuario('antiguo', 10000026)
+        Usuario.objects.filter(pk=self.antiguo.pk).update(rut='10000025-0', rut_numero=None)
+        self.antiguo.refresh_from_db()
+
+    def test_guardar_conserva_null(self):
+        self.antiguo.first_name = 'Antiguo'
+        self.antiguo.save()
+        self.antiguo.refresh_from_db()
+        self.assertIsNone(self.antiguo.rut_numero)
+        self.original.refresh_from_db()
+        self.assertEqual(self.original.rut_numero, 10000025)
+
+    def test_patch_perfil(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.antiguo)
+        respuesta = cliente.patch('/api/usuarios/me/', {'telefono': '+56922222222'}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(Usuario.objects.get(pk=self.antiguo.pk).telefono, '+56922222222')
+
+    def test_cuerpo_liberado(self):
+        # Si el cuerpo queda libre, el siguiente save lo asigna
+        self.original.delete()
+        self.antiguo.save()
+        self.assertEqual(self.antiguo.rut_numero, 10000025)
+
+
+# ============ SEED ============
+class SeedDataTests(TestCase):
+    """seed_data: espacios según la capacidad de cada estación, sin duplicar al repetir"""
+
+    def test_seed(self):
+        call_command('seed_data', '--escala', '20', stdout=io.StringIO())
+
+        estaciones = Estacion.objects.count()
+        self.assertGreater(estaciones, 20)
+        self.assertFalse(Estacion.objects.filter(latitud__isnull=True).exists())
+        capacidad = sum(Estacion.objects.values_list('espacios_totales', flat=True))
+        self.assertEqual(EspacioEstacionamiento.objects.count(), capacidad)
+        self.assertFalse(EspacioEstacionamiento.objects.exclude(estado='DISPONIBLE').exists())
+        # executemany: la fecha de creación llega en el formato de la BD
+        espacio = EspacioEstacionamiento.objects.order_by('id').first()
+        self.assertTrue(timezone.is_aware(espacio.created_at))
+        self.assertLess(abs((timezone.now() - espacio.created_at).total_seconds()), 60)
+        self.assertEqual(
+            set(Usuario.objects.values_list('username', flat=True)), {'catalina', 'testuser'}
+        )
+
+        # Repetir no crea estaciones, espacios ni usuarios
+        salida = io.StringIO()
+        call_command('seed_data', '--escala', '20', stdout=salida)
+        self.assertIn('Estaciones creadas: 0', salida.getvalue())
+        self.assertIn('Espacios creados: 0', salida.getvalue())
+        self.assertEqual(Estacion.objects.count(), estaciones)
+        self.assertEqual(EspacioEstacionamiento.objects.count(), capacidad)
+        self.assertEqual(Usuario.objects.count(), 2)
+
+    def test_completa_espacios_faltantes(self):
+        call_command('seed_data', stdout=io.StringIO())
+        estacion = Estacion.objects.order_by('id').first()
+        Estacion.objects.filter(pk=estacion.pk).update(espacios_totales=21)
+        EspacioEstacionamiento.objects.filter(estacion=estacion).delete()
+
+        call_command('seed_data', stdout=io.StringIO())
+        estacion.refresh_from_db()
+        self.assertEqual(
+            EspacioEstacionamiento.objects.filter(estacion=estacion).count(), estacion.espacios_totales
+        )
+
+
+# ============ CATÁLOGO ============
+class CatalogoTests(TestCase):
+    """cargar_catalogo: altas, cambios y desactivaciones en bloque"""
+
+    CSV = (
+        'nombre,linea,orden,latitud,longitud,tiene_bicicletero,capacidad\n'
+        'Catálogo Uno,L4,1,-33.40,-70.60,si,21\n'
+        'Catálogo Dos,L4,2,-33.41,-70.61,si,30\n'
+        'Catálogo Tres,L4,3,,,no,42\n'
+    )
+
+    def _archivo(self, contenido, extension='.csv'):
+        with tempfile.NamedTemporaryFile('w', suffix=extension, delete=False, encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        self.addCleanup(os.remove, archivo.name)
+        return archivo.name
+
+    def _cargar(self, *argumentos):
+        salida = io.StringIO()
+        call_command('cargar_catalogo', *argumentos, stdout=salida)
+        return salida.getvalue()
+
+    def test_dry_run(self):
+        salida = self._cargar(self._archivo(self.CSV), '--dry-run')
+        self.assertIn('Nuevas (2)', salida)
+        self.assertFalse(Estacion.objects.exists())
+
+    def test_carga_y_sincronizacion(self):
+        self._cargar(self._archivo(self.CSV))
+        uno = Estacion.objects.get(nombre='Catálogo Uno')
+        self.assertEqual((uno.linea, uno.orden, uno.estado), ('L4', 1, 'ACTIVO'))
+        self.assertEqual(str(uno.latitud), '-33.4000000')
+        self.assertEqual(uno.espacios.count(), 21)
+        self.assertEqual(EspacioEstacionamiento.objects.count(), 51)
+        self.assertFalse(Estacion.objects.filter(nombre='Catálogo Tres').exists())
+
+        # Segunda versión (JSON): cambia capacidad, Dos falta y Tres gana bicicletero
+        json_catalogo = json.dumps({'estaciones': [
+            {'nombre': 'Catálogo Uno', 'linea': 'L4', 'orden': 1, 'latitud': '-33.40',
+             'longitud': '-70.60', 'capacidad': 36},
+            {'nombre': 'Catálogo Tres', 'linea': 'L4', 'orden': 3, 'capacidad': 21},
+        ]})
+        ruta = self._archivo(json_catalogo, '.json')
+        with CaptureQueriesContext(connection) as consultas:
+            salida = self._cargar(ruta)
+        self.assertIn('1 nuevas, 1 actualizadas, 1 desactivadas, 36 espacios creados', salida)
+        # Consultas en bloque: no dependen de la cantidad de estaciones
+        self.assertLess(len(consultas), 20)
+
+        uno.refresh_from_db()
+        self.assertEqual(uno.espacios_totales, 36)
+        self.assertEqual(uno.espacios.count(), 36)
+        self.assertEqual(Estacion.objects.get(nombre='Catálogo Dos').estado, 'INACTIVO')
+        self.assertEqual(Estacion.objects.get(nombre='Catálogo Tres').espacios.count(), 21)
+
+        # Repetir el mismo catálogo no cambia nada
+        self.assertIn('0 nuevas, 0 actualizadas, 0 desactivadas, 0 espacios creados', self._cargar(ruta))
+
+    def test_errores_no_aplican_cambios(self):
+        ruta = self._archivo(self.CSV + 'Catálogo Cuatro,L9,4,,,si,21\n')
+        with self.assertRaisesMessage(CommandError, '1 registros con errores'):
+            self._cargar(ruta)
+        self.assertFalse(Estacion.objects.exists())
+
+
+# ============ CARGA SINTÉTICA ============
+class CargaSinteticaTests(TestCase):
+    """generar_carga: ciclo de vida de las reservas sin espacios ocupados dos veces"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_data', stdout=io.StringIO())
+        # Pocos espacios para forzar estaciones llenas
+        Estacion.objects.update(espacios_totales=3)
+        EspacioEstacionamiento.objects.exclude(fila=1, columna__in=('A', 'B', 'C')).delete()
+
+    def test_generar_carga(self):
+        salida = io.StringIO()
+        call_command('generar_carga', '--usuarios', '60', '--dias', '3', '--prefijo', 'prueba', stdout=salida)
+
+        self.assertEqual(Usuario.objects.filter(username__startswith='prueba').count(), 60)
+        reservas = list(Reserva.objects.values(
+            'id', 'espacio_id', 'estado', 'fecha_reserva', 'fecha_expiracion_reserva',
+            'fecha_salida', 'updated_at', 'costo_total', 'pagado',
+        ))
+        self.assertTrue(reservas)
+        # Fechas históricas conservadas (no la hora de la carga)
+        self.assertLess(min(r['fecha_reserva'] for r in reservas), timezone.now() - timedelta(days=1))
+        # Ids UUIDv7: el orden de los ids sigue al de las fechas de reserva
+        self.assertTrue(all(r['id'].version == 7 for r in reservas))
+        fechas = [r['fecha_reserva'] for r in sorted(reservas, key=lambda r: r['id'].hex)]
+        for anterior, siguiente in zip(fechas, fechas[1:]):
+            self.assertLess(anterior - siguiente, timedelta(milliseconds=1))
+
+        # Por espacio, cada reserva empieza después de que termina la anterior
+        activas = {'PENDIENTE', 'CONFIRMADA', 'EN_CURSO'}
+        fin = {
+            'FINALIZADA': lambda r: r['fecha_salida'],
+            'CANCELADA': lambda r: r['updated_at'],
+            'EXPIRADA': lambda r: r['fecha_expiracion_reserva'],
+        }
+        por_espacio = {}
+        for reserva in sorted(reservas, key=lambda r: r['fecha_reserva']):
+            por_espacio.setdefault(reserva['espacio_id'], []).append(reserva)
+        for lista in por_espacio.values():
+            self.assertLessEqual(sum(r['estado'] in activas for r in lista), 1)
+            for anterior, siguiente in zip(lista, lista[1:]):
+                self.assertNotIn(anterior['estado'], activas)
+                self.assertLessEqual(fin[anterior['estado']](anterior), siguiente['fecha_reserva'])
+
+        finalizadas = [r for r in reservas if r['estado'] == 'FINALIZADA']
+        self.assertEqual(
+            Pago.objects.count(), sum(1 for r in finalizadas if r['costo_total'] > 0)
+        )
+        self.assertEqual(
+            Notificacion.objects.filter(tipo='RESERVA_CONFIRMADA').count(), len(reservas)
+        )
+        # Contadores desnormalizados reconciliados
+        no_leidas = sum(Usuario.objects.values_list('notificaciones_no_leidas', flat=True))
+        self.assertEqual(no_leidas, Notificacion.objects.filter(leida=False).count())
+
+        with self.assertRaisesMessage(CommandError, "Ya existen usuarios con el prefijo 'prueba'"):
+            call_command('generar_carga', '--usuarios', '1', '--dias', '1', '--prefijo', 'prueba',
+                         stdout=io.StringIO())
+
+
+# ============ INSTRUMENTACIÓN ============
+class InstrumentacionTests(TestCase):
+    """Server-Timing solo para staff (o DEBUG) y tiempo de serialización medido"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_usuario('medido', 10000027)
+        cls.staff = crear_usuario('medidor', 10000028, is_staff=True)
+        TicketSoporte.objects.create(usuario=cls.staff, tipo='CONSULTA', asunto='a', descripcion='b')
+
+    def setUp(self):
+        registro_instrumentacion.limpiar()
+
+    def _get(self, usuario=None, ruta='/api/tickets/'):
+        cliente = APIClient()
+        if usuario is not None:
+            cliente.force_authenticate(usuario)
+        return cliente.get(ruta)
+
+    def test_server_timing(self):
+        self.assertNotIn('Server-Timing', self._get(ruta='/api/estaciones/'))
+        self.assertNotIn('Server-Timing', self._get(self.usuario))
+        self.assertIn('consultas', self._get(self.staff)['Server-Timing'])
+        with self.settings(DEBUG=True):
+            self.assertIn('Server-Timing', self._get(ruta='/api/estaciones/'))
+
+    async def test_asgi_con_cookie_de_sesion(self):
+        # Con DEBUG apagado y cookie de sesión, el usuario perezoso no se resuelve en el loop
+        await sync_to_async(self.async_client.force_login)(self.staff)
+        for metodo, ruta, estado in (
+            ('get', '/api/estaciones/', 200),
+            ('get', '/api/notificaciones/esperar/?timeout=0', 401),
+            ('post', '/api/auth/login/', 400),
+            ('post', '/api/auth/register/', 400),
+        ):
+            with self.subTest(ruta=ruta):
+                respuesta = await getattr(self.async_client, metodo)(ruta)
+                self.assertEqual(respuesta.status_code, estado)
+                self.assertNotIn('Server-Timing', respuesta)
+
+    def test_serializacion(self):
+        self._get(self.staff)
+        self._get(self.staff)
+        resumen = registro_instrumentacion.resumen()['GET ticket-list']
+        self.assertEqual(resumen['requests'], 2)
+        self.assertGreater(resumen['serializacion_ms']['max'], 0)
+
+
+# ============ PERFILADOR ============
+class PerfiladorTests(TestCase):
+    """X-Perfilar: solo staff, solo vistas sync, desactivado por defecto"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = crear_usuario('perfilador', 10000029, is_staff=True)
+        cls.usuario = crear_usuario('perfilado', 10000030)
+
+    def setUp(self):
+        self.activo_por_configuracion = settings.PERFILADOR['ACTIVO']
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        self.almacen = perfilador.AlmacenPerfiles(directorio, 10)
+        for parche in (
+            mock.patch.object(perfilador, 'almacen', self.almacen),
+            mock.patch.dict(perfilador._config, {'ACTIVO': True}),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+        self.middleware = perfilador.PerfiladorMiddleware(lambda request: HttpResponse('ok'))
+
+    def _request(self, ruta, usuario):
+        request = RequestFactory().get(ruta, HTTP_X_PERFILAR='cprofile')
+        request.user = usuario
+        return self.middleware(request)
+
+    def test_desactivado_por_defecto(self):
+        if 'PERFILADOR_ACTIVO' not in os.environ:
+            self.assertFalse(self.activo_por_configuracion)
+        with mock.patch.dict(perfilador._config, {'ACTIVO': False}):
+            with self.assertRaises(MiddlewareNotUsed):
+                perfilador.PerfiladorMiddleware(lambda request: HttpResponse('ok'))
+
+    def test_vista_sync_staff(self):
+        respuesta = self._request('/api/tickets/', self.staff)
+        self.assertIn('X-Perfil-Id', respuesta)
+        self.assertEqual([meta['id'] for meta in self.almacen.listar()], [respuesta['X-Perfil-Id']])
+
+    def test_omitidos(self):
+        # Vista async (su código corre en otro hilo) y usuario sin staff
+        self.assertNotIn('X-Perfil-Id', self._request('/api/estaciones/', self.staff))
+        self.assertNotIn('X-Perfil-Id', self._request('/api/tickets/', self.usuario))
+        self.assertEqual(self.almacen.listar(), [])
+
+
+# ============ SQLITE ============
+class SqliteTests(TransactionTestCase):
+    """PRAGMAs al conectar y BEGIN IMMEDIATE en atomic()"""
+
+    def test_pragmas_al_conectar(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        conexion = SqliteDatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(directorio, 'bd.sqlite3')})
+        self.addCleanup(conexion.close)
+        with conexion.cursor() as cursor:
+            valores = {}
+            for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'temp_store'):
+                cursor.execute(f'PRAGMA {pragma}')
+                valores[pragma] = cursor.fetchone()[0]
+        self.assertEqual(valores, {
+            'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'cache_size': -32000, 'temp_store': 2,
+        })
+
+    def test_begin_inmediato_solo_en_atomic(self):
+        sentencias = []
+        with connection.execute_wrapper(lambda ejecutar, sql, *args: sentencias.append(sql) or ejecutar(sql, *args)):
+            Estacion.objects.count()  # Autocommit: sin BEGIN
+            with transaction.atomic():
+                Estacion.objects.count()
+                with transaction.atomic():
+                    Estacion.objects.count()
+        self.assertEqual([sql for sql in sentencias if sql.startswith('BEGIN')], ['BEGIN IMMEDIATE'])
+
+
+# ============ BITÁCORA ============
+class BitacoraTests(SimpleTestCase):
+    """Cola con hilo escritor, descarte con la cola llena y muestreo"""
+
+    def setUp(self):
+        metricas.registro.limpiar()
+        self.registros = []
+        destino = logging.getLogger('pruebas.bitacora.destinos')
+        manejador = logging.Handler()
+        manejador.emit = lambda registro: self.registros.append(registro.getMessage())
+        destino.addHandler(manejador)
+        self.addCleanup(destino.removeHandler, manejador)
+
+    def _registro(self, nombre, nivel, mensaje, *args):
+        return logging.LogRecord(nombre, nivel, __file__, 0, mensaje, args, None)
+
+    def test_cola_entrega_a_los_destinos(self):
+        cola = ManejadorCola('pruebas.bitacora.destinos')
+        lista = [1]
+        cola.handle(self._registro('api', logging.INFO, 'valores %s', lista))
+        lista.append(2)  # El mensaje se resuelve al encolar
+        cola.detener()
+        cola.close()
+        self.assertEqual(self.registros, ['valores [1]'])
+
+    def test_cola_llena_descarta_bajo_error(self):
+        cola = ManejadorCola('pruebas.bitacora.destinos', capacidad=1)
+        cola.pid = os.getpid()  # Sin hilo escritor: la cola no se vacía
+        for indice in range(3):
+            cola.handle(self._registro('api', logging.INFO, 'info %s', indice))
+        self.assertEqual(metricas.LOGS_DESCARTADOS.estado()['series'], [[['api'], 2]])
+
+    def test_muestreo(self):
+        filtro = FiltroMuestreo({'api': 0.0, 'api.detalle': 1.0})
+        self.assertFalse(filtro.filter(self._registro('api.vistas', logging.DEBUG, 'x')))
+        self.assertTrue(filtro.filter(self._registro('api.detalle', logging.DEBUG, 'x')))
+        self.assertTrue(filtro.filter(self._registro('api', logging.INFO, 'x')))
+        self.assertTrue(filtro.filter(self._registro('apis', logging.DEBUG, 'x')))
+        filtro = FiltroMuestreo({'api': 0.5})
+        with mock.patch('api.bitacora.random.random', side_effect=[0.2, 0.8]):
+            self.assertEqual([filtro.filter(self._registro('api', logging.DEBUG, 'x')) for _ in range(2)], [True, False])
+
+    def test_tasas_de_settings_en_loggers_debug(self):
+        # Una tasa para un logger que no está en DEBUG nunca se aplica
+        loggers = settings.LOGGING['loggers']
+        for prefijo in settings.LOGGING['filters']['muestreo']['tasas']:
+            self.assertEqual(loggers[prefijo]['level'], 'DEBUG', prefijo)
+
+
+# ============ MÉTRICAS ============
+@mock.patch.object(metricas.refresco, 'asegurar')
+class MetricasTests(TestCase):
+    """/metrics: series por acción, transiciones y agregación multiproceso"""
+
+    def setUp(self):
+        metricas.registro.limpiar()
+        self.usuario = Usuario.objects.create_user(
+            username='metricas', email='metricas@bikemetro.cl',
+            rut='11111111-1', telefono='+56900000000', password='Metricas-2024!',
+        )
+        self.estacion = Estacion.objects.create(nombre='Metricas', linea='L1', espacios_totales=2)
+        self.espacio = EspacioEstacionamiento.objects.create(
+            estacion=self.estacion, fila=1, columna='A', estado='OCUPADO'
+        )
+        EspacioEstacionamiento.objects.create(estacion=self.estacion, fila=1, columna='B')
+
+    def test_scrape_sin_consultas(self, _asegurar):
+        cliente = APIClient()
+        cliente.force_authenticate(self.usuario)
+        cliente.get('/api/estaciones/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Reserva.objects.create(
+                usuario=self.usuario, estacion=self.estacion, espacio=self.espacio,
+                fecha_expiracion_reserva=timezone.now() + timedelta(minutes=10),
+            )
+        metricas._calcular_negocio()
+
+        consultas = []
+        with connection.execute_wrapper(lambda ejecutar, sql, *args: consultas.append(sql) or ejecutar(sql, *args)):
+            respuesta = self.client.get('/metrics')
+        texto = respuesta.content.decode()
+
+        self.assertEqual(consultas, [])
+        self.assertIn(
+            'bikemetro_http_requests_total{vista="estacion-list",accion="list",metodo="GET",codigo="200"} 1', texto
+        )
+        self.assertIn('bikemetro_reservas_transiciones_total{estado="PENDIENTE"} 1', texto)
+        self.assertIn('bikemetro_estacion_ocupacion_ratio{estacion="Metricas",linea="L1"} 0.5', texto)
+        self.assertIn('bikemetro_expiracion_pendientes_vencidas 0', texto)
+
+    def test_combinar_procesos(self, _asegurar):
+        metricas.REQUESTS.incrementar('estacion-list', 'list', 'GET', '200')
+        metricas.DURACION.observar('estacion-list', 'list', 'GET', valor=0.02)
+        metricas.VENCIDAS.reemplazar({(): 3})
+        antiguo = metricas.registro.estado()
+        metricas.VENCIDAS.reemplazar({(): 1})
+
+        texto = metricas.texto_prometheus(metricas.combinar([metricas.registro.estado(), antiguo]))
+
+        self.assertIn('bikemetro_http_requests_total{vista="estacion-list",accion="list",metodo="GET",codigo="200"} 2', texto)
+        self.assertIn('bikemetro_http_request_duration_seconds_bucket{vista="estacion-list",accion="list",metodo="GET",le="0.025"} 2', texto)
+        self.assertIn('bikemetro_http_request_duration_seconds_count{vista="estacion-list",accion="list",metodo="GET"} 2', texto)
+        self.assertIn('bikemetro_expiracion_pendientes_vencidas 1', texto)
+
+    def test_acceso(self, _asegurar):
+        with self.settings(METRICAS={'TOKEN': ''}):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 403)
+        with self.settings(METRICAS={'TOKEN': 'secreto'}):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get(
+                '/metrics', REMOTE_ADDR='10.0.0.5', HTTP_AUTHORIZATION='Bearer secreto'
+            ).status_code, 200)
+
+    def test_valores_no_finitos(self, _asegurar):
+        metricas.RETRASO.reemplazar({(): float('inf')})
+        metricas.VENCIDAS.reemplazar({(): float('nan')})
+        texto = metricas.texto_prometheus(metricas.registro.estado())
+        self.assertIn('bikemetro_expiracion_retraso_seconds +Inf', texto)
+        self.assertIn('bikemetro_expiracion_pendientes_vencidas NaN', texto)
+
+    def test_compactacion_no_duplica(self, _asegurar):
+        metricas.REQUESTS.incrementar('estacion-list', 'list', 'GET', '200', valor=3)
+        estado = metricas.registro.estado()
+        metricas.registro.limpiar()
+        with tempfile.TemporaryDirectory() as directorio:
+            # PID que no existe: el archivo es de un proceso terminado
+            with open(os.path.join(directorio, '999999999-1.json'), 'w') as archivo:
+                json.dump(estado, archivo)
+            uno, otro = metricas.DirectorioMetricas(directorio), metricas.DirectorioMetricas(directorio)
+            for directorio_metricas in (uno, otro, uno):
+                texto = metricas.texto_prometheus(metricas.combinar(directorio_metricas.otros_procesos()))
+                self.assertIn(
+                    'bikemetro_http_requests_total{vista="estacion-list",accion="list",metodo="GET",codigo="200"} 3',
+                    texto,
+                )
+            self.assertEqual(sorted(os.listdir(directorio)), ['.lock', metricas.ACUMULADO])
+
+    def test_estado_diferido_sin_transicion(self, _asegurar):
+        reserva = Reserva.objects.create(
+            usuario=self.usuario, estacion=self.estacion, espacio=self.espacio,
+            fecha_expiracion_reserva=timezone.now() + timedelta(minutes=10),
+        )
+        metricas.registro.limpiar()
+        parcial = Reserva.objects.only('id', 'usuario_id').get(id=reserva.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            parcial.save()
+        self.assertEqual(metricas.TRANSICIONES.estado()['series'], [])
+
+
+# ============ RÉPLICAS ============
+class ReplicasTests(SimpleTestCase):
+    """Cuándo un request lee de default en vez de una réplica"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def _get(self, emitido_hace, metodo='get'):
+        carga = base64.urlsafe_b64encode(
+            json.dumps({'user_id': '7', 'iat': time.time() - emitido_hace}).encode()
+        ).decode().rstrip('=')
+        return getattr(self.factory, metodo)('/api/reservas/', HTTP_AUTHORIZATION=f'Bearer x.{carga}.firma')
+
+    def test_lectura_de_escrituras_propias(self):
+        self.assertTrue(replicas.leer_de_primaria(self._get(0, 'post')))
+        self.assertTrue(replicas.leer_de_primaria(self._get(0)))  # Token recién emitido
+        self.assertFalse(replicas.leer_de_primaria(self._get(3600)))
+        replicas.marcar_escritura('7')
+        self.assertTrue(replicas.leer_de_primaria(self._get(3600)))
+
+    def test_enrutador_usa_la_replica_del_request(self):
+        enrutador = replicas.EnrutadorReplicas()
+        self.assertIsNone(enrutador.db_for_read(Reserva))
+        token = replicas._replica.set('replica_1')
+        try:
+            self.assertEqual(enrutador.db_for_read(Reserva), 'replica_1')
+        finally:
+            replicas._replica.reset(token)
+
+    def test_copia_en_un_paso(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        origen = os.path.join(directorio, 'default.sqlite3')
+        destino = os.path.join(directorio, 'replicas', 'replica_1.sqlite3')
+        with sqlite3.connect(origen) as conexion:
+            conexion.execute('PRAGMA journal_mode = WAL')
+            conexion.execute('CREATE TABLE fila (valor INTEGER)')
+            conexion.executemany('INSERT INTO fila VALUES (?)', [(indice,) for indice in range(1000)])
+        conexion.close()
+        ReplicarSqlite()._copiar(origen, destino)
+        copia = sqlite3.connect(destino)
+        self.addCleanup(copia.close)
+        self.assertEqual(copia.execute('SELECT COUNT(*) FROM fila').fetchone()[0], 1000)
+
+
+# ============ DISPONIBILIDAD ============
+class DisponibilidadTests(TestCase):
+    """Cache de las vistas async de estaciones: invalidación y una sola carga"""
+
+    def setUp(self):
+        cache_disponibilidad.invalidar()
+        self.estacion = Estacion.objects.create(nombre='Disponibilidad', espacios_totales=2)
+        self.espacio = EspacioEstacionamiento.objects.create(estacion=self.estacion, fila=1, columna='A')
+
+    def test_cambio_de_espacio_invalida(self):
+        url = f'/api/estaciones/{self.estacion.id}/espacios/'
+        self.assertEqual(self.client.get(url).json()[0]['estado'], 'DISPONIBLE')
+        self.assertEqual(self.client.get('/api/estaciones/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+            self.client.get('/api/estaciones/')
+        self.espacio.estado = 'OCUPADO'
+        self.espacio.save()
+        self.assertEqual(self.client.get(url).json()[0]['estado'], 'OCUPADO')
+        self.assertEqual(self.client.get('/api/estaciones/').json()[0]['espacios_disponibles'], 1)
+        self.assertEqual(self.client.get('/api/estaciones/999999/espacios/').status_code, 404)
+
+    def test_cargas_simultaneas_se_comparten(self):
+        cargas = []
+
+        async def cargar():
+            cargas.append(1)
+            await asyncio.sleep(0.01)
+            return b'[]'
+
+        async def pedir():
+            disponibilidad = CacheDisponibilidad(ttl=60)
+            return await asyncio.gather(*(disponibilidad.obtener('estaciones', cargar) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(pedir()), [b'[]'] * 5)
+        self.assertEqual(len(cargas), 1)
+
+    def test_carga_lee_de_default(self):
+        # El valor se comparte con todos: no se carga desde la réplica del request
+        replicas_vistas = []
+
+        async def cargar():
+            replicas_vistas.append(replicas._replica.get())
+            return b'[]'
+
+        async def pedir():
+            token = replicas._replica.set('replica_1')
+            try:
+                await CacheDisponibilidad(ttl=60).obtener(ESTACIONES, cargar)
+                return replicas._replica.get()
+            finally:
+                replicas._replica.reset(token)
+
+        self.assertEqual(asyncio.run(pedir()), 'replica_1')
+        self.assertEqual(replicas_vistas, [None])
+
+    def test_invalidar_estacion_conserva_las_demas(self):
+        cargas = []
+
+        def cargador(clave):
+            async def cargar():
+                cargas.append(clave)
+                return clave
+            return cargar
+
+        async def pedir(disponibilidad, *claves):
+            for clave in claves:
+                await disponibilidad.obtener(clave, cargador(clave))
+
+        disponibilidad = CacheDisponibilidad(ttl=60)
+        uno, dos = clave_espacios(1), clave_espacios(2)
+        asyncio.run(pedir(disponibilidad, ESTACIONES, uno, dos))
+        disponibilidad.invalidar(1)
+        asyncio.run(pedir(disponibilidad, ESTACIONES, uno, dos))
+        self.assertEqual(cargas, [ESTACIONES, uno, dos, ESTACIONES, uno])
+
+        cargas.clear()
+        vencida = CacheDisponibilidad(ttl=0)
+        asyncio.run(pedir(vencida, dos, dos))
+        self.assertEqual(cargas, [dos, dos])
+
+    def test_carga_invalidada_no_se_guarda(self):
+        disponibilidad = CacheDisponibilidad(ttl=60)
+        cargas = []
+
+        async def cargar():
+            cargas.append(1)
+            disponibilidad.invalidar()  # Cambio durante la consulta
+            return len(cargas)
+
+        async def pedir():
+            return [await disponibilidad.obtener(ESTACIONES, cargar) for _ in range(2)]
+
+        self.assertEqual(asyncio.run(pedir()), [1, 2])
+
+    def test_transaccion_revertida_no_deja_pendientes(self):
+        # Las estaciones de un savepoint revertido no se invalidan con la siguiente transacción
+        otra = Estacion.objects.create(nombre='Otra', espacios_totales=1)
+        clave = clave_espacios(self.estacion.id)
+        with mock.patch.object(cache_respuestas, 'invalidar') as invalidar:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    self.espacio.estado = 'OCUPADO'
+                    self.espacio.save()
+                    raise RuntimeError
+            self.assertEqual(invalidar.call_count, 0)
+            version = cache_disponibilidad._version(clave)
+            with self.captureOnCommitCallbacks(execute=True):
+                otra.save()
+            self.assertEqual(invalidar.call_count, 1)
+        self.assertEqual(cache_disponibilidad._version(clave), version)
+
+
+# ============ VISTAS ASYNC ============
+class VistasAsyncTests(TestCase):
+    """Estaciones, espacios y reservas activas: mismo contenido que las vistas DRF"""
+
+    def setUp(self):
+        cache_disponibilidad.invalidar()
+        self.usuario = crear_usuario('asincrono', 10000031)
+        self.estacion = Estacion.objects.create(nombre='Asíncrona', espacios_totales=2)
+        self.espacios = [
+            EspacioEstacionamiento.objects.create(estacion=self.estacion, fila=1, columna=columna)
+            for columna in ('A', 'B')
+        ]
+
+    def _reserva(self, usuario, espacio, estado):
+        return Reserva.objects.create(
+            usuario=usuario, estacion=self.estacion, espacio=espacio, estado=estado,
+            fecha_expiracion_reserva=timezone.now() + timedelta(minutes=10),
+        )
+
+    def test_activas_del_usuario_con_jwt(self):
+        activa = self._reserva(self.usuario, self.espacios[0], 'CONFIRMADA')
+        self._reserva(self.usuario, self.espacios[1], 'FINALIZADA')
+        self._reserva(crear_usuario('ajeno', 10000032), self.espacios[1], 'PENDIENTE')
+
+        respuesta = self.client.get('/api/reservas/activas/')
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertIn('WWW-Authenticate', respuesta)
+
+        token = f'Bearer {AccessToken.for_user(self.usuario)}'
+        respuesta = self.client.get('/api/reservas/activas/', HTTP_AUTHORIZATION=token)
+        self.assertEqual([reserva['id'] for reserva in respuesta.json()], [str(activa.id)])
+        # Con parámetros responde la acción del viewset: mismo contenido
+        delegada = self.client.get('/api/reservas/activas/?x=1', HTTP_AUTHORIZATION=token)
+        self.assertEqual(delegada.json(), respuesta.json())
+
+    def test_estaciones_y_espacios_como_drf(self):
+        for url in ('/api/estaciones/', f'/api/estaciones/{self.estacion.id}/espacios/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).json(), self.client.get(f'{url}?x=1').json())
+
+        self.estacion.estado = 'INACTIVO'
+        self.estacion.save()
+        self.assertEqual(self.client.get(f'/api/estaciones/{self.estacion.id}/espacios/').status_code, 404)
+        self.assertEqual(self.client.get('/api/estaciones/').json(), [])
+
+
+# ============ CACHE DE RESPUESTAS ============
+class CacheRespuestasTests(TestCase):
+    """Respuestas de EstacionViewSet: invalidación por eventos, LRU y una sola construcción"""
+
+    def setUp(self):
+        cache_respuestas.invalidar()  # Los ids de estación se repiten entre tests
+
+    def test_detalle_cacheado_hasta_cambio_de_espacio(self):
+        estacion = Estacion.objects.create(nombre='Respuestas', espacios_totales=2)
+        espacio = EspacioEstacionamiento.objects.create(estacion=estacion, fila=1, columna='A')
+        url = f'/api/estaciones/{estacion.id}/'
+        self.assertEqual(self.client.get(url).json()['espacios_disponibles'], 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).json()['espacios_disponibles'], 2)
+        espacio.estado = 'OCUPADO'
+        with self.captureOnCommitCallbacks(execute=True):
+            espacio.save()
+        self.assertEqual(self.client.get(url).json()['espacios_disponibles'], 1)
+
+    def test_invalida_al_confirmar_sin_esperar_ttl(self):
+        # El TTL es solo un tope de seguridad: el cambio se ve al confirmar, no al vencer
+        estacion = Estacion.objects.create(nombre='Confirmar', espacios_totales=2)
+        espacio = EspacioEstacionamiento.objects.create(estacion=estacion, fila=1, columna='A')
+        url = f'/api/estaciones/{estacion.id}/'
+        with mock.patch.object(cache_respuestas.backend, 'ttl', 3600):
+            self.assertEqual(self.client.get(url).json()['espacios_disponibles'], 2)
+            espacio.estado = 'OCUPADO'
+            with self.captureOnCommitCallbacks(execute=True):
+                espacio.save()
+                with self.assertNumQueries(0):  # Sin confirmar sigue la respuesta guardada
+                    self.assertEqual(self.client.get(url).json()['espacios_disponibles'], 2)
+            self.assertEqual(self.client.get(url).json()['espacios_disponibles'], 1)
+
+    def test_una_invalidacion_por_transaccion(self):
+        estacion = Estacion.objects.create(nombre='Transacción', espacios_totales=2)
+        espacios = [
+            EspacioEstacionamiento(estacion=estacion, fila=1, columna=columna) for columna in ('A', 'B')
+        ]
+        with mock.patch.object(cache_respuestas, 'invalidar') as invalidar:
+            with self.captureOnCommitCallbacks(execute=True):
+                for espacio in espacios:
+                    espacio.save()
+                    espacio.estado = 'OCUPADO'
+                    espacio.save()
+                self.assertEqual(invalidar.call_count, 0)
+        self.assertEqual(invalidar.call_count, 1)
+
+    def test_clave_con_accept(self):
+        estacion = Estacion.objects.create(nombre='Accept', espacios_totales=2)
+        url = f'/api/estaciones/{estacion.id}/'
+        compacta = self.client.get(url).content
+        indentada = self.client.get(url, HTTP_ACCEPT='application/json; indent=4').content
+        self.assertNotIn(b'\n', compacta)
+        self.assertIn(b'\n    ', indentada)
+        self.assertEqual(json.loads(compacta), json.loads(indentada))
+
+    def test_version_compartida_ttl_y_primaria(self):
+        # Dos procesos con la misma cache de Django: la invalidación de uno vale para el otro
+        uno, otro = CacheRespuestas(MemoriaLRU()), CacheRespuestas(MemoriaLRU())
+        construir = mock.Mock(return_value={'estado': 200, 'headers': {}, 'contenido': b'{}'})
+        otro.obtener('k', construir)
+        otro.obtener('k', construir)
+        uno.invalidar()
+        otro.obtener('k', construir)
+        self.assertEqual(construir.call_count, 2)
+
+        vencida = MemoriaLRU(ttl=0)
+        vencida.guardar('k', {'contenido': b'{}'})
+        self.assertIsNone(vencida.leer('k'))
+
+        self.assertFalse(uno.reconstruir_en_primaria())  # Sin réplicas
+        with mock.patch.object(replicas, 'ALIAS', ['replica_1']):
+            uno.invalidar()
+            self.assertTrue(uno.reconstruir_en_primaria())
+
+    def test_una_construccion_y_version_compartida(self):
+        construcciones = []
+
+        def construir():
+            construcciones.append(1)
+            time.sleep(0.05)
+            return {'estado': 200, 'headers': {}, 'contenido': b'{}'}
+
+        respuestas = CacheRespuestas(MemoriaLRU(maximo=2))
+        hilos = [threading.Thread(target=respuestas.obtener, args=('k', construir)) for _ in range(5)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(len(construcciones), 1)
+
+        with tempfile.TemporaryDirectory() as directorio:
+            uno, otro = ArchivoLRU(directorio, maximo=2), ArchivoLRU(directorio, maximo=2)
+            for clave in ('a', 'b', 'c'):
+                uno.guardar(clave, {'estado': 200, 'headers': {}, 'contenido': clave.encode()})
+                time.sleep(0.01)
+            self.assertIsNone(otro.leer('a'))
+            self.assertEqual(otro.leer('c')['contenido'], b'c')
+            uno.invalidar()
+            self.assertEqual(otro.version(), 1)
+            self.assertIsNone(otro.leer('c'))
+
+
+# ============ SERIALIZACIÓN ============
+class SerializacionTests(TestCase):
+    """Renderer rápido y etiquetas precalculadas: mismo resultado que DRF y Django"""
+
+    def test_mismos_bytes_y_etiquetas(self):
+        estacion = Estacion.objects.create(
+            nombre='Serialización \u2028', linea='L1', latitud='-33.4444000', longitud='-70.7233000'
+        )
+        datos = EstacionListSerializer(
+            Estacion.objects.annotate(espacios_ocupados=Value(0)).get(pk=estacion.pk)
+        ).data
+        self.assertEqual(datos['linea_display'], estacion.get_linea_display())
+        self.assertEqual(datos['estado_display'], estacion.get_estado_display())
+        self.assertEqual(datos['latitud'], -33.4444)
+        self.assertEqual(JSONRapidoRenderer().render(datos), JSONRenderer().render(datos))
+
+        detalle = self.client.get(f'/api/estaciones/{estacion.pk}/').json()
+        self.assertEqual((detalle['latitud'], detalle['longitud']), (-33.4444, -70.7233))
+
+        # El mapa de etiquetas es del campo enlazado, no compartido entre serializers
+        campo = EstacionListSerializer().fields['linea_display']
+        self.assertEqual(campo.etiquetas, {valor: str(etiqueta) for valor, etiqueta in Estacion.LINEAS_CHOICES})
+        self.assertIsNot(campo.etiquetas, EstacionListSerializer().fields['linea_display'].etiquetas)
+
+    @skipUnless(renderers.orjson, 'orjson no está instalado')
+    def test_diferencias_con_orjson(self):
+        datos = {'pequeno': 1e-05, 'grande': 2 ** 70, 'texto': 'ñ', 'extremo': 1e20}
+        self.assertEqual(JSONRapidoRenderer().render(datos), JSONRenderer().render(datos))  # Vuelve a DRF
+        del datos['grande']
+        rapido, drf = JSONRapidoRenderer().render(datos), JSONRenderer().render(datos)
+        self.assertEqual(json.loads(rapido), json.loads(drf))
+        self.assertIn(b'0.00001', rapido)
+        self.assertIn(b'1e-05', drf)
+        self.assertIn(b'1e20', rapido)
+        self.assertIn(b'1e+20', drf)
+
+
+class CamposParcialesTests(TestCase):
+    """?fields= / ?omit=: menos campos en la respuesta y menos columnas y JOINs en la consulta"""
+
+    def test_campos_y_consulta_reducidos(self):
+        estacion = Estacion.objects.create(nombre='Parcial', espacios_totales=2)
+        for columna in 'AB':
+            EspacioEstacionamiento.objects.create(estacion=estacion, fila=1, columna=columna)
+
+        with CaptureQueriesContext(connection) as consultas:
+            datos = self.client.get('/api/estaciones/?fields=id,nombre,desconocido').json()
+        self.assertEqual(datos, [{'id': estacion.id, 'nombre': 'Parcial'}])
+        sql = consultas.captured_queries[-1]['sql']
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('espacios_totales', sql)
+
+        datos = self.client.get(f'/api/estaciones/{estacion.id}/?omit=espacios,calificaciones').json()
+        self.assertNotIn('espacios', datos)
+        self.assertEqual(datos['espacios_disponibles'], 2)
+
+        # Sin consultas diferidas por fila (la FK del related manager se carga)
+        with self.assertNumQueries(2):
+            datos = self.client.get(f'/api/estaciones/{estacion.id}/espacios/?fields=id,codigo').json()
+        self.assertEqual([espacio['codigo'] for espacio in datos], ['A1', 'B1'])
+
+    def test_instancias_parciales_sin_snapshot_falso(self):
+        usuario = crear_usuario('parcial', 10000033)
+        estacion = Estacion.objects.create(nombre='Parcial', espacios_totales=2)
+        resena = Resena.objects.create(usuario=usuario, estacion=estacion, calificacion=4)
+        notificacion = Notificacion.objects.create(usuario=usuario, tipo='SISTEMA', titulo='t', mensaje='m')
+
+        # Como las deja .only() en un GET con ?fields=: guardarlas no inventa cambios
+        Resena.objects.only('id', 'comentario').get(pk=resena.pk).save()
+        Notificacion.objects.only('id', 'usuario').get(pk=notificacion.pk).save()
+
+        resumen = ResumenResenas.objects.get(estacion=estacion)
+        self.assertEqual((resumen.total_resenas, resumen.agregados['calificacion']['suma']), (1, 4))
+        usuario.refresh_from_db()
+        self.assertEqual(usuario.notificaciones_no_leidas, 1)
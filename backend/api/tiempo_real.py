@@ -0,0 +1,93 @@
+"""
+Canal en memoria para despertar clientes en espera (long-poll)
+Archivo: backend/api/tiempo_real.py
+
+Cada solicitud en espera registra un asyncio.Event asociado a su usuario.
+Al crearse notificaciones, el código que escribe (síncrono, en cualquier
+hilo) llama a publicar() y los eventos se activan en su propio event loop
+con call_soon_threadsafe. No hay consultas periódicas a la base de datos.
+
+El canal es por proceso: solo despierta esperas atendidas por el mismo
+worker que creó la notificación. En los demás workers la espera termina
+por timeout y el cliente vuelve a consultar.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+
+class Espera:
+    """Una solicitud en espera de nuevas notificaciones"""
+    
+    __slots__ = ('loop', 'evento')
+    
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.evento = asyncio.Event()
+    
+    def despertar(self):
+        """
+        False si su event loop ya se cerró: bajo WSGI cada async_to_sync
+        cierra su loop al terminar el request, y publicar() corre en el
+        on_commit de otro request que no debe fallar por eso
+        """
+        try:
+            self.loop.call_soon_threadsafe(self.evento.set)
+        except RuntimeError:
+            return False
+        return True
+    
+    async def esperar(self, timeout):
+        """Retorna True si fue despertada antes del timeout"""
+        try:
+            await asyncio.wait_for(self.evento.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class CanalNotificaciones:
+    """Registro de esperas por usuario, seguro entre hilos"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._esperas = defaultdict(set)
+    
+    def suscribir(self, usuario_id):
+        espera = Espera()
+        with self._lock:
+            self._esperas[usuario_id].add(espera)
+        return espera
+    
+    def desuscribir(self, usuario_id, espera):
+        with self._lock:
+            esperas = self._esperas.get(usuario_id)
+            if esperas is not None:
+                esperas.discard(espera)
+                if not esperas:
+                    del self._esperas[usuario_id]
+    
+    def publicar(self, usuario_ids):
+        """Despertar las esperas de los usuarios indicados"""
+        usuario_ids = set(usuario_ids)
+        with self._lock:
+            if not self._esperas:
+                return
+            # Recorrer el conjunto más pequeño (difusiones masivas vs. pocas esperas)
+            if len(self._esperas) < len(usuario_ids):
+                destinos = [uid for uid in self._esperas if uid in usuario_ids]
+            else:
+                destinos = [uid for uid in usuario_ids if uid in self._esperas]
+            esperas = [(uid, e) for uid in destinos for e in self._esperas[uid]]
+        
+        for usuario_id, espera in esperas:
+            if not espera.despertar():
+                self.desuscribir(usuario_id, espera)
+    
+    def total_esperas(self):
+        with self._lock:
+            return sum(len(esperas) for esperas in self._esperas.values())
+
+
+canal_notificaciones = CanalNotificaciones()
@@ -5,10 +5,7 @@ Archivo: backend/api/urls.py
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
+from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (
     UsuarioViewSet,
@@ -18,6 +15,10 @@ from .views import (
     ResenaViewSet,
     NotificacionViewSet,
     TicketSoporteViewSet,
+    instrumentacion,
+)
+from .async_views import (
+    esperar_notificaciones, espacios_estacion, estaciones, login, registro, reservas_activas
 )
 
 # Router para los ViewSets
@@ -32,9 +33,21 @@ router.register(r'tickets', TicketSoporteViewSet, basename='ticket')
 
 urlpatterns = [
     # Autenticación JWT
-    path('auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    # login y registro son async: el hash de contraseña corre en un pool de hilos
+    path('auth/login/', login, name='token_obtain_pair'),
     path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('auth/register/', UsuarioViewSet.as_view({'post': 'create'}), name='register'),
+    path('auth/register/', registro, name='register'),
+    
+    # Long-poll de notificaciones (antes del router para no tomarse como {id})
+    path('notificaciones/esperar/', esperar_notificaciones, name='notificacion-esperar'),
+    
+    # Lecturas frecuentes async (antes del router; mismos nombres que sus rutas)
+    path('estaciones/', estaciones, name='estacion-list'),
+    path('estaciones/<int:pk>/espacios/', espacios_estacion, name='estacion-espacios'),
+    path('reservas/activas/', reservas_activas, name='reserva-activas'),
+    
+    # Resumen de instrumentación por vista (staff)
+    path('instrumentacion/', instrumentacion, name='instrumentacion'),
     
     # Rutas del router
     path('', include(router.urls)),
@@ -3,12 +3,18 @@ ViewSets para la API REST de BikeMetro
 Archivo: backend/api/views.py
 """
 
+import hmac
+
 from rest_framework import viewsets, status, permissions
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework_simplejwt.views import TokenObtainPairView
+from django.conf import settings
+from django.http import HttpResponse
 from django.utils import timezone
-from django.db.models import Q
+from django.views.decorators.http import require_GET
+from django.db import transaction
+from django.db.models import Count, Q
 from datetime import timedelta
 from django.contrib.auth import get_user_model
 
@@ -17,7 +23,7 @@ Usuario = get_user_model()
 
 from .models import (
     Usuario, Estacion, EspacioEstacionamiento, 
-    Reserva, Pago, Resena, Notificacion, TicketSoporte
+    Reserva, Pago, Resena, ResumenResenas, Notificacion, TicketSoporte
 )
 from .serializers import (
     UsuarioSerializer, UsuarioPerfilSerializer, UsuarioRegistroSerializer,
@@ -27,10 +33,17 @@ from .serializers import (
     PagoSerializer, ResenaSerializer,
     NotificacionSerializer, TicketSoporteSerializer
 )
+from .calificaciones import combinar_resumenes, formatear_resumen
+from .campos import CamposDinamicosViewMixin
+from .instrumentacion import registro as registro_instrumentacion
+from .metricas import TIPO_CONTENIDO as TIPO_METRICAS, direccion_local, exponer as exponer_metricas
+from .notificaciones import sumar_no_leidas
+from .pagination import ResenaCursorPagination
+from .respuestas import RespuestaCacheadaMixin
 
 
 # ============ USUARIO VIEWS ============
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """ViewSet para gestión de usuarios"""
     serializer_class = UsuarioPerfilSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -50,7 +63,7 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         user = request.user
         
         if request.method == 'GET':
-            serializer = UsuarioPerfilSerializer(user)
+            serializer = UsuarioPerfilSerializer(user, context=self.get_serializer_context())
             return Response(serializer.data)
         
         elif request.method in ['PATCH', 'PUT']:
@@ -77,16 +90,33 @@ class UsuarioViewSet(viewsets.ModelViewSet):
 
 
 # ============ ESTACIÓN VIEWS ============
-class EstacionViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet para estaciones (solo lectura)"""
-    queryset = Estacion.objects.filter(estado='ACTIVO').order_by('linea', 'nombre')
+ESTACIONES_ACTIVAS = Estacion.objects.filter(estado='ACTIVO').select_related(
+    'resumen_resenas'
+).order_by('linea', 'nombre')
+
+
+class EstacionViewSet(CamposDinamicosViewMixin, RespuestaCacheadaMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet para estaciones (solo lectura, respuestas en api/respuestas.py)"""
+    queryset = ESTACIONES_ACTIVAS.annotate(
+        espacios_ocupados=Count(
+            'espacios', filter=Q(espacios__estado__in=['OCUPADO', 'RESERVADO'])
+        )
+    )
     serializer_class = EstacionListSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None  # Desactivar paginación para estaciones
     
+    def get_queryset(self):
+        if not self.usa_campo('espacios_disponibles'):
+            # Sin el conteo de ocupados no hace falta el JOIN + GROUP BY
+            return ESTACIONES_ACTIVAS.all()
+        return super().get_queryset()
+    
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return EstacionDetailSerializer
+        if self.action == 'espacios':
+            return EspacioEstacionamientoSerializer
         return EstacionListSerializer
     
     @action(detail=True, methods=['get'], permission_classes=[permissions.AllowAny])
@@ -94,11 +124,13 @@ class EstacionViewSet(viewsets.ReadOnlyModelViewSet):
         """Obtener espacios de una estación"""
         estacion = self.get_object()
         espacios = estacion.espacios.all().order_by('fila', 'columna')
-        serializer = EspacioEstacionamientoSerializer(espacios, many=True)
+        # El related manager asigna `estacion` a cada espacio leyendo su FK
+        espacios = self.reducir_consulta(espacios, columnas_extra=['estacion'])
+        serializer = self.get_serializer(espacios, many=True)
         return Response(serializer.data)
 
 # ============ RESERVA VIEWS ============
-class ReservaViewSet(viewsets.ModelViewSet):
+class ReservaViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de reservas
     
@@ -120,13 +152,15 @@ class ReservaViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Solo reservas del usuario actual"""
-        return Reserva.objects.filter(usuario=self.request.user).order_by('-created_at')
+        return Reserva.objects.filter(usuario=self.request.user).select_related(
+            'estacion', 'espacio'
+        ).order_by('-created_at')
     
     def get_serializer_class(self):
         """Serializer según la acción"""
         if self.action == 'create':
             return ReservaCreateSerializer
-        elif self.action == 'list':
+        elif self.action in ('list', 'activas', 'historial'):
             return ReservaListSerializer
         return ReservaSerializer
     
@@ -162,7 +196,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
         reservas = self.get_queryset().filter(
             estado__in=['PENDIENTE', 'CONFIRMADA', 'EN_CURSO']
         )
-        serializer = ReservaListSerializer(reservas, many=True)
+        serializer = self.get_serializer(self.reducir_consulta(reservas), many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
@@ -174,7 +208,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
         reservas = self.get_queryset().filter(
             estado__in=['FINALIZADA', 'CANCELADA', 'EXPIRADA']
         )
-        serializer = ReservaListSerializer(reservas, many=True)
+        serializer = self.get_serializer(self.reducir_consulta(reservas), many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
@@ -294,7 +328,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
 
 
 # ============ PAGO VIEWS ============
-class PagoViewSet(viewsets.ReadOnlyModelViewSet):
+class PagoViewSet(CamposDinamicosViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para consulta de pagos (solo lectura)
     Los pagos se generan automáticamente al finalizar reservas
@@ -310,24 +344,57 @@ class PagoViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 # ============ RESEÑA VIEWS ============
-class ResenaViewSet(viewsets.ModelViewSet):
+class ResenaViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de reseñas
+    
+    list: paginación por cursor, filtro opcional ?estacion=<id>
+    list con ?resumen=1: solo agregados (promedios e histogramas)
     """
     serializer_class = ResenaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ResenaCursorPagination
+    
+    def _estacion_id(self):
+        """Validar el filtro ?estacion="""
+        estacion_id = self.request.query_params.get('estacion', None)
+        if estacion_id in (None, ''):
+            return None
+        try:
+            return int(estacion_id)
+        except ValueError:
+            raise ValidationError({'estacion': 'Debe ser un ID numérico'})
     
     def get_queryset(self):
         """Filtrar por estación si se especifica"""
-        queryset = Resena.objects.all()
-        estacion_id = self.request.query_params.get('estacion', None)
-        if estacion_id:
+        queryset = Resena.objects.select_related('usuario', 'estacion')
+        estacion_id = self._estacion_id()
+        if estacion_id is not None:
             queryset = queryset.filter(estacion_id=estacion_id)
         return queryset.order_by('-created_at')
+    
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('resumen') in ('1', 'true'):
+            return self.resumen(request)
+        return super().list(request, *args, **kwargs)
+    
+    def resumen(self, request):
+        """
+        Agregados de reseñas (de una estación o de todas)
+        GET /api/resenas/?resumen=1[&estacion=<id>]
+        """
+        estacion_id = self._estacion_id()
+        resumenes = ResumenResenas.objects.all()
+        if estacion_id is not None:
+            resumenes = resumenes.filter(estacion_id=estacion_id)
+        
+        datos = formatear_resumen(combinar_resumenes(resumenes), detallado=True)
+        datos['estacion'] = estacion_id
+        return Response(datos)
 
 
 # ============ NOTIFICACIÓN VIEWS ============
-class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
+class NotificacionViewSet(CamposDinamicosViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para consulta de notificaciones
     """
@@ -347,9 +414,18 @@ class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
         POST /api/notificaciones/{id}/marcar_leida/
         """
         notificacion = self.get_object()
-        notificacion.leida = True
-        notificacion.fecha_leida = timezone.now()
-        notificacion.save()
+        ahora = timezone.now()
+        
+        # UPDATE condicional: solo descuenta si la notificación no estaba leída
+        with transaction.atomic():
+            marcadas = Notificacion.objects.filter(
+                pk=notificacion.pk, leida=False
+            ).update(leida=True, fecha_leida=ahora)
+            sumar_no_leidas({request.user.id: -marcadas})
+        
+        if marcadas:
+            notificacion.leida = True
+            notificacion.fecha_leida = ahora
         
         serializer = self.get_serializer(notificacion)
         return Response(serializer.data)
@@ -360,15 +436,31 @@ class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
         Marcar todas las notificaciones como leídas
         POST /api/notificaciones/marcar_todas_leidas/
         """
-        self.get_queryset().update(
-            leida=True,
-            fecha_leida=timezone.now()
-        )
+        with transaction.atomic():
+            marcadas = self.get_queryset().filter(leida=False).update(
+                leida=True,
+                fecha_leida=timezone.now()
+            )
+            sumar_no_leidas({request.user.id: -marcadas})
         return Response({'mensaje': 'Todas las notificaciones marcadas como leídas'})
+    
+    @action(detail=False, methods=['get'])
+    def no_leidas(self, request):
+        """
+        Cantidad de notificaciones no leídas (badge)
+        GET /api/notificaciones/no_leidas/
+        
+        Se lee del contador desnormalizado del usuario (por PK, sin contar
+        filas). No se usa request.user porque puede venir de la cache de JWT.
+        """
+        no_leidas = Usuario.objects.filter(pk=request.user.pk).values_list(
+            'notificaciones_no_leidas', flat=True
+        ).first()
+        return Response({'no_leidas': no_leidas or 0})
 
 
 # ============ TICKET SOPORTE VIEWS ============
-class TicketSoporteViewSet(viewsets.ModelViewSet):
+class TicketSoporteViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de tickets de soporte
     """
@@ -379,4 +471,37 @@ class TicketSoporteViewSet(viewsets.ModelViewSet):
         """Solo tickets del usuario actual"""
         return TicketSoporte.objects.filter(
             usuario=self.request.user
-        ).order_by('-created_at')
\ No newline at end of file
+        ).select_related('usuario').order_by('-created_at')
+
+
+# ============ INSTRUMENTACIÓN ============
+@api_view(['GET', 'DELETE'])
+@permission_classes([permissions.IsAdminUser])
+def instrumentacion(request):
+    """
+    Resumen de la instrumentación por vista (solo staff)
+    GET /api/instrumentacion/     -> requests, consultas y tiempos (ms) por vista
+    DELETE /api/instrumentacion/  -> reiniciar los histogramas de este proceso
+    """
+    if request.method == 'DELETE':
+        registro_instrumentacion.limpiar()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(registro_instrumentacion.resumen())
+
+
+# ============ MÉTRICAS ============
+@require_GET
+def metricas(request):
+    """
+    Métricas en formato Prometheus
+    GET /metrics  (con METRICAS['TOKEN']: header "Authorization: Bearer <token>";
+    sin token, solo desde loopback)
+    Vista Django simple: sin autenticación DRF ni negociación de contenido
+    """
+    token = settings.METRICAS.get('TOKEN')
+    if token:
+        if not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+            return HttpResponse(status=401)
+    elif not direccion_local(request.META.get('REMOTE_ADDR')):
+        return HttpResponse(status=403)
+    return HttpResponse(exponer_metricas(), content_type=TIPO_METRICAS)
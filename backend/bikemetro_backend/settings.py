@@ -38,12 +38,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentacion.InstrumentacionMiddleware',  # Primero: mide el request completo
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Debe estar antes de CommonMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.perfilador.PerfiladorMiddleware',  # Después de auth: X-Perfilar solo para staff
+    'api.replicas.ReplicasMiddleware',  # Después de auth: lectura propia por usuario
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,11 +86,52 @@ DATABASES = {
 }
 """
 
+# SQLite ajustado para escrituras concurrentes (bikemetro_backend/sqlite/base.py)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'bikemetro_backend.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),  # Conexiones persistentes (los PRAGMAs se pagan una vez)
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',  # atomic() toma el lock de escritura al empezar
+            'init_command': (
+                'PRAGMA journal_mode = WAL;'       # Lectores no bloquean al escritor ni viceversa
+                'PRAGMA synchronous = NORMAL;'     # Seguro con WAL: fsync solo en checkpoints
+                'PRAGMA busy_timeout = 5000;'      # Esperar el lock hasta 5 s en vez de fallar
+                'PRAGMA cache_size = -32000;'      # ~32 MB de caché de páginas por conexión
+                'PRAGMA mmap_size = 268435456;'    # Leer hasta 256 MB vía mmap
+                'PRAGMA temp_store = MEMORY;'      # Tablas temporales y ordenamientos en memoria
+            ),
+        },
+    }
+}
+
+# Réplicas de lectura (api/replicas.py). DB_REPLICAS=N agrega replica_1..N:
+# copias SQLite locales que mantiene `manage.py replicar_sqlite`
+# Solo lectura: sin BEGIN IMMEDIATE ni cambio de journal_mode, y query_only
+# rechaza cualquier escritura que no pase por el enrutador
+_OPCIONES_REPLICA = {
+    'init_command': (
+        'PRAGMA query_only = ON;'
+        'PRAGMA busy_timeout = 5000;'      # Esperar mientras replicar_sqlite copia
+        'PRAGMA cache_size = -32000;'
+        'PRAGMA mmap_size = 268435456;'
+        'PRAGMA temp_store = MEMORY;'
+    ),
+}
+for _indice in range(1, int(os.environ.get('DB_REPLICAS', 0)) + 1):
+    DATABASES[f'replica_{_indice}'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / 'replicas' / f'replica_{_indice}.sqlite3',
+        'OPTIONS': _OPCIONES_REPLICA,
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['api.replicas.EnrutadorReplicas']
+
+REPLICAS = {
+    'ALIAS': [alias for alias in DATABASES if alias != 'default'],
+    'VENTANA_LECTURA_PROPIA': 5,  # Segundos leyendo de default tras una escritura propia
 }
 
 # Custom User Model
@@ -112,6 +156,24 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hash de contraseñas: costo configurable (api/hashers.py)
+PASSWORD_HASHERS = [
+    'api.hashers.PBKDF2PasswordHasher',
+    'api.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PASSWORD_HASH_COSTO = {
+    'PBKDF2_ITERACIONES': int(os.environ.get('PBKDF2_ITERACIONES', 600000)),
+    'BCRYPT_ROUNDS': int(os.environ.get('BCRYPT_ROUNDS', 12)),
+}
+
+# Hilos para hashear/verificar contraseñas en login y registro (api/hashing.py)
+# 0 = calcular en el hilo del request
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+
 # Internationalization
 LANGUAGE_CODE = 'es-cl'
 TIME_ZONE = 'America/Santiago'
@@ -131,11 +193,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # JSON con orjson si está instalado (api/renderers.py), mismos bytes que JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -168,6 +235,62 @@ SIMPLE_JWT = {
     
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    
+    # Rotación con revocación del refresh anterior (api/revocacion.py)
+    'TOKEN_REFRESH_SERIALIZER': 'api.serializers.TokenRefreshRevocableSerializer',
+}
+
+# Revocación de refresh tokens: filtro de Bloom por proceso + tabla tokens_revocados
+REVOCACION_TOKENS = {
+    'CAPACIDAD': 100000,     # jti esperados en el filtro antes de reconstruirlo
+    'ERROR': 0.01,           # Tasa de falsos positivos (confirmados en BD)
+    'PURGA_INTERVALO': 3600, # Segundos entre purgas de tokens expirados
+}
+
+# Cache en memoria de usuarios autenticados por JWT (api.authentication)
+JWT_CACHE_USUARIOS = {
+    'MAXIMO': 2048,  # Usuarios en cache por proceso (LRU)
+    'TTL': 30,       # Segundos antes de volver a leer el usuario de la BD
+}
+
+# Cache de estaciones y espacios de las vistas async (api/disponibilidad.py)
+DISPONIBILIDAD = {
+    'TTL': 2,  # Segundos: cuánto puede tardar un proceso en ver cambios hechos por otro
+}
+
+# Cache de respuestas de EstacionViewSet (api/respuestas.py), invalidada por
+# cambios de estaciones y espacios. BACKEND: memoria (versión en CACHES) |
+# archivo (compartida entre workers) | '' (desactivada)
+CACHE_RESPUESTAS = {
+    'BACKEND': os.environ.get('CACHE_RESPUESTAS', 'memoria'),
+    'DIRECTORIO': os.environ.get('CACHE_RESPUESTAS_DIRECTORIO', BASE_DIR / 'cache' / 'respuestas'),
+    'MAXIMO': 256,  # Respuestas guardadas (LRU)
+    'TTL': 60,      # Segundos. Solo tope de seguridad si no llega una invalidación: no se espera al TTL
+}
+
+# Instrumentación por request (api/instrumentacion.py)
+INSTRUMENTACION = {
+    'ACTIVA': True,
+    'SERVER_TIMING': True,  # Header Server-Timing con BD, serialización y total (solo DEBUG o staff)
+    'MAX_VISTAS': 200,      # Vistas distintas con histograma propio (el resto va a "(otras)")
+}
+
+# Perfilado bajo demanda (api/perfilador.py, manage.py perfiles)
+PERFILADOR = {
+    'ACTIVO': os.environ.get('PERFILADOR_ACTIVO', '0') == '1',  # False: el middleware no se carga
+    'MUESTREO': float(os.environ.get('PERFILADOR_MUESTREO', 0)),  # Fracción de requests perfilados sin header
+    'MODO': 'cprofile',       # cprofile | muestreo (stacks colapsados)
+    'INTERVALO_MS': 1,        # Periodo del modo muestreo
+    'DIRECTORIO': BASE_DIR / 'logs' / 'perfiles',
+    'MAX_PERFILES': 200,      # Anillo en disco: se borran los más antiguos
+}
+
+# Métricas Prometheus en GET /metrics (api/metricas.py)
+METRICAS = {
+    'TOKEN': os.environ.get('METRICAS_TOKEN', ''),  # Si se define, el scrape envía "Authorization: Bearer <token>"; vacío = solo loopback
+    'DIRECTORIO': os.environ.get('METRICAS_DIRECTORIO', ''),  # Workers pre-fork: un archivo por proceso (vacío = un proceso)
+    'INTERVALO_VOLCADO': 5,    # Segundos entre volcados del proceso a DIRECTORIO
+    'INTERVALO_REFRESCO': 15,  # Segundos entre cálculos de ocupación y expiración (hilo aparte)
 }
 
 # CORS Settings
@@ -202,6 +325,11 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Para desarro
 # EMAIL_HOST_PASSWORD = 'tu-password'
 
 # Logging
+# Los loggers solo encolan; un hilo escribe en consola y archivo (api/bitacora.py)
+# BITACORA_COLA=0 vuelve a escribir dentro del request (útil para depurar)
+BITACORA_COLA = os.environ.get('BITACORA_COLA', '1') == '1'
+_destinos_log = ['cola'] if BITACORA_COLA else ['console', 'file']
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -210,6 +338,17 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'api.bitacora.FormatoJSON',
+        },
+    },
+    'filters': {
+        # Fracción de registros DEBUG que se conserva por logger; solo 'api'
+        # está en DEBUG (django en INFO: sus DEBUG no llegan al filtro)
+        'muestreo': {
+            '()': 'api.bitacora.FiltroMuestreo',
+            'tasas': {'api': 0.1},
+        },
     },
     'handlers': {
         'console': {
@@ -217,22 +356,37 @@ LOGGING = {
             'formatter': 'verbose',
         },
         'file': {
-            'class': 'logging.FileHandler',
+            'class': 'api.bitacora.ArchivoRotativo',
             'filename': BASE_DIR / 'logs' / 'bikemetro.log',
-            'formatter': 'verbose',
+            'max_bytes': 50 * 1024 * 1024,
+            'respaldos': 5,
+            'segundos': 24 * 3600,  # Rotar también una vez al día
+            'formatter': 'json',
+        },
+        'cola': {
+            '()': 'api.bitacora.ManejadorCola',
+            'destino': 'bitacora.destinos',
+            'capacidad': 10000,
+            'filters': ['muestreo'],
         },
     },
     'root': {
-        'handlers': ['console', 'file'],
+        'handlers': _destinos_log,
         'level': 'INFO',
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': _destinos_log,
             'level': 'INFO',
             'propagate': False,
         },
         'api': {
+            'handlers': _destinos_log,
+            'level': 'DEBUG',
+            'propagate': False,
+        },
+        # Sin uso propio: sus handlers son los destinos del hilo escritor de 'cola'
+        'bitacora.destinos': {
             'handlers': ['console', 'file'],
             'level': 'DEBUG',
             'propagate': False,
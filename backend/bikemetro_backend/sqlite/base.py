@@ -0,0 +1,56 @@
+"""
+Backend SQLite con PRAGMAs al conectar y BEGIN IMMEDIATE
+Archivo: backend/bikemetro_backend/sqlite/base.py
+
+Agrega a django.db.backends.sqlite3 las opciones de Django 5.1, para que
+actualizar sea solo cambiar ENGINE:
+- OPTIONS['init_command']: sentencias separadas por ';' que se ejecutan en
+  cada conexión nueva (PRAGMAs de WAL, synchronous, caché, mmap...).
+- OPTIONS['transaction_mode']: DEFERRED, IMMEDIATE o EXCLUSIVE para el BEGIN
+  de transaction.atomic. Con IMMEDIATE la transacción toma el lock de
+  escritura al empezar y espera en busy_timeout; con DEFERRED una
+  transacción que lee y luego escribe falla con "database is locked" si
+  otra escribió entremedio, sin esperar.
+
+Costo de IMMEDIATE: aplica a todo atomic(), también a los que solo leen
+(ej: el GET de un formulario del admin), y SQLite admite un solo escritor.
+Un atomic() de solo lectura espera a los escritores y los bloquea hasta
+terminar. Los atomic() de la app escriben todos y sus lecturas (vistas,
+vistas async, reportes) corren en autocommit, sin BEGIN; un bloque nuevo
+que solo lea no debería envolverse en atomic().
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+MODOS_TRANSACCION = (None, 'DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    init_command = None
+    transaction_mode = None
+
+    def get_connection_params(self):
+        parametros = super().get_connection_params()
+        self.init_command = parametros.pop('init_command', None)
+        self.transaction_mode = parametros.pop('transaction_mode', None)
+        if self.transaction_mode not in MODOS_TRANSACCION:
+            raise ImproperlyConfigured(
+                f"transaction_mode debe ser uno de {MODOS_TRANSACCION}, no {self.transaction_mode!r}"
+            )
+        return parametros
+
+    def get_new_connection(self, conn_params):
+        conexion = super().get_new_connection(conn_params)
+        if self.init_command:
+            for sentencia in self.init_command.split(';'):
+                if sentencia.strip():
+                    conexion.execute(sentencia)
+        return conexion
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
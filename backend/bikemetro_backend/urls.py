@@ -9,6 +9,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework import permissions
 
+from api.views import metricas
+
 urlpatterns = [
     # Panel de administración
     path('admin/', admin.site.urls),
@@ -18,6 +20,9 @@ urlpatterns = [
     
     # API REST Framework (navegador)
     path('api-auth/', include('rest_framework.urls')),
+    
+    # Métricas Prometheus
+    path('metrics', metricas, name='metricas'),
 ]
 
 # Configuración para servir archivos media en desarrollo
@@ -4,8 +4,9 @@ import { COLORES_ESTADO_ESPACIO } from '../constants/config';
 import COLORS from '../constants/colors';
 
 export default function SpaceMatrix({ espacios, onSelectSpace, selectedSpace }) {
-  const filas = ['1', '2', '3', '4', '5', '6', '7'];
-  const columnas = ['A', 'B', 'C'];
+  // Filas y columnas según los espacios de la estación (A-C lado 1, D-F lado 2)
+  const filas = [...new Set(espacios.map(e => String(e.fila)))].sort((a, b) => a - b);
+  const columnas = [...new Set(espacios.map(e => e.columna))].sort();
 
   const getEspacio = (fila, columna) => {
     return espacios.find(e => e.fila === parseInt(fila) && e.columna === columna);